@@ -0,0 +1,239 @@
+"""
+End-to-end benchmarks of the main workflows against a local fake canvas.
+Each benchmark records wall time, api requests, bytes received and peak python memory, and fails when any of
+them goes over the budget recorded in benchmark_budgets.json by more than its tolerance.
+Wall times are taken while tracemalloc is tracing, so only compare them to other runs of this suite. They also
+swing with machine load, so they're given a few seconds' slack on top of their tolerance and only catch large
+regressions, like requests being made one after another; request counts and bytes are the exact gates.
+
+Run the benchmarks:
+    python -m unittest _benchmark_test
+Record new budgets, after a change that is meant to move them:
+    python _benchmark_test.py --record
+Benchmark bigger courses (budgets are only checked at the size they were recorded at):
+    python _benchmark_test.py --weeks=16
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+import publish_script
+import update_term_date
+import update_video_links
+from publish_script import Course
+from lxd.fake_canvas import FakeCanvas
+
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_budgets.json')
+RECORD = '--record' in sys.argv
+
+WEEKS = 8
+ITEMS_PER_MODULE = 6
+PAGE_SIZE = 4000
+SECTIONS = 6
+LATENCY = 0.005
+
+# how far over budget each measure can go before failing; request counts shouldn't drift at all
+TOLERANCES = {
+    'requests': 0.0,
+    'bytes': 0.05,
+    'wall_time': 0.5,
+    'peak_memory': 0.25,
+}
+# and how far over that, in the measure's units, for measures a loaded machine can push up
+SLACK = {
+    'wall_time': 2.0,
+}
+
+for _arg in sys.argv:
+    if _arg.startswith('--weeks='):
+        WEEKS = int(_arg.split('=', 1)[1])
+
+
+def config() -> dict:
+    return {
+        'weeks': WEEKS,
+        'items_per_module': ITEMS_PER_MODULE,
+        'page_size': PAGE_SIZE,
+        'sections': SECTIONS,
+        'latency': LATENCY,
+    }
+
+
+def load_budgets() -> dict:
+    if not os.path.isfile(BUDGETS_FILE):
+        return {}
+    with open(BUDGETS_FILE, 'r') as f:
+        budgets = json.load(f)
+    # budgets recorded against differently sized courses don't apply
+    if budgets.get('config') != config():
+        return {}
+    return budgets['budgets']
+
+
+class TestWorkflowBenchmarks(unittest.TestCase):
+    fake: FakeCanvas = None
+    results: dict = {}
+    budgets: dict = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.budgets = load_budgets()
+        cls.results = {}
+        cls.cwd = os.getcwd()
+        # workflows read and write their working files (bios.json, course_data/...) in the working directory
+        cls.temp_dir = tempfile.mkdtemp()
+        os.chdir(cls.temp_dir)
+        shutil.copy(os.path.join(cls.cwd, 'template.html'), cls.temp_dir)
+
+        cls.fake = FakeCanvas(latency=LATENCY, seed=0)
+        cls.fake.start()
+        cls.instructors = [cls.fake.add_user(f'Alex Teacher{i}', f'ateacher{i}@unity.edu')
+                           for i in range(SECTIONS)]
+        faculty_course = cls.fake.add_faculty_pages_course(cls.instructors)
+        with open('constants.json', 'w') as f:
+            json.dump(cls.fake.constants(profilePagesCourseId=faculty_course['id'], httpCacheFile=None), f)
+        publish_script.load_constants('constants.json')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+        publish_script.reset_default_api_link()
+
+        print(f'\n{"workflow":<32}{"seconds":>10}{"requests":>10}{"KiB in":>10}{"peak KiB":>10}')
+        for name, result in cls.results.items():
+            print(f'{name:<32}{result["wall_time"]:>10.2f}{result["requests"]:>10}'
+                  f'{result["bytes"] // 1024:>10}{result["peak_memory"] // 1024:>10}')
+
+        if RECORD:
+            with open(BUDGETS_FILE, 'w') as f:
+                json.dump({'config': config(), 'budgets': cls.results}, f, indent=2, sort_keys=True)
+            print(f'Recorded budgets to {BUDGETS_FILE}')
+
+    def synthetic_course(self, course_code: str) -> Course:
+        data = self.fake.add_synthetic_course(
+            course_code, modules=WEEKS, items_per_module=ITEMS_PER_MODULE, page_size=PAGE_SIZE)
+        return Course.get_by_id(data['id'])
+
+    def measure(self, name: str, func, *args, **kwargs):
+        """
+        Runs func cold, then records and checks its wall time, request count and peak memory
+        """
+        publish_script.ResponseCache.shared().clear()
+        publish_script.RequestMetrics.shared().reset()
+        self.fake.reset_log()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                out = func(*args, **kwargs)
+        finally:
+            wall_time = time.perf_counter() - start
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        result = {
+            'wall_time': round(wall_time, 3),
+            'requests': self.fake.request_count,
+            'bytes': self.fake.bytes_sent,
+            'peak_memory': peak_memory,
+        }
+        self.results[name] = result
+
+        budget = self.budgets.get(name)
+        if budget and not RECORD:
+            for measure, tolerance in TOLERANCES.items():
+                if measure not in budget:
+                    continue
+                limit = budget[measure] * (1 + tolerance) + SLACK.get(measure, 0)
+                self.assertLessEqual(
+                    result[measure], limit,
+                    f'{name} went over its {measure} budget: {result[measure]} > {limit} '
+                    f'(recorded {budget[measure]}). Rerun with --record if this is intended.')
+        return out
+
+    def test_content_updates_and_fixes(self):
+        course = self.synthetic_course('BP_BENCH001')
+        self.measure('content_updates_and_fixes', course.content_updates_and_fixes)
+        self.assertFalse(self.fake.courses[course.id]['tabs'][2]['hidden'])
+
+    def test_lock_module_items(self):
+        course = self.synthetic_course('BP_BENCH002')
+        self.assertTrue(self.measure('lock_module_items', publish_script.lock_module_items, course))
+
+    def test_lock_module_items_async(self):
+        course = self.synthetic_course('BP_BENCH003')
+        self.assertTrue(self.measure(
+            'lock_module_items_async', asyncio.run, publish_script.lock_module_items_async(course)))
+
+    def test_replace_faculty_profiles(self):
+        bp_course = self.fake.add_synthetic_course(
+            'BP_BENCH004', modules=1, items_per_module=1, page_size=PAGE_SIZE)
+        courses = []
+        for instructor in self.instructors:
+            section = self.fake.add_synthetic_course(
+                f'24-Jan_BENCH004_{instructor["id"]}', modules=1, items_per_module=1, page_size=PAGE_SIZE,
+                blueprint=False)
+            self.fake.associate(bp_course['id'], section['id'])
+            self.fake.enroll(section['id'], instructor)
+            courses.append(Course.get_by_id(section['id']))
+
+        if os.path.isfile('bios.json'):
+            os.remove('bios.json')
+        profiles, urls = self.measure('replace_faculty_profiles', publish_script.update_faculty_profiles, courses)
+        self.assertEqual(len(urls), SECTIONS)
+        for course, instructor in zip(courses, self.instructors):
+            self.assertIn(f'Meet your instructor, {instructor["name"]}!', course.front_page.body)
+
+    def test_align_assignments(self):
+        source, destination = self.fake.add_theme_migration_courses(
+            'BENCH005', weeks=WEEKS, page_size=PAGE_SIZE)
+        update_video_links.assignments_lut_cache = None
+        update_video_links.files_lut_cache = None
+        self.measure('align_assignments', update_video_links.align_assignments, destination['id'], source['id'])
+        assignment = next(iter(self.fake.courses[destination['id']]['assignments'].values()))
+        self.assertIn('Lorem ipsum', assignment['description'])
+
+    def test_align_assignments_graphql(self):
+        source, destination = self.fake.add_theme_migration_courses(
+            'BENCH008', weeks=WEEKS, page_size=PAGE_SIZE)
+        update_video_links.assignments_lut_cache = None
+        update_video_links.files_lut_cache = None
+        publish_script.CONSTANTS['useGraphql'] = True
+        try:
+            self.measure(
+                'align_assignments_graphql', update_video_links.align_assignments, destination['id'], source['id'])
+        finally:
+            del publish_script.CONSTANTS['useGraphql']
+        assignment = next(iter(self.fake.courses[destination['id']]['assignments'].values()))
+        self.assertIn('Lorem ipsum', assignment['description'])
+
+    def test_update_learning_materials(self):
+        source, destination = self.fake.add_theme_migration_courses(
+            'BENCH006', weeks=WEEKS, page_size=PAGE_SIZE)
+        self.measure(
+            'update_learning_materials', update_video_links.update_learning_materials,
+            destination['id'], source['id'], 1, WEEKS)
+        page = self.fake._find(str(destination['id']), 'pages', 'week_1_learning_materials')
+        self.assertIn('youtube.com/embed/week1', page['body'])
+
+    def test_update_term_date(self):
+        course = self.fake.add_synthetic_course(
+            'BP_BENCH007', modules=WEEKS, items_per_module=ITEMS_PER_MODULE, page_size=PAGE_SIZE)
+        self.measure('update_term_date', update_term_date.main, course['id'], 7)
+        assignment = next(iter(self.fake.courses[course['id']]['assignments'].values()))
+        self.assertTrue(assignment['due_at'].startswith('2024-01-10'))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[arg for arg in sys.argv if arg != '--record' and not arg.startswith('--weeks=')])
@@ -0,0 +1,534 @@
+import json
+import os
+import tempfile
+import time
+import types
+import unittest
+
+import requests
+
+import publish_script
+import update_video_links
+from lxd.fake_canvas import FakeCanvas
+
+
+class TestFakeCanvas(unittest.TestCase):
+    fake: FakeCanvas = None
+
+    def setUp(self):
+        self.fake = FakeCanvas(per_page=5, seed=0)
+        self.fake.start()
+        self.course = self.fake.add_synthetic_course('BP_TEST000', modules=4, items_per_module=4)
+        self.link = publish_script.CanvasApiLink(
+            headers={'Authorization': 'Bearer fake'},
+            api_url=self.fake.api_url,
+            account_id=self.fake.account_id,
+            http_cache=False,
+            response_cache=False)
+
+    def tearDown(self):
+        self.link.close()
+        self.fake.stop()
+
+    def test_pagination(self):
+        response = requests.get(f'{self.fake.api_url}/courses/{self.course["id"]}/pages')
+        self.assertIn('next', response.links)
+        self.assertIn('last', response.links)
+        self.assertEqual(len(response.json()), 5)
+        pages = self.link.get_paged_data(f'courses/{self.course["id"]}/pages')
+        self.assertEqual(len(pages), len(self.fake.courses[self.course['id']]['pages']))
+        self.assertNotIn('body', pages[0], "Bodies were sent without include[]=body")
+
+        self.fake.bookmark_paging = True
+        self.assertListEqual(
+            [page['page_id'] for page in self.link.get_paged_data(f'courses/{self.course["id"]}/pages')],
+            [page['page_id'] for page in pages])
+
+    def test_rate_limit_headers(self):
+        response = requests.get(f'{self.fake.api_url}/courses/{self.course["id"]}')
+        self.assertIn('X-Rate-Limit-Remaining', response.headers)
+        self.assertIn('X-Request-Cost', response.headers)
+
+    def test_compression(self):
+        pages = self.link.get(f'courses/{self.course["id"]}/pages', params={'include[]': 'body'})
+        self.assertEqual(len(pages), 5)
+        self.assertLess(self.fake.request_log[-1]['bytes'], len(json.dumps(pages)))
+
+        self.fake.compress_min_size = None
+        self.assertListEqual(
+            self.link.get(f'courses/{self.course["id"]}/pages', params={'include[]': 'body'}), pages)
+
+    def test_wire_size(self):
+        response = self.link.request('GET', f'courses/{self.course["id"]}/pages', params={'include[]': 'body'})
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        self.assertEqual(publish_script.RequestMetrics.wire_size(response), self.fake.request_log[-1]['bytes'])
+        self.assertLess(publish_script.RequestMetrics.wire_size(response), len(response.content))
+        # without a Content-Length, as for stored responses, the decoded size is counted
+        stored = publish_script._build_response(200, {}, response.content, response.url)
+        self.assertEqual(publish_script.RequestMetrics.wire_size(stored), len(response.content))
+
+    def test_decode_json(self):
+        def respond(body: bytes, content_type: str = 'application/json; charset=utf-8'):
+            return publish_script._build_response(
+                200, {'Content-Type': content_type} if content_type else {}, body, self.fake.api_url)
+
+        self.assertEqual(publish_script.decode_json(respond(b'{"id": 1}')), {'id': 1})
+        self.assertEqual(publish_script.decode_json(respond(b'[1, 2]', None)), [1, 2])
+        for response in (respond(b''), respond(b'<p>page</p>', 'text/html'), respond(b'{"id": ')):
+            self.assertIs(publish_script.decode_json(response), response)
+
+    def test_non_json_responses(self):
+        self.fake.rate_limit_bucket = 0
+        response = self.link.request('GET', f'courses/{self.course["id"]}', retry=False)
+        self.assertEqual(response.status_code, 403)
+        self.assertIs(publish_script.decode_json(response), response)
+
+    def test_http_cache_revalidates(self):
+        self.fake.etags = True
+        cache = publish_script.HttpCache(':memory:')
+        link = publish_script.CanvasApiLink(
+            headers={'Authorization': 'Bearer fake'}, api_url=self.fake.api_url, account_id=self.fake.account_id,
+            http_cache=cache, response_cache=False)
+        url = f'courses/{self.course["id"]}/pages'
+        first = link.get(url, params={'include[]': 'body'})
+        second = link.get(url, params={'include[]': 'body'})
+        self.assertListEqual(second, first)
+        self.assertEqual([entry['status'] for entry in self.fake.request_log], [200, 304])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # validators aren't recorded in cassettes, so the cache sits out while one is in use
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with publish_script.Cassette(os.path.join(temp_dir, 'cassette.json.gz'), publish_script.Cassette.RECORD):
+                self.assertListEqual(link.get(url, params={'include[]': 'body'}), first)
+        self.assertEqual(self.fake.request_log[-1]['status'], 200)
+        link.close()
+
+    def test_http_cache_refetches_evicted(self):
+        class EvictingCache(publish_script.HttpCache):
+            # the stored response goes while the request is out, as when another process clears the cache
+            def validators(self, key):
+                out = super().validators(key)
+                self.clear()
+                return out
+
+        self.fake.etags = True
+        link = publish_script.CanvasApiLink(
+            headers={'Authorization': 'Bearer fake'}, api_url=self.fake.api_url, account_id=self.fake.account_id,
+            http_cache=EvictingCache(':memory:'), response_cache=False)
+        url = f'courses/{self.course["id"]}/pages'
+        first = link.get(url)
+        self.assertListEqual(link.get(url), first)
+        self.assertEqual([entry['status'] for entry in self.fake.request_log], [200, 304, 200])
+        link.close()
+
+    def test_injected_errors_are_retried(self):
+        self.fake.fail_next(429)
+        self.fake.fail_next(503)
+        data = self.link.get(f'courses/{self.course["id"]}')
+        self.assertEqual(data['id'], self.course['id'])
+        self.assertListEqual([entry['status'] for entry in self.fake.request_log], [429, 503, 200])
+
+    def test_writes(self):
+        course = publish_script.Course(self.course, api_link=self.link)
+        course.set_navigation_tab_hidden('Dropout Detective', False)
+        self.assertFalse(course.get_tab('Dropout Detective').get('hidden', False))
+
+        course.patch_late_policy({'late_policy': {'missing_submission_deduction_enabled': True}})
+        self.assertTrue(course.get_late_policy()['missing_submission_deduction_enabled'])
+
+        page = course.get_pages()[0]
+        page.update_content('<p>changed</p>')
+        self.assertEqual(publish_script.Page.get_by_id(course, page.id).body, '<p>changed</p>')
+
+    def test_deferred_writes(self):
+        course = publish_script.Course(self.course, api_link=self.link)
+        with course.deferred_writes() as changes:
+            course.set_navigation_tab_hidden('Dropout Detective', True)
+            course.set_navigation_tab_hidden('Dropout Detective', False)
+            course.set_navigation_tab_hidden('BigBlueButton', True)
+            course.patch_late_policy({'late_policy': {'missing_submission_deduction_enabled': True}})
+            course.patch_late_policy({'late_policy': {'missing_submission_deduction': 10}})
+            course.change_syllabus('<p>syllabus</p>')
+            self.assertEqual(self.fake.request_count, 0)
+
+        methods = [entry['method'] for entry in self.fake.request_log]
+        self.assertEqual(methods.count('GET'), 1, "The tab list was read more than once")
+        self.assertEqual(methods.count('PATCH'), 1)
+        # BigBlueButton was already hidden, so only Dropout Detective and the course settings are PUT
+        self.assertEqual(methods.count('PUT'), 2)
+        self.assertTrue(changes.late_policy['missing_submission_deduction_enabled'])
+        self.assertEqual(changes.late_policy['missing_submission_deduction'], 10)
+        tabs = {tab['label']: tab for tab in self.fake.courses[self.course['id']]['tabs']}
+        self.assertTrue(tabs['BigBlueButton']['hidden'])
+        self.assertEqual(self.fake.courses[self.course['id']]['course']['syllabus_body'], '<p>syllabus</p>')
+
+        # Modules is already visible, though canvas doesn't say hidden: false
+        course = publish_script.Course(self.course, api_link=self.link)
+        self.fake.reset_log()
+        with course.deferred_writes():
+            course.set_navigation_tab_hidden('Modules', False)
+        self.assertNotIn('PUT', [entry['method'] for entry in self.fake.request_log])
+
+        # nothing is sent when the block fails
+        self.fake.reset_log()
+        with self.assertRaises(ValueError):
+            with course.deferred_writes():
+                course.set_navigation_tab_hidden('Dropout Detective', True)
+                course.change_syllabus('<p>half done</p>')
+                raise ValueError()
+        self.assertEqual(self.fake.request_count, 0)
+        self.assertIsNone(course._pending_changes)
+
+    def test_no_op_writes_are_skipped(self):
+        course = publish_script.Course(self.course, api_link=self.link)
+        page = publish_script.Page.get_by_id(course, course.get_pages()[0].id)
+        avoided = self.link.metrics.writes_avoided
+        self.fake.reset_log()
+
+        page.update_content(page['body'], page.name)
+        course.change_syllabus(course.syllabus)
+        self.assertNotIn('PUT', [entry['method'] for entry in self.fake.request_log])
+        self.assertEqual(self.link.metrics.writes_avoided - avoided, 2)
+
+        page.update_content('<p>changed</p>')
+        self.assertIn('PUT', [entry['method'] for entry in self.fake.request_log])
+
+    def test_listing_stubs(self):
+        course = publish_script.Course(self.course, api_link=self.link)
+        pages = course.get_pages()
+        self.assertFalse(any(page.is_hydrated for page in pages))
+        self.fake.reset_log()
+
+        stored = self.fake.courses[self.course['id']]['pages'][pages[0].id]
+        self.assertEqual(pages[0].body, stored['body'])
+        self.assertEqual(self.fake.request_count, 1)
+        self.assertEqual(pages[0]['body'], stored['body'])
+        self.assertEqual(self.fake.request_count, 1)
+
+        publish_script.hydrate(pages)
+        self.assertTrue(all(page.is_hydrated for page in pages))
+        self.assertEqual(self.fake.request_count, len(pages))
+
+        assignments = course.get_assignments(include_body=False)
+        self.assertFalse(assignments[0].is_hydrated)
+        self.assertTrue(course.get_assignments()[0].is_hydrated)
+
+    def test_identity_map(self):
+        course = publish_script.Course.get_by_id(self.course['id'], link=self.link)
+        self.assertIs(publish_script.Course.get_by_id(self.course['id'], link=self.link), course)
+        self.assertIs(course.front_page, publish_script.Course.get_by_id(self.course['id'], link=self.link).front_page)
+
+        page = publish_script.Page.get_by_id(course, course.get_pages()[0].id)
+        self.assertIs(course.get_pages()[0], page)
+        self.assertTrue(page.is_hydrated, "A listing stub dropped the body of the page it was merged into")
+
+        stored = self.fake.courses[self.course['id']]['pages'][page.id]
+        stored['body'], stored['updated_at'] = '<p>edited elsewhere</p>', '2024-02-01T00:00:00Z'
+        self.assertIs(course.get_pages()[0], page)
+        self.assertEqual(page.body, '<p>edited elsewhere</p>')
+
+    def test_compact_modules(self):
+        course = publish_script.Course(self.course, api_link=self.link)
+        modules = course.get_modules()
+        compact = course.get_modules(compact=True)
+        self.assertNotIn('content_details', self.fake.request_log[-1]['path'] + str(compact))
+        for module, record in zip(modules, compact, strict=True):
+            self.assertEqual(record['name'], module['name'])
+            for item, item_record in zip(module['items'], record['items'], strict=True):
+                for key in publish_script.ModuleItem.FIELDS:
+                    self.assertEqual(item_record.get(key), item.get(key), key)
+                self.assertEqual('page_url' in item_record, 'page_url' in item)
+                with self.assertRaises(KeyError):
+                    item_record['html_url']
+        self.assertTrue(publish_script.lock_module_items(course))
+
+        summary = publish_script.CourseSummary({**self.course, 'syllabus_body': '<p>long</p>'})
+        self.assertEqual(summary.base_code, 'TEST000')
+        self.assertNotIn('syllabus_body', summary.to_dict())
+        self.assertIs(summary.course(self.link), publish_script.Course.get_by_id(self.course['id'], link=self.link))
+
+    def test_course_catalog(self):
+        term = self.fake.add_term('DE8W01.08.24')
+        for i in range(12):
+            self.fake.add_course(f'24-Jan_TEST{i:03d}', term=term if i % 2 else None)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            catalog = publish_script.CourseCatalog(os.path.join(temp_dir, 'catalog.sqlite'))
+            self.fake.reset_log()
+            # a stale account misses while it's listed in the background
+            self.assertEqual(catalog.search('bp_test', [self.fake.account_id], link=self.link), [])
+            catalog.wait()
+            found = catalog.search('bp_test', [self.fake.account_id], link=self.link)
+            self.assertEqual([course['id'] for course in found], [self.course['id']])
+            # the whole account is listed once, a hundred courses a page
+            self.assertEqual(self.fake.request_count, 1)
+
+            self.assertEqual(len(catalog.search(
+                '_TEST0', [self.fake.account_id], term_id=term['id'], link=self.link)), 6)
+            self.assertEqual(len(catalog.search(None, [self.fake.account_id], link=self.link)), 13)
+            self.assertEqual(catalog.search('BP_MISSING', [self.fake.account_id], link=self.link), [])
+            self.assertEqual(self.fake.request_count, 1)
+
+            # another instance or token has its own listings
+            other = publish_script.CanvasApiLink(
+                headers={'Authorization': 'Bearer other'}, api_url=self.fake.api_url,
+                account_id=self.fake.account_id, http_cache=False, response_cache=False)
+            self.assertTrue(catalog.is_fresh(self.fake.account_id, self.link))
+            self.assertFalse(catalog.is_fresh(self.fake.account_id, other))
+            other.close()
+
+            newest = self.fake.add_course('24-Jan_TEST012')
+            catalog.record(self.fake.account_id, [newest], self.link)
+            self.assertEqual(catalog.search('test01', [self.fake.account_id], link=self.link)[0]['id'], newest['id'])
+
+            catalog.max_age = 0
+            del self.fake.courses[newest['id']]
+            catalog.search('TEST012', [self.fake.account_id], link=self.link)
+            catalog.wait()
+            catalog.max_age = 60
+            self.assertEqual(catalog.search('TEST012', [self.fake.account_id], link=self.link), [])
+            self.assertEqual(len(catalog.search(None, [self.fake.account_id], link=self.link)), 13)
+
+    def test_reset_course_lookup(self):
+        saved = {name: vars(publish_script)[name] for name in ('ACCOUNT_IDS_BY_NAME', 'CONSTANTS')
+                 if name in vars(publish_script)}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'catalog.sqlite')
+            publish_script.CONSTANTS = {'courseCatalogFile': path}
+            publish_script.ACCOUNT_IDS_BY_NAME = {'Root': self.fake.root_account_id, 'DE': self.fake.account_id}
+            catalog = publish_script.CourseCatalog.shared(path)
+            try:
+                # each lookup lists the next stale account in the background
+                course = publish_script.Course.get_by_code('BP_TEST000', link=self.link)
+                catalog.wait()
+                self.assertIs(publish_script.Course.get_by_code('BP_TEST000', link=self.link), course)
+                catalog.wait()
+
+                old_id = course.id
+                course.reset(prompt=False)
+                self.assertNotEqual(course.id, old_id)
+                self.assertNotIn(old_id, self.fake.courses)
+                self.fake.reset_log()
+                found = publish_script.Course.get_by_code('BP_TEST000', link=self.link)
+                self.assertIs(found, course)
+                self.assertEqual(found.id, course.id)
+                # the catalog says only distance ed has a match, so only it is searched
+                self.assertEqual([entry['path'].split('?')[0] for entry in self.fake.request_log],
+                                 [f'/api/v1/accounts/{self.fake.account_id}/courses'])
+
+                # the courses themselves come from canvas, so changes since the listing show up
+                self.fake.courses[course.id]['course']['name'] = 'Renamed'
+                newest = self.fake.add_course('BP_TEST000')
+                self.assertEqual(publish_script.Course.get_by_code('BP_TEST000', link=self.link).id, newest['id'])
+                publish_script.Course.get_all_by_code('BP_TEST000', link=self.link)
+                self.assertEqual(course['name'], 'Renamed')
+            finally:
+                for name in ('ACCOUNT_IDS_BY_NAME', 'CONSTANTS'):
+                    if name in saved:
+                        setattr(publish_script, name, saved[name])
+                    else:
+                        delattr(publish_script, name)
+
+    def test_account_metadata(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'constants.json')
+            metadata_file = os.path.join(temp_dir, 'metadata.json')
+            with open(path, 'w') as f:
+                json.dump(self.fake.constants(metadataFile=metadata_file), f)
+            self.fake.reset_log()
+            first = types.SimpleNamespace()
+            publish_script.load_constants(path, first)
+            self.assertEqual(first.ACCOUNT_ID, self.fake.account_id)
+            self.assertEqual(self.fake.request_count, 1)
+
+            # starting up again takes no requests
+            second = types.SimpleNamespace()
+            publish_script.load_constants(path, second)
+            self.assertEqual(second.ACCOUNT_IDS_BY_NAME, first.ACCOUNT_IDS_BY_NAME)
+            self.assertEqual(self.fake.request_count, 1)
+
+            metadata = publish_script.AccountMetadata(metadata_file)
+            self.assertEqual(metadata.get(
+                f'{publish_script.AccountMetadata.scope(self.fake.api_url, first.HEADERS)} accounts', list),
+                first.ACCOUNTS)
+            self.assertEqual(metadata.get('empty', list), [])
+            self.assertEqual(metadata.get('empty', lambda: ['fetched']), ['fetched'])
+            self.assertEqual((metadata.hits, metadata.misses), (1, 2))
+            metadata.max_age = 0
+            self.assertEqual(metadata.get('empty', lambda: ['refreshed']), ['refreshed'])
+
+    def test_concurrent_account_search(self):
+        root_course = self.fake.add_course('BP_TEST000')
+        root_course['account_id'] = self.fake.root_account_id
+        newest = self.fake.add_course('BP_TEST000')
+        self.fake.latency = 0.2
+        saved = {name: vars(publish_script)[name] for name in ('ACCOUNT_IDS_BY_NAME', 'CONSTANTS')
+                 if name in vars(publish_script)}
+        publish_script.CONSTANTS = {'courseCatalogFile': None}
+        try:
+            publish_script.ACCOUNT_IDS_BY_NAME = {
+                'Empty': 1, 'Root': self.fake.root_account_id, 'DE': self.fake.account_id}
+            started = time.perf_counter()
+            self.assertEqual(publish_script.Course.get_by_code('BP_TEST000', link=self.link).id, root_course['id'])
+            self.assertLess(time.perf_counter() - started, 0.4, "Accounts were searched one after another")
+
+            publish_script.ACCOUNT_IDS_BY_NAME = {'DE': self.fake.account_id, 'Root': self.fake.root_account_id}
+            courses = publish_script.Course.get_all_by_code('BP_TEST000', link=self.link)
+            self.assertEqual([course.id for course in courses], [newest['id'], self.course['id']])
+
+            # once the root account's match decides it, the distance ed search stops paging
+            self.fake.bookmark_paging = True
+            self.fake.add_course('BP_TEST100')['account_id'] = self.fake.root_account_id
+            for _ in range(30):
+                self.fake.add_course('BP_TEST100')
+            publish_script.ACCOUNT_IDS_BY_NAME = {'Root': self.fake.root_account_id, 'DE': self.fake.account_id}
+            self.fake.reset_log()
+            publish_script.Course.get_by_code('BP_TEST100', link=self.link)
+            time.sleep(1)
+            listed = [entry for entry in self.fake.request_log
+                      if entry['path'].startswith(f'/api/v1/accounts/{self.fake.account_id}/courses')]
+            self.assertLessEqual(len(listed), 2)
+        finally:
+            for name in ('ACCOUNT_IDS_BY_NAME', 'CONSTANTS'):
+                if name in saved:
+                    setattr(publish_script, name, saved[name])
+                else:
+                    delattr(publish_script, name)
+
+    def test_course_structure_loader(self):
+        other = self.fake.add_synthetic_course('BP_TEST001', modules=2, items_per_module=4)
+        rest_modules = self.link.get_paged_data(f'courses/{self.course["id"]}/modules?include[]=items')
+        courses = [publish_script.Course(data, api_link=self.link) for data in (self.course, other)]
+        self.fake.reset_log()
+
+        loader = publish_script.CourseStructureLoader(self.link, page_size=3)
+        loader.load(courses)
+        # four modules three at a time take two pages, and both courses share each query
+        self.assertEqual(loader.queries, 2)
+        self.assertEqual(self.fake.request_count, 2)
+
+        course = courses[0]
+        for module, rest_module in zip(course.get_module_outline(), rest_modules, strict=True):
+            self.assertEqual(module['id'], rest_module['id'])
+            for item, rest_item in zip(module['items'], rest_module['items'], strict=True):
+                for key in ('id', 'type', 'position', 'title', 'content_id', 'page_url', 'url', 'html_url'):
+                    self.assertEqual(item.get(key), rest_item.get(key), key)
+        state = self.fake.courses[self.course['id']]
+        self.assertEqual(len(course.get_assignments()), len(state['assignments']))
+        self.assertFalse(course.get_assignments()[0].is_hydrated)
+        self.assertEqual(len(course.get_discussions()), len(state['discussion_topics']))
+        self.assertEqual(len(course.get_rubric_associations()), len(state['rubric_associations']))
+        self.assertEqual(self.fake.request_count, 2)
+
+        # the outline doesn't have every field, so get_modules still returns the full REST modules
+        modules = course.get_modules()
+        self.assertEqual(self.fake.request_count, 3)
+        self.assertIn('published', modules[0]['items'][0])
+
+        course.reset_cache()
+        self.assertEqual(len(course.get_module_outline()), len(rest_modules))
+        self.assertEqual(self.fake.request_count, 4)
+
+    def test_course_structures_are_reused(self):
+        saved = vars(publish_script).get('CONSTANTS')
+        publish_script.CONSTANTS = {'useGraphql': True}
+        update_video_links.api_link = self.link
+        try:
+            course_id = self.course['id']
+            first, = update_video_links.get_course_structures(course_id)
+            queries = self.fake.request_count
+            self.assertIs(update_video_links.get_course_structures(course_id)[0], first)
+            self.assertEqual(self.fake.request_count, queries)
+            # get_modules stays on REST, with every field
+            self.assertIn('published', update_video_links.get_modules(course_id)[0]['items'][0])
+
+            # anything the script writes may change the structure
+            self.link.put(f'courses/{course_id}', data={'course[name]': 'Renamed'})
+            self.assertIsNot(update_video_links.get_course_structures(course_id)[0], first)
+        finally:
+            update_video_links.api_link = None
+            update_video_links.course_structures.clear()
+            update_video_links.course_structures_loaded_at = None
+            if saved is None:
+                del publish_script.CONSTANTS
+            else:
+                publish_script.CONSTANTS = saved
+
+    def test_snapshot(self):
+        course = publish_script.Course(self.course, api_link=self.link)
+        state = self.fake.courses[self.course['id']]
+        self.fake.add_content(self.course['id'], 'quizzes', {'title': 'Final Quiz', 'description': '<p>quiz</p>'})
+        self.fake.reset_log()
+
+        with course.snapshot(poll_interval=0) as snapshot:
+            requests_made = self.fake.request_count
+            rest_modules = course.get_modules()
+            modules = snapshot.get_modules()
+            self.assertEqual([module['name'] for module in modules], [module['name'] for module in rest_modules])
+            for module, rest_module in zip(modules, rest_modules, strict=True):
+                for item, rest_item in zip(module['items'], rest_module['items'], strict=True):
+                    for key in ('type', 'position', 'title', 'page_url'):
+                        self.assertEqual(item.get(key), rest_item.get(key), key)
+                    if item['type'] == 'Page':
+                        self.assertEqual(item['url'], rest_item['url'])
+
+            pages = {page['url']: page for page in snapshot.get_pages()}
+            self.assertEqual(len(pages), len(state['pages']))
+            for page in state['pages'].values():
+                self.assertEqual(pages[page['url']].body, page['body'])
+                self.assertEqual(pages[page['url']].name, page['title'])
+            self.assertTrue(pages['home']['front_page'])
+            self.assertEqual(snapshot.get_page('home').body, pages['home'].body)
+            self.assertEqual(len(snapshot.get_pages('Learning Materials')), 4)
+
+            assignments = {assignment.name: assignment for assignment in snapshot.get_assignments()}
+            for assignment in state['assignments'].values():
+                self.assertEqual(assignments[assignment['name']].body, assignment['description'])
+                self.assertEqual(assignments[assignment['name']]['due_at'], assignment['due_at'])
+            discussions = {discussion.name: discussion for discussion in snapshot.get_discussions()}
+            for discussion in state['discussion_topics'].values():
+                self.assertEqual(discussions[discussion['title']].body, discussion['message'])
+            self.assertEqual([quiz.body for quiz in snapshot.get_quizzes()], ['<p>quiz</p>'])
+            # reading the snapshot is all local, besides the modules listing compared against
+            self.assertEqual(self.fake.request_count, requests_made + 1)
+            path = snapshot.path
+        self.assertFalse(os.path.exists(path), "The temporary export wasn't removed")
+
+    def test_lock_module_items(self):
+        class ProgressBar:
+            # just enough of a ttk.Progressbar for update_progress_bar, keeping every value it's set to
+            def __init__(self):
+                self.values = []
+
+            def winfo_toplevel(self):
+                return types.SimpleNamespace(update=lambda: None, update_idletasks=lambda: None)
+
+            def __setitem__(self, key, value):
+                self.values.append(value)
+
+        course = publish_script.Course(self.course, api_link=self.link)
+        progress_bar = ProgressBar()
+        self.assertTrue(publish_script.lock_module_items(course, progress_bar))
+        self.assertEqual(progress_bar.values, sorted(progress_bar.values), "Progress went backwards")
+        self.assertEqual(progress_bar.values[-1], 100)
+        items = sum(len(module['items']) for module in self.fake.courses[self.course['id']]['modules'])
+        restricted = self.fake.courses[self.course['id']]['restricted']
+        # the same learning materials page can appear twice in a module
+        self.assertGreater(len(restricted), 0)
+        self.assertLessEqual(len(restricted), items)
+
+    def test_content_migration(self):
+        destination = self.fake.add_course('DEV_TEST000')
+        course = publish_script.Course(destination, api_link=self.link)
+        source = publish_script.Course(self.course, api_link=self.link)
+        migration = publish_script.poll_migration(
+            self.link.post(f'courses/{course.id}/content_migrations', data={
+                'migration_type': 'course_copy_importer',
+                'settings[source_course_id]': source.id}),
+            poll_interval=0,
+            api_link=self.link)
+        self.assertEqual(migration['workflow_state'], 'completed')
+        self.assertEqual(len(course.get_modules()), len(source.get_modules()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -48,7 +48,7 @@ class TestOneOff(unittest.TestCase):
         # course_codes = ['DEV_ARTS101', 'DEV_MATH201']
         # courses = [Course.get_by_code(code) for code in course_codes]
         term = Term.get_by_code('24-Jan')
-        courses = Course.get_all_by_code(code=None, term=term)
+        courses = Course.get_summaries(code=None, term=term)
         codes = [course.base_code for course in courses]
         codes = list(set(codes))
         bps = Course.get_all_by_code('BP_')
@@ -147,7 +147,7 @@ class SectionDiagnostics(unittest.IsolatedAsyncioTestCase):
         bad_sections = []
         for section in sections:
             print(section.name)
-            my_modules = section.get_modules()
+            my_modules = section.get_modules(compact=True)
             name_map = map(lambda module: module['name'].lower(), my_modules)
             name_list = list(name_map)
             name_set = set(name_list)
@@ -1,3 +1,4 @@
+import os
 import re
 import unittest
 from typing import List
@@ -346,6 +347,51 @@ class TestContent(unittest.TestCase):
         self.test_fix(publish_script.FrontPageFixSet)
 
 
+class TestApiLink(unittest.TestCase):
+    def test_objects_share_link(self):
+        course = get_test_course()
+        pages = course.get_pages()
+        self.assertGreater(len(pages), 0, "No pages found")
+        self.assertIs(pages[0].api_link, course.api_link, "Pages do not share the course's api link")
+        self.assertIs(course.front_page.api_link.session, course.api_link.session, "Sessions are not shared")
+
+    def test_helpers_borrow_session(self):
+        course = get_test_course()
+        link = publish_script.CanvasApiLink(pool_size=2)
+        modules = publish_script.get_paged_data(
+            f'{API_URL}/courses/{course.id}/modules', api_link=link)
+        self.assertListEqual(
+            [module['id'] for module in modules],
+            [module['id'] for module in course.get_modules()])
+        link.close()
+
+    def test_writes_invalidate_cached_reads(self):
+        course = get_test_course()
+        link = publish_script.CanvasApiLink(response_cache=publish_script.ResponseCache())
+        tab = link.get(f'courses/{course.id}/tabs')[-1]
+        hidden = tab.get('hidden', False)
+        link.put(f'courses/{course.id}/tabs/{tab["id"]}', data={'hidden': not hidden})
+        tab = next(t for t in link.get(f'courses/{course.id}/tabs') if t['id'] == tab['id'])
+        self.assertEqual(tab.get('hidden', False), not hidden, "Read after write was served stale")
+        link.put(f'courses/{course.id}/tabs/{tab["id"]}', data={'hidden': hidden})
+        link.close()
+
+    def test_cassette_replays_recording(self):
+        course = get_test_course()
+        path = 'test_cassette.json.gz'
+        link = publish_script.CanvasApiLink(http_cache=False, response_cache=False)
+        with publish_script.Cassette(path, publish_script.Cassette.RECORD):
+            recorded = link.get(f'courses/{course.id}/modules')
+        with publish_script.Cassette(path, publish_script.Cassette.REPLAY) as cassette:
+            replayed = link.get(f'courses/{course.id}/modules')
+            with self.assertRaises(KeyError):
+                link.get(f'courses/{course.id}/pages')
+        self.assertListEqual(recorded, replayed)
+        self.assertGreater(len(cassette.interactions), 0)
+        link.close()
+        os.remove(path)
+
+
 class TestTerm(unittest.TestCase):
     def setUp(self):
         pass
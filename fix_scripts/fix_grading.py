@@ -95,5 +95,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        ps.report_metrics()
 # ANIM315 BIOL203 BIOL103
\ No newline at end of file
@@ -13,7 +13,7 @@ def main():
 
 def check_all_courses():
     term = Term.get_by_code('DE8W01.08.24')
-    courses = Course.get_all_by_code(code=None, term=term)
+    courses = Course.get_summaries(code=None, term=term)
     codes = [course.base_code for course in courses]
     codes = list(set(codes))
     bps = Course.get_all_by_code('BP_')
@@ -41,4 +41,7 @@ def check_all_courses():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        publish_script.report_metrics()
\ No newline at end of file
@@ -80,5 +80,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        ps.report_metrics()
 # ANIM315 BIOL203 BIOL103
\ No newline at end of file
@@ -0,0 +1,1347 @@
+import copy
+import hashlib
+import html
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import zipfile
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+
+class FakeCanvas:
+    """
+    A local, in-memory stand-in for the parts of the Canvas REST api this project uses, for load
+    and throughput testing without touching a real instance.
+    Listings are paged with Link headers, every response carries rate limit headers, and latency,
+    throttling and 429/5xx errors can be injected.
+
+    Usage:
+        with FakeCanvas(latency=0.05) as canvas:
+            course = canvas.add_synthetic_course(modules=16, items_per_module=10)
+            link = CanvasApiLink(api_url=canvas.api_url, account_id=canvas.account_id)
+    """
+
+    JOB_STATES = ['queued', 'running', 'completed']
+    """
+    The states a migration or progress object steps through, one per poll
+    """
+
+    def __init__(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            latency: float | tuple[float, float] = 0.0,
+            per_page: int = 10,
+            max_per_page: int = 100,
+            bookmark_paging: bool = False,
+            rate_limit_bucket: float = 700.0,
+            rate_limit_refill: float = 10.0,
+            request_cost: float = 1.0,
+            preflight_cost: float = 50.0,
+            error_rate: float = 0.0,
+            error_statuses: tuple[int, ...] = (429, 500, 502, 503),
+            compress_min_size: int | None = 1024,
+            etags: bool = False,
+            seed: int = None):
+        """
+        Args:
+            host: the interface to listen on
+            port: the port to listen on. 0 picks a free one.
+            latency: seconds to wait before answering each request, or a (min, max) range to draw from
+            per_page: the page size when a request doesn't ask for one
+            max_per_page: the largest page size a request can ask for
+            bookmark_paging: page listings with opaque bookmarks instead of numbers, and leave out rel="last"
+            rate_limit_bucket: the size of the simulated rate limit bucket
+            rate_limit_refill: how many units the bucket leaks per second
+            request_cost: how many units each request costs once it finishes
+            preflight_cost: how many units each in-flight request holds until it finishes
+            error_rate: the chance any request fails with one of error_statuses
+            error_statuses: the statuses randomly injected errors use
+            compress_min_size: bodies at least this big are gzipped or deflated when the client accepts it,
+                like canvas' front end does. None never compresses.
+            etags: tag successful GETs with an ETag, and answer a matching If-None-Match with an empty 304
+            seed: seeds injected errors and latency, for repeatable runs
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.per_page = per_page
+        self.max_per_page = max_per_page
+        self.bookmark_paging = bookmark_paging
+        self.rate_limit_bucket = rate_limit_bucket
+        self.rate_limit_refill = rate_limit_refill
+        self.request_cost = request_cost
+        self.preflight_cost = preflight_cost
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.compress_min_size = compress_min_size
+        self.etags = etags
+        self.random = random.Random(seed)
+
+        self.server: ThreadingHTTPServer | None = None
+        self.server_thread: threading.Thread | None = None
+
+        self.request_log: list[dict] = []
+        """
+        Every request made, as dicts of method, path, status and the body's size on the wire
+        """
+        self.throttled_count = 0
+
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1000)
+        self._bucket_used = 0.0
+        self._bucket_updated = time.monotonic()
+        self._in_flight = 0
+        self._forced_errors: list[int] = []
+
+        self.account_id = self.next_id()
+        self.accounts = {
+            self.account_id: {'id': self.account_id, 'name': 'Distance Education', 'parent_account_id': None},
+        }
+        root_id = self.next_id()
+        self.accounts[root_id] = {'id': root_id, 'name': 'Unity College', 'parent_account_id': None}
+        self.root_account_id = root_id
+        self.terms: dict[int, dict] = {}
+        self.users: dict[int, dict] = {}
+        self.courses: dict[int, dict] = {}
+        self.jobs: dict[int, dict] = {}
+        self.export_files: dict[int, bytes] = {}
+        self.routes: list[tuple[str, re.Pattern, Callable]] = self._make_routes()
+
+    # Server lifecycle
+    def __enter__(self) -> 'FakeCanvas':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        canvas = self
+
+        class Handler(FakeCanvasRequestHandler):
+            pass
+
+        Handler.canvas = canvas
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_port
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+    def stop(self) -> None:
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        self.server = None
+
+    @property
+    def html_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def api_url(self) -> str:
+        return f'{self.html_url}/api/v1'
+
+    def constants(self, **overrides) -> dict:
+        """
+        Returns:
+            A constants file's contents pointing publish_script at this server
+        """
+        return {
+            'apiToken': 'fake',
+            'apiUrl': self.api_url,
+            'liveApiToken': 'fake',
+            'liveUrl': self.api_url,
+            'instructorCourseId': 0,
+            'profileAssignmentId': 0,
+            'profilePagesCourseId': 0,
+            **overrides,
+        }
+
+    # Fault injection
+    def fail_next(self, status: int, count: int = 1) -> None:
+        """
+        Makes the next count requests fail with status
+        """
+        with self._lock:
+            self._forced_errors.extend([status] * count)
+
+    @property
+    def request_count(self) -> int:
+        return len(self.request_log)
+
+    @property
+    def bytes_sent(self) -> int:
+        return sum(entry['bytes'] for entry in self.request_log)
+
+    def compress(self, content: bytes, accept_encoding: str) -> tuple[bytes, str | None]:
+        """
+        Returns:
+            The body to send, and the content encoding it was compressed with, if it was
+        """
+        if self.compress_min_size is None or len(content) < self.compress_min_size:
+            return content, None
+        accepted = {coding.split(';')[0].strip() for coding in accept_encoding.split(',')}
+        for encoding, wbits in (('gzip', 16 + 10), ('deflate', 10)):
+            if encoding in accepted:
+                # a small window and hash table, since the server shares its process, and so its
+                # traced memory, with the client being benchmarked. The default settings take ~300KiB a body.
+                compressor = zlib.compressobj(6, zlib.DEFLATED, wbits, 1)
+                return compressor.compress(content) + compressor.flush(), encoding
+        return content, None
+
+    def reset_log(self) -> None:
+        with self._lock:
+            self.request_log.clear()
+            self.throttled_count = 0
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    # Synthetic data
+    def add_term(self, name: str, start_at: str = '2024-01-08T05:00:00Z', end_at: str = '2024-03-03T05:00:00Z') -> dict:
+        term = {'id': self.next_id(), 'name': name, 'start_at': start_at, 'end_at': end_at, 'workflow_state': 'active'}
+        self.terms[term['id']] = term
+        return term
+
+    def add_course(
+            self,
+            course_code: str,
+            name: str = None,
+            term: dict = None,
+            blueprint: bool = False,
+            syllabus_body: str = '') -> dict:
+        """
+        Adds an empty course
+        Returns:
+            The course's canvas data
+        """
+        course_id = self.next_id()
+        course = {
+            'id': course_id,
+            'name': name if name else course_code,
+            'course_code': course_code,
+            'sis_course_id': course_code,
+            'account_id': self.account_id,
+            'workflow_state': 'unpublished',
+            'blueprint': blueprint,
+            'enrollment_term_id': term['id'] if term else None,
+            'syllabus_body': syllabus_body,
+            'default_view': 'wiki',
+        }
+        self.courses[course_id] = {
+            'course': course,
+            'pages': {},
+            'assignments': {},
+            'discussion_topics': {},
+            'quizzes': {},
+            'rubrics': {},
+            'rubric_associations': {},
+            'assignment_groups': {},
+            'modules': [],
+            'files': {},
+            'sections': [{'id': self.next_id(), 'name': course['name'], 'course_id': course_id}],
+            'tabs': [
+                {'id': tab_id, 'label': label, 'hidden': hidden, 'position': i + 1, 'type': 'internal'}
+                for i, (tab_id, label, hidden) in enumerate([
+                    ('home', 'Home', False),
+                    ('modules', 'Modules', False),
+                    ('context_external_tool_1', 'Dropout Detective', True),
+                    ('context_external_tool_2', 'BigBlueButton', True),
+                ])
+            ],
+            'late_policy': {
+                'id': self.next_id(),
+                'course_id': course_id,
+                'missing_submission_deduction_enabled': False,
+                'missing_submission_deduction': 0.0,
+                'late_submission_deduction_enabled': False,
+                'late_submission_deduction': 0.0,
+            },
+            'content_migrations': {},
+            'content_exports': {},
+            'blueprint_migrations': {},
+            'restricted': {},
+            'associated_courses': [],
+            'enrollments': [],
+        }
+        group = self.add_content(course_id, 'assignment_groups', {'name': 'Assignments', 'group_weight': 100, 'position': 1})
+        self.courses[course_id]['default_group_id'] = group['id']
+        return course
+
+    def add_content(self, course_id: int, kind: str, data: dict) -> dict:
+        """
+        Adds a page, assignment, discussion_topic, quiz, rubric, rubric_association, assignment_group or file
+        Args:
+            course_id: the course to add to
+            kind: the collection to add to, named as in the api path
+            data: the canvas data. An id is assigned.
+
+        Returns:
+            The stored canvas data
+        """
+        state = self.courses[course_id]
+        item_id = self.next_id()
+        item = {'id': item_id, **data}
+        if kind == 'pages':
+            item['page_id'] = item_id
+            item.setdefault('title', f'Page {item_id}')
+            item.setdefault('url', self.slug(item['title']))
+            item.setdefault('body', '')
+            item.setdefault('front_page', False)
+            item.setdefault('published', True)
+            item['html_url'] = f'{self.html_url}/courses/{course_id}/pages/{item["url"]}'
+        elif kind == 'assignments':
+            item.setdefault('name', f'Assignment {item_id}')
+            item.setdefault('description', '')
+            item.setdefault('due_at', None)
+            item.setdefault('points_possible', 10)
+            item.setdefault('submission_types', ['online_text_entry'])
+            item.setdefault('assignment_group_id', state.get('default_group_id'))
+            item['course_id'] = course_id
+            item['html_url'] = f'{self.html_url}/courses/{course_id}/assignments/{item_id}'
+        elif kind == 'discussion_topics':
+            item.setdefault('title', f'Discussion {item_id}')
+            item.setdefault('message', '')
+            item['html_url'] = f'{self.html_url}/courses/{course_id}/discussion_topics/{item_id}'
+        elif kind == 'quizzes':
+            item.setdefault('title', f'Quiz {item_id}')
+            item.setdefault('description', '')
+            item.setdefault('due_at', None)
+        elif kind == 'rubrics':
+            item.setdefault('title', f'Rubric {item_id}')
+            item.setdefault('points_possible', 10)
+        elif kind == 'files':
+            item.setdefault('display_name', f'file_{item_id}.png')
+            item.setdefault('filename', item['display_name'])
+            item.setdefault('content-type', 'image/png')
+            item.setdefault('size', 1024)
+            item['url'] = f'{self.html_url}/files/{item_id}/download'
+        state[kind][item_id] = item
+        return item
+
+    def add_module(self, course_id: int, name: str, items: list[dict] = None) -> dict:
+        """
+        Adds a module holding module items for existing content
+        Args:
+            course_id: the course to add to
+            name: the module name
+            items: dicts of type ('Page', 'Assignment', 'Discussion', 'Quiz', 'File', 'SubHeader') and content
+
+        Returns:
+            The module
+        """
+        state = self.courses[course_id]
+        module = {
+            'id': self.next_id(),
+            'name': name,
+            'position': len(state['modules']) + 1,
+            'published': True,
+            'items': [],
+        }
+        state['modules'].append(module)
+        for item in items or []:
+            self.add_module_item(course_id, module, item['type'], item.get('content'), item.get('title'))
+        return module
+
+    def add_module_item(self, course_id: int, module: dict, type_: str, content: dict = None, title: str = None) -> dict:
+        item = {
+            'id': self.next_id(),
+            'module_id': module['id'],
+            'position': len(module['items']) + 1,
+            'type': type_,
+            'title': title if title else (content.get('title') or content.get('name')) if content else type_,
+            'indent': 0,
+            'published': True,
+        }
+        paths = {
+            'Page': 'pages',
+            'Assignment': 'assignments',
+            'Discussion': 'discussion_topics',
+            'Quiz': 'quizzes',
+            'File': 'files',
+        }
+        if content is not None and type_ in paths:
+            if type_ == 'Page':
+                item['page_url'] = content['url']
+                item['url'] = f'{self.api_url}/courses/{course_id}/pages/{content["url"]}'
+            else:
+                item['content_id'] = content['id']
+                item['url'] = f'{self.api_url}/courses/{course_id}/{paths[type_]}/{content["id"]}'
+            item['html_url'] = f'{self.html_url}/courses/{course_id}/modules/items/{item["id"]}'
+        module['items'].append(item)
+        return item
+
+    def add_user(self, name: str, email: str = None) -> dict:
+        user = {'id': self.next_id(), 'name': name, 'sortable_name': ', '.join(reversed(name.split(' ', 1)))}
+        if email:
+            user['email'] = email
+        self.users[user['id']] = user
+        return user
+
+    def enroll(self, course_id: int, user: dict, enrollment_type: str = 'teacher') -> None:
+        self.courses[course_id]['enrollments'].append({'user_id': user['id'], 'type': enrollment_type})
+
+    def associate(self, blueprint_id: int, course_id: int) -> None:
+        """
+        Makes course_id an associated course of the blueprint blueprint_id
+        """
+        self.courses[blueprint_id]['associated_courses'].append(course_id)
+
+    def add_synthetic_course(
+            self,
+            course_code: str = 'BP_TEST000',
+            modules: int = 8,
+            items_per_module: int = 6,
+            page_size: int = 2000,
+            term: dict = None,
+            blueprint: bool = True) -> dict:
+        """
+        Adds a course shaped like ours: weekly modules of an overview page, learning materials page,
+        assignments and a discussion, with pages of roughly page_size characters
+        Args:
+            course_code: the course code
+            modules: how many weekly modules
+            items_per_module: how many items in each module
+            page_size: roughly how many characters of html in each page body
+            term: the term the course is in
+            blueprint: whether the course is a blueprint
+
+        Returns:
+            The course's canvas data
+        """
+        course = self.add_course(course_code, term=term, blueprint=blueprint,
+                                 syllabus_body=self.filler_html('Syllabus', page_size))
+        course_id = course['id']
+        self.add_content(course_id, 'pages', {
+            'title': 'Home', 'url': 'home', 'front_page': True, 'body': self.home_page_html(course['name'], page_size)})
+        for week in range(1, modules + 1):
+            items = []
+            for i in range(items_per_module):
+                kind = i % 4
+                if kind == 0:
+                    title = f'Week {week} Overview' if i == 0 else f'Week {week} Learning Materials'
+                    content = self.add_content(course_id, 'pages', {
+                        'title': title, 'body': self.filler_html(title, page_size)})
+                    items.append({'type': 'Page', 'content': content})
+                elif kind == 1:
+                    title = f'Week {week} Learning Materials' if i == 1 else f'Week {week} Reading {i}'
+                    content = self.add_content(course_id, 'pages', {
+                        'title': title, 'body': self.filler_html(title, page_size)})
+                    items.append({'type': 'Page', 'content': content})
+                elif kind == 2:
+                    content = self.add_content(course_id, 'assignments', {
+                        'name': f'Week {week} Assignment {i}',
+                        'description': self.filler_html('Assignment', page_size),
+                        'due_at': f'2024-01-{min(28, week * 3):02d}T23:59:00Z'})
+                    items.append({'type': 'Assignment', 'content': content})
+                else:
+                    content = self.add_content(course_id, 'discussion_topics', {
+                        'title': f'Week {week} Discussion {i}',
+                        'message': self.filler_html('Discussion', page_size)})
+                    items.append({'type': 'Discussion', 'content': content})
+            self.add_module(course_id, f'Week {week}', items)
+        rubric = self.add_content(course_id, 'rubrics', {'title': 'Discussion Rubric'})
+        for assignment in list(self.courses[course_id]['assignments'].values())[:modules]:
+            self.add_content(course_id, 'rubric_associations', {
+                'rubric_id': rubric['id'], 'association_id': assignment['id'], 'association_type': 'Assignment',
+                'purpose': 'grading', 'use_for_grading': False})
+        self.add_content(course_id, 'files', {'display_name': 'hometile.png'})
+        return course
+
+    def add_faculty_pages_course(self, users: list[dict], course_code: str = 'Faculty_Bios') -> dict:
+        """
+        Adds a course holding a profile page, with a bio under an Instructor header and a picture, for each user
+        Returns:
+            The course's canvas data
+        """
+        course = self.add_course(course_code, 'Faculty Bios')
+        for user in users:
+            self.add_content(course['id'], 'pages', {'title': user['name'], 'body': (
+                f'<p>{user["name"]}</p><p>Instructor</p>'
+                f'<p><img src="{self.html_url}/courses/{course["id"]}/files/{self.next_id()}/preview" alt="{user["name"]}"></p>'
+                f'<h4>Instructor</h4><p>{user["name"]} has taught at Unity for many years.</p>'
+                f'<p>They research the things they teach.</p>')})
+        return course
+
+    def add_theme_migration_courses(
+            self,
+            course_code: str = 'TEST000',
+            weeks: int = 8,
+            assignments_per_week: int = 2,
+            discussions_per_week: int = 1,
+            page_size: int = 2000) -> tuple[dict, dict]:
+        """
+        Adds an old-theme source course, with "Week N" modules, and a new-theme destination course, with
+        matching "Module N" modules of template content, for migrating content from one into the other
+        Args:
+            course_code: the base course code
+            weeks: how many weekly modules
+            assignments_per_week: how many assignments in each module
+            discussions_per_week: how many discussions in each module
+            page_size: roughly how many characters of html in each old page or description
+
+        Returns:
+            The source and destination courses' canvas data
+        """
+        source = self.add_course(f'OLD_{course_code}', syllabus_body=self.filler_html('Syllabus', page_size))
+        destination = self.add_course(f'DEV_{course_code}', syllabus_body=self.filler_html('Syllabus', page_size))
+        for course in (source, destination):
+            self.add_content(course['id'], 'pages', {
+                'title': 'Home', 'url': 'home', 'front_page': True,
+                'body': self.home_page_html(course['name'], page_size)})
+
+        for week in range(1, weeks + 1):
+            source_items = [{'type': 'SubHeader', 'title': f'Week {week} Topic'}]
+            destination_items = []
+            source_lm = self.add_content(source['id'], 'pages', {
+                'title': f'Week {week} Learning Materials', 'body': self.old_learning_materials_html(week, page_size)})
+            destination_lm = self.add_content(destination['id'], 'pages', {
+                'title': f'Week {week} Learning Materials', 'body': self.new_learning_materials_html(week)})
+            source_items.append({'type': 'Page', 'content': source_lm})
+            destination_items.append({'type': 'Page', 'content': destination_lm})
+
+            for i in range(1, assignments_per_week + 1):
+                source_items.append({'type': 'Assignment', 'content': self.add_content(source['id'], 'assignments', {
+                    'name': f'Week {week} Assignment {i}',
+                    'description': self.old_content_html(f'Assignment {i}', page_size)})})
+                destination_items.append({'type': 'Assignment', 'content': self.add_content(
+                    destination['id'], 'assignments', {
+                        'name': f'Module {week} Assignment {i}',
+                        'description': self.new_content_html(f'Module {week}', 'Assignment')})})
+
+            for i in range(1, discussions_per_week + 1):
+                source_items.append({'type': 'Discussion', 'content': self.add_content(
+                    source['id'], 'discussion_topics', {
+                        'title': f'Week {week} Discussion {i}',
+                        'assignment_id': self.next_id(),
+                        'message': self.old_content_html(f'Discussion {i}', page_size)})})
+                destination_items.append({'type': 'Discussion', 'content': self.add_content(
+                    destination['id'], 'discussion_topics', {
+                        'title': f'Module {week} Discussion {i}',
+                        'assignment_id': self.next_id(),
+                        'message': self.new_content_html(f'Module {week}', 'Discussion')})})
+
+            self.add_module(source['id'], f'Week {week}', source_items)
+            self.add_module(destination['id'], f'Module {week}', destination_items)
+        return source, destination
+
+    def home_page_html(self, course_name: str, size: int) -> str:
+        """
+        A home page in our current theme, with a placeholder instructor bio and picture
+        """
+        return (
+            f'<div class="cbt-banner-header"><h2>{course_name}</h2></div>'
+            f'<h3>Meet your instructor!</h3>'
+            f'<p><img src="{self.html_url}/files/1/preview" alt="male-profile-image-placeholder.png" '
+            f'data-api-endpoint="{self.api_url}/files/1"></p>'
+            f'<p><span>Instructor bio coming soon!</span></p>'
+            + self.filler_html('Welcome', size))
+
+    def old_learning_materials_html(self, week: int, size: int) -> str:
+        return (
+            f'<div class="column"><h2>Week {week} Lecture</h2>'
+            f'<iframe src="https://www.youtube.com/embed/week{week}"></iframe></div>'
+            f'<div class="column"><p><a href="{self.html_url}/files/{week}/download">Week {week} Transcript</a></p>'
+            f'<p><a href="{self.html_url}/files/{week + 100}/download">Week {week} Slides</a></p></div>'
+            f'<h4>Please read the following materials:</h4>'
+            + self.filler_html('Readings', size))
+
+    @staticmethod
+    def new_learning_materials_html(week: int) -> str:
+        return (
+            f'<div class="content"><h2>Module {week} Lecture</h2>'
+            f'<iframe src="https://www.youtube.com/embed/placeholder"></iframe></div>'
+            f'<div class="cbt-buttons"><p class="cbt-button"><a href="#">Transcript</a></p>'
+            f'<p class="cbt-button"><a href="#">Slides</a></p></div>'
+            f'<div class="cbt-accordion-container"><div class="cbt-question">Title for first category of LMs</div>'
+            f'<div class="cbt-answer"><p>Placeholder</p></div></div>')
+
+    def old_content_html(self, title: str, size: int) -> str:
+        return f'<h1>{title}</h1><div class="column">{self.filler_html(title, size)}</div>'
+
+    @staticmethod
+    def new_content_html(subhead: str, title: str) -> str:
+        return f'<p>{subhead}</p><h1>{title}</h1><div id="migrate_insert"><p>Placeholder</p></div>'
+
+    @staticmethod
+    def filler_html(title: str, size: int) -> str:
+        paragraph = '<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.</p>'
+        return f'<h2>{title}</h2>' + paragraph * max(1, size // len(paragraph))
+
+    @staticmethod
+    def slug(title: str) -> str:
+        return re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
+
+    # Request handling
+    def handle(self, method: str, path: str, query: dict, body: dict) -> tuple[int, Any, dict]:
+        """
+        Answers one request
+        Returns:
+            The status, the json payload and any extra headers
+        """
+        self._wait_latency()
+        with self._lock:
+            status = self._injected_error()
+            throttled = status is None and self._throttled()
+            self._in_flight += 1
+        try:
+            if status is not None:
+                headers = {'Retry-After': '1'} if status == 429 else {}
+                return status, {'errors': [{'message': 'injected error'}]}, headers
+            if throttled:
+                return 403, 'Rate Limit Exceeded\n', {}
+
+            route_path = re.sub(r'^/api/v1', '', re.sub('/+', '/', path)).strip('/')
+            for route_method, pattern, handler in self.routes:
+                match = pattern.fullmatch(route_path)
+                if route_method == method and match:
+                    try:
+                        with self._lock:
+                            result = handler(*match.groups(), query=query, body=body)
+                    except KeyError:
+                        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}, {}
+                    if isinstance(result, tuple):
+                        return result[0], result[1], {}
+                    if isinstance(result, list):
+                        return self._page(result, path, query)
+                    return 200, result, {}
+            return 404, {'errors': [{'message': f'No route for {method} {route_path}'}]}, {}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._bucket_used += self.request_cost
+
+    def rate_limit_headers(self) -> dict:
+        with self._lock:
+            self._leak()
+            remaining = self.rate_limit_bucket - self._bucket_used
+        return {
+            'X-Rate-Limit-Remaining': f'{max(0.0, remaining):.1f}',
+            'X-Request-Cost': f'{self.request_cost:.4f}',
+        }
+
+    def log(self, method: str, path: str, status: int, size: int = 0) -> None:
+        with self._lock:
+            self.request_log.append({'method': method, 'path': path, 'status': status, 'bytes': size})
+
+    def _wait_latency(self) -> None:
+        latency = self.latency
+        if isinstance(latency, tuple):
+            with self._lock:
+                latency = self.random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _injected_error(self) -> int | None:
+        if self._forced_errors:
+            return self._forced_errors.pop(0)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.random.choice(self.error_statuses)
+        return None
+
+    def _leak(self) -> None:
+        now = time.monotonic()
+        self._bucket_used = max(0.0, self._bucket_used - (now - self._bucket_updated) * self.rate_limit_refill)
+        self._bucket_updated = now
+
+    def _throttled(self) -> bool:
+        self._leak()
+        if self._bucket_used + (self._in_flight + 1) * self.preflight_cost > self.rate_limit_bucket:
+            self.throttled_count += 1
+            return True
+        return False
+
+    def _page(self, items: list, path: str, query: dict) -> tuple[int, list, dict]:
+        per_page = min(self.max_per_page, int(self._param(query, 'per_page') or self.per_page))
+        page = self._param(query, 'page') or '1'
+        page = int(page.split(':')[1]) if page.startswith('bookmark:') else int(page)
+        last = max(1, -(-len(items) // per_page))
+
+        def url(number: int) -> str:
+            page_value = f'bookmark:{number}' if self.bookmark_paging else str(number)
+            params = [(key, value) for key, values in query.items() if key != 'page' for value in values]
+            return f'{self.html_url}{path}?{urllib.parse.urlencode(params + [("page", page_value)])}'
+
+        links = [f'<{url(page)}>; rel="current"', f'<{url(1)}>; rel="first"']
+        if page < last:
+            links.append(f'<{url(page + 1)}>; rel="next"')
+        if page > 1:
+            links.append(f'<{url(page - 1)}>; rel="prev"')
+        if not self.bookmark_paging:
+            links.append(f'<{url(last)}>; rel="last"')
+        return 200, items[(page - 1) * per_page:page * per_page], {'Link': ','.join(links)}
+
+    @staticmethod
+    def _param(query: dict, key: str) -> str | None:
+        values = query.get(key) or query.get(f'{key}[]')
+        return values[0] if values else None
+
+    @staticmethod
+    def _includes(query: dict) -> set[str]:
+        return set(query.get('include[]', [])) | set(query.get('include', []))
+
+    @staticmethod
+    def _fields(body: dict, prefix: str) -> dict:
+        """
+        Gets a resource's fields from a body posted either as prefix[field] or as a json object under prefix
+        """
+        fields = body.get(prefix)
+        return fields if isinstance(fields, dict) else {}
+
+    def _course(self, course_id: str) -> dict:
+        return self.courses[int(course_id)]
+
+    def _find(self, course_id: str, kind: str, item_id: str) -> dict:
+        items = self._course(course_id)[kind]
+        if item_id.isdigit():
+            return items[int(item_id)]
+        # pages can be looked up by url, and canvas treats - and _ in urls alike
+        slug = item_id.replace('_', '-')
+        return next(item for item in items.values() if (item.get('url') or '').replace('_', '-') == slug)
+
+    def _make_routes(self) -> list[tuple[str, re.Pattern, Callable]]:
+        routes = [
+            ('GET', r'accounts', self.list_accounts),
+            ('GET', r'accounts/(\d+)/terms', self.list_terms),
+            ('GET', r'accounts/(\d+)/courses', self.list_account_courses),
+            ('PUT', r'accounts/(\d+)/courses', self.update_courses),
+            ('GET', r'courses/(\d+)', self.get_course),
+            ('PUT', r'courses/(\d+)', self.update_course),
+            ('POST', r'courses/(\d+)/reset_content', self.reset_course),
+            ('GET', r'courses/(\d+)/sections', self.list_sections),
+            ('GET', r'courses/(\d+)/users', self.list_course_users),
+            ('GET', r'courses/(\d+)/modules', self.list_modules),
+            ('GET', r'courses/(\d+)/modules/(\d+)', self.get_module),
+            ('PUT', r'courses/(\d+)/modules/(\d+)', self.update_module),
+            ('GET', r'courses/(\d+)/modules/(\d+)/items', self.list_module_items),
+            ('GET', r'courses/(\d+)/front_page', self.get_front_page),
+            ('GET', r'courses/(\d+)/tabs', self.list_tabs),
+            ('PUT', r'courses/(\d+)/tabs/([\w-]+)', self.update_tab),
+            ('GET', r'courses/(\d+)/late_policy', self.get_late_policy),
+            ('PATCH', r'courses/(\d+)/late_policy', self.update_late_policy),
+            ('POST', r'courses/(\d+)/late_policy', self.update_late_policy),
+            ('PUT', r'courses/(\d+)/blueprint_templates/default/restrict_item', self.restrict_item),
+            ('GET', r'courses/(\d+)/blueprint_templates/default/associated_courses', self.list_associated_courses),
+            ('POST', r'courses/(\d+)/blueprint_templates/default/migrations', self.begin_blueprint_migration),
+            ('GET', r'courses/(\d+)/blueprint_templates/default/migrations/(\d+)', self.get_blueprint_migration),
+            ('GET', r'courses/(\d+)/content_migrations', self.list_content_migrations),
+            ('POST', r'courses/(\d+)/content_migrations', self.begin_content_migration),
+            ('GET', r'courses/(\d+)/content_migrations/(\d+)', self.get_content_migration),
+            ('POST', r'courses/(\d+)/content_exports', self.begin_content_export),
+            ('GET', r'courses/(\d+)/content_exports/(\d+)', self.get_content_export),
+            ('GET', r'progress/(\d+)', self.get_progress),
+            ('GET', r'courses/(\d+)/assignment_groups', self.list_assignment_groups),
+            ('PUT', r'courses/(\d+)/assignment_groups/(\d+)', self.update_assignment_group),
+            ('GET', r'courses/(\d+)/rubrics/(\d+)', self.get_rubric),
+        ]
+        for kind, field in [
+            ('pages', 'wiki_page'),
+            ('assignments', 'assignment'),
+            ('discussion_topics', None),
+            ('quizzes', 'quiz'),
+            ('rubrics', 'rubric'),
+            ('rubric_associations', 'rubric_association'),
+            ('files', 'file'),
+        ]:
+            routes += [
+                ('GET', fr'courses/(\d+)/{kind}', self._lister(kind)),
+                ('POST', fr'courses/(\d+)/{kind}', self._creator(kind, field)),
+                ('GET', fr'courses/(\d+)/{kind}/([\w.-]+)', self._getter(kind)),
+                ('PUT', fr'courses/(\d+)/{kind}/([\w.-]+)', self._updater(kind, field)),
+                ('DELETE', fr'courses/(\d+)/{kind}/([\w.-]+)', self._deleter(kind)),
+            ]
+        routes.append(('GET', r'files/(\d+)', self.get_file))
+        routes.append(('GET', r'files/(\d+)/download', self.download_export))
+        routes.append(('POST', r'api/graphql', self.graphql))
+        return [(method, re.compile(pattern), handler) for method, pattern, handler in routes]
+
+    # Generic content
+    def _lister(self, kind: str) -> Callable:
+        def list_content(course_id: str, query: dict, body: dict) -> list:
+            items = list(self._course(course_id)[kind].values())
+            search_term = self._param(query, 'search_term')
+            if search_term:
+                items = [item for item in items
+                         if search_term.lower() in (item.get('title') or item.get('name') or '').lower()]
+            if kind == 'pages' and 'body' not in self._includes(query):
+                items = [{key: value for key, value in item.items() if key != 'body'} for item in items]
+            excluded = set(query.get('exclude_response_fields[]', []))
+            if excluded:
+                items = [{key: value for key, value in item.items() if key not in excluded} for item in items]
+            return copy.deepcopy(items)
+
+        return list_content
+
+    def _getter(self, kind: str) -> Callable:
+        def get_content(course_id: str, item_id: str, query: dict, body: dict) -> dict:
+            return copy.deepcopy(self._find(course_id, kind, item_id))
+
+        return get_content
+
+    def _creator(self, kind: str, field: str | None) -> Callable:
+        def create_content(course_id: str, query: dict, body: dict) -> dict:
+            fields = self._fields(body, field) if field else {k: v for k, v in body.items() if not isinstance(v, dict)}
+            return copy.deepcopy(self.add_content(int(course_id), kind, fields))
+
+        return create_content
+
+    def _updater(self, kind: str, field: str | None) -> Callable:
+        def update_content(course_id: str, item_id: str, query: dict, body: dict) -> dict:
+            item = self._find(course_id, kind, item_id)
+            fields = self._fields(body, field) if field else {}
+            # some of our calls send the fields bare rather than nested
+            fields.update({key: value for key, value in body.items() if not isinstance(value, dict)})
+            fields.pop('id', None)
+            item.update(fields)
+            return copy.deepcopy(item)
+
+        return update_content
+
+    def _deleter(self, kind: str) -> Callable:
+        def delete_content(course_id: str, item_id: str, query: dict, body: dict) -> dict:
+            item = self._find(course_id, kind, item_id)
+            del self._course(course_id)[kind][item['id']]
+            for module in self._course(course_id)['modules']:
+                module['items'] = [
+                    module_item for module_item in module['items']
+                    if module_item.get('content_id') != item['id'] and module_item.get('page_url') != item.get('url')]
+            return copy.deepcopy(item)
+
+        return delete_content
+
+    # Accounts and courses
+    def list_accounts(self, query: dict, body: dict) -> list:
+        return copy.deepcopy(list(self.accounts.values()))
+
+    def list_terms(self, account_id: str, query: dict, body: dict) -> dict:
+        terms = list(self.terms.values())
+        name = self._param(query, 'term_name')
+        if name:
+            terms = [term for term in terms if name.lower() in term['name'].lower()]
+        return {'enrollment_terms': copy.deepcopy(terms)}
+
+    def list_account_courses(self, account_id: str, query: dict, body: dict) -> list:
+        courses = [state['course'] for state in self.courses.values() if state['course']['account_id'] == int(account_id)]
+        search_term = self._param(query, 'search_term')
+        if search_term:
+            courses = [course for course in courses
+                       if search_term.lower() in course['course_code'].lower()
+                       or search_term.lower() in course['name'].lower()]
+        term_id = self._param(query, 'enrollment_term_id')
+        if term_id:
+            courses = [course for course in courses if str(course['enrollment_term_id']) == term_id]
+        return [self._course_data(course, query) for course in courses]
+
+    def update_courses(self, account_id: str, query: dict, body: dict) -> dict:
+        states = {'offer': 'available', 'claim': 'unpublished', 'conclude': 'completed'}
+        for course_id in body.get('course_ids', []):
+            self._course(str(course_id))['course']['workflow_state'] = states.get(body.get('event'), 'unpublished')
+        return {'id': self.next_id(), 'workflow_state': 'completed'}
+
+    def _course_data(self, course: dict, query: dict) -> dict:
+        includes = self._includes(query)
+        out = {key: value for key, value in course.items() if key != 'syllabus_body' or 'syllabus_body' in includes}
+        if 'term' in includes and course['enrollment_term_id'] in self.terms:
+            out['term'] = self.terms[course['enrollment_term_id']]
+        return copy.deepcopy(out)
+
+    def get_course(self, course_id: str, query: dict, body: dict) -> dict:
+        return self._course_data(self._course(course_id)['course'], query)
+
+    def update_course(self, course_id: str, query: dict, body: dict) -> dict:
+        course = self._course(course_id)['course']
+        course.update({key: value for key, value in self._fields(body, 'course').items() if key != 'id'})
+        if self._param(query, 'offer') or body.get('offer'):
+            course['workflow_state'] = 'available'
+        return copy.deepcopy(course)
+
+    def reset_course(self, course_id: str, query: dict, body: dict) -> dict:
+        old = self._course(course_id)['course']
+        new = self.add_course(old['course_code'], old['name'], self.terms.get(old['enrollment_term_id']),
+                              old['blueprint'])
+        del self.courses[int(course_id)]
+        return copy.deepcopy(new)
+
+    def list_sections(self, course_id: str, query: dict, body: dict) -> list:
+        return copy.deepcopy(self._course(course_id)['sections'])
+
+    def list_course_users(self, course_id: str, query: dict, body: dict) -> list:
+        enrollment_type = self._param(query, 'enrollment_type')
+        return [copy.deepcopy(self.users[enrollment['user_id']])
+                for enrollment in self._course(course_id)['enrollments']
+                if enrollment_type is None or enrollment['type'] == enrollment_type]
+
+    # Modules
+    def _module_data(self, module: dict, query: dict) -> dict:
+        out = copy.deepcopy(module)
+        if 'items' not in self._includes(query):
+            del out['items']
+        out['items_count'] = len(module['items'])
+        return out
+
+    def list_modules(self, course_id: str, query: dict, body: dict) -> list:
+        return [self._module_data(module, query) for module in self._course(course_id)['modules']]
+
+    def get_module(self, course_id: str, module_id: str, query: dict, body: dict) -> dict:
+        module = next(module for module in self._course(course_id)['modules'] if module['id'] == int(module_id))
+        return self._module_data(module, query)
+
+    def update_module(self, course_id: str, module_id: str, query: dict, body: dict) -> dict:
+        module = next(module for module in self._course(course_id)['modules'] if module['id'] == int(module_id))
+        module.update({key: value for key, value in self._fields(body, 'module').items() if key != 'id'})
+        return self._module_data(module, query)
+
+    def list_module_items(self, course_id: str, module_id: str, query: dict, body: dict) -> list:
+        module = next(module for module in self._course(course_id)['modules'] if module['id'] == int(module_id))
+        return copy.deepcopy(module['items'])
+
+    def get_front_page(self, course_id: str, query: dict, body: dict) -> dict:
+        return copy.deepcopy(next(page for page in self._course(course_id)['pages'].values() if page['front_page']))
+
+    # Course settings
+    def list_tabs(self, course_id: str, query: dict, body: dict) -> list:
+        # canvas leaves hidden out of visible tabs
+        return [{key: value for key, value in tab.items() if key != 'hidden' or value}
+                for tab in self._course(course_id)['tabs']]
+
+    def update_tab(self, course_id: str, tab_id: str, query: dict, body: dict) -> dict:
+        tab = next(tab for tab in self._course(course_id)['tabs'] if tab['id'] == tab_id)
+        if 'hidden' in body:
+            tab['hidden'] = body['hidden']
+        if 'position' in body:
+            tab['position'] = body['position']
+        return copy.deepcopy(tab)
+
+    def get_late_policy(self, course_id: str, query: dict, body: dict) -> dict:
+        return {'late_policy': copy.deepcopy(self._course(course_id)['late_policy'])}
+
+    def update_late_policy(self, course_id: str, query: dict, body: dict) -> dict:
+        policy = self._course(course_id)['late_policy']
+        policy.update(self._fields(body, 'late_policy'))
+        return {'late_policy': copy.deepcopy(policy)}
+
+    def list_assignment_groups(self, course_id: str, query: dict, body: dict) -> list:
+        state = self._course(course_id)
+        groups = copy.deepcopy(list(state['assignment_groups'].values()))
+        if 'assignments' in self._includes(query):
+            for group in groups:
+                group['assignments'] = [
+                    copy.deepcopy(assignment) for assignment in state['assignments'].values()
+                    if assignment.get('assignment_group_id') == group['id']]
+        return groups
+
+    def update_assignment_group(self, course_id: str, group_id: str, query: dict, body: dict) -> dict:
+        group = self._course(course_id)['assignment_groups'][int(group_id)]
+        group.update({key: value for key, value in body.items() if not isinstance(value, dict) and key != 'id'})
+        return copy.deepcopy(group)
+
+    def get_rubric(self, course_id: str, rubric_id: str, query: dict, body: dict) -> dict:
+        state = self._course(course_id)
+        rubric = copy.deepcopy(state['rubrics'][int(rubric_id)])
+        if 'associations' in self._includes(query):
+            rubric['associations'] = [
+                copy.deepcopy(association) for association in state['rubric_associations'].values()
+                if association['rubric_id'] == rubric['id']]
+        return rubric
+
+    def get_file(self, file_id: str, query: dict, body: dict) -> dict:
+        for state in self.courses.values():
+            if int(file_id) in state['files']:
+                return copy.deepcopy(state['files'][int(file_id)])
+        raise KeyError(file_id)
+
+    # GraphQL
+    def graphql(self, query: dict, body: dict) -> dict:
+        """
+        Answers the course structure queries CourseStructureLoader sends. Field selections aren't parsed:
+        each aliased course gets every field the loader asks for, on the connections it has cursor variables for.
+        """
+        variables = body.get('variables') or {}
+        text = body.get('query') or ''
+        if not text.lstrip().startswith('query CourseStructure'):
+            return {'errors': [{'message': 'Only CourseStructure queries are supported'}]}
+        first = variables.get('first') or 100
+        data = {}
+        for alias, course_id in re.findall(r'(\w+): course\(id: "(\d+)"\)', text):
+            state = self.courses.get(int(course_id))
+            if state is None:
+                data[alias] = None
+                continue
+            data[alias] = {'_id': course_id}
+            for connection, nodes in [
+                ('modules', lambda: [self._module_node(state, module) for module in state['modules']]),
+                ('assignments', lambda: [self._assignment_node(state, assignment)
+                                         for assignment in state['assignments'].values()]),
+                ('discussions', lambda: [self._discussion_node(discussion)
+                                         for discussion in state['discussion_topics'].values()]),
+            ]:
+                key = f'{alias}_{connection}'
+                if key not in variables:
+                    continue
+                start = int(variables[key] or 0)
+                items = nodes()
+                data[alias][f'{connection}Connection'] = {
+                    'nodes': items[start:start + first],
+                    'pageInfo': {'hasNextPage': start + first < len(items), 'endCursor': str(start + first)},
+                }
+        return {'data': data}
+
+    def _module_node(self, state: dict, module: dict) -> dict:
+        items = []
+        for item in module['items']:
+            content: dict = {'__typename': item['type']}
+            if item['type'] == 'Page':
+                page = next(page for page in state['pages'].values() if page['url'] == item['page_url'])
+                content.update({'_id': str(page['page_id']), 'title': page['title'], 'url': page['html_url']})
+            elif item['type'] == 'Assignment':
+                content.update({'_id': str(item['content_id']), 'name': item['title']})
+            elif item['type'] == 'File':
+                content.update({'_id': str(item['content_id']), 'displayName': item['title']})
+            elif 'content_id' in item:
+                content.update({'_id': str(item['content_id']), 'title': item['title']})
+            else:
+                content.update({'title': item['title'], 'url': item.get('external_url')})
+            items.append({'_id': str(item['id']), 'content': content})
+        return {'_id': str(module['id']), 'name': module['name'], 'position': module['position'], 'moduleItems': items}
+
+    @staticmethod
+    def _assignment_node(state: dict, assignment: dict) -> dict:
+        association = next((association for association in state['rubric_associations'].values()
+                            if association['association_type'] == 'Assignment'
+                            and association['association_id'] == assignment['id']), None)
+        rubric = state['rubrics'].get(association['rubric_id']) if association else None
+        return {
+            '_id': str(assignment['id']),
+            'name': assignment['name'],
+            'position': assignment.get('position'),
+            'dueAt': assignment.get('due_at'),
+            'pointsPossible': assignment.get('points_possible'),
+            'quiz': {'_id': str(assignment['quiz_id'])} if assignment.get('quiz_id') else None,
+            'discussion': {'_id': str(assignment['discussion_topic']['id']),
+                           'title': assignment['discussion_topic']['title']}
+            if assignment.get('discussion_topic') else None,
+            'rubric': {'_id': str(rubric['id']), 'title': rubric['title']} if rubric else None,
+            'rubricAssociation': {'_id': str(association['id']), 'useForGrading': association['use_for_grading']}
+            if association else None,
+        }
+
+    @staticmethod
+    def _discussion_node(discussion: dict) -> dict:
+        return {
+            '_id': str(discussion['id']),
+            'title': discussion['title'],
+            'assignment': {'_id': str(discussion['assignment_id'])} if discussion.get('assignment_id') else None,
+        }
+
+    # Blueprints and migrations
+    def restrict_item(self, course_id: str, query: dict, body: dict) -> dict | tuple[int, dict]:
+        state = self._course(course_id)
+        if not state['course']['blueprint']:
+            return 400, {'errors': [{'message': 'Not a blueprint course'}]}
+        state['restricted'][(body.get('content_type'), str(body.get('content_id')))] = body.get('restricted', True)
+        return {'success': True}
+
+    def list_associated_courses(self, course_id: str, query: dict, body: dict) -> list:
+        return [copy.deepcopy(self._course(str(associated))['course'])
+                for associated in self._course(course_id)['associated_courses']]
+
+    def _new_job(self, on_complete: Callable = None, **data) -> dict:
+        job = {'id': self.next_id(), 'workflow_state': 'queued', 'completion': 0, **data}
+        job['progress_url'] = f'{self.api_url}/progress/{job["id"]}'
+        self.jobs[job['id']] = {'data': job, 'polls': 0, 'on_complete': on_complete}
+        return job
+
+    def _poll_job(self, job_id: int) -> dict:
+        job = self.jobs[job_id]
+        job['polls'] += 1
+        step = min(job['polls'], len(self.JOB_STATES) - 1)
+        job['data']['workflow_state'] = self.JOB_STATES[step]
+        job['data']['completion'] = round(100 * step / (len(self.JOB_STATES) - 1))
+        if job['data']['workflow_state'] == 'completed' and job['on_complete'] is not None:
+            job['on_complete']()
+            job['on_complete'] = None
+        return copy.deepcopy(job['data'])
+
+    def begin_blueprint_migration(self, course_id: str, query: dict, body: dict) -> dict:
+        job = self._new_job(comment=body.get('comment'), template_id=int(course_id))
+        self._course(course_id)['blueprint_migrations'][job['id']] = job
+        return copy.deepcopy(job)
+
+    def get_blueprint_migration(self, course_id: str, migration_id: str, query: dict, body: dict) -> dict:
+        self._course(course_id)['blueprint_migrations'][int(migration_id)]
+        return self._poll_job(int(migration_id))
+
+    def list_content_migrations(self, course_id: str, query: dict, body: dict) -> list:
+        return copy.deepcopy(list(self._course(course_id)['content_migrations'].values()))
+
+    def begin_content_migration(self, course_id: str, query: dict, body: dict) -> dict:
+        source_id = self._fields(body, 'settings').get('source_course_id')
+
+        def copy_content():
+            if source_id is None or int(source_id) not in self.courses:
+                return
+            source, destination = self.courses[int(source_id)], self._course(course_id)
+            for kind in ['pages', 'assignments', 'discussion_topics', 'quizzes', 'rubrics', 'files']:
+                for item in source[kind].values():
+                    data = {key: value for key, value in copy.deepcopy(item).items() if key not in ('id', 'page_id')}
+                    self.add_content(int(course_id), kind, data)
+            destination['modules'] = copy.deepcopy(source['modules'])
+
+        job = self._new_job(
+            copy_content,
+            migration_type=body.get('migration_type'),
+            settings={'source_course_id': source_id})
+        self._course(course_id)['content_migrations'][job['id']] = job
+        return copy.deepcopy(job)
+
+    def get_content_migration(self, course_id: str, migration_id: str, query: dict, body: dict) -> dict:
+        return copy.deepcopy(self._course(course_id)['content_migrations'][int(migration_id)])
+
+    def get_progress(self, progress_id: str, query: dict, body: dict) -> dict:
+        return self._poll_job(int(progress_id))
+
+    def begin_content_export(self, course_id: str, query: dict, body: dict) -> dict:
+        course_id = int(course_id)
+        export = {'id': self.next_id(), 'export_type': body.get('export_type'), 'workflow_state': 'created'}
+
+        def export_content():
+            # exports are taken once they finish, like canvas' background job
+            attachment_id = self.next_id()
+            self.export_files[attachment_id] = self.common_cartridge(course_id)
+            export['workflow_state'] = 'exported'
+            export['attachment'] = {
+                'id': attachment_id,
+                'url': f'{self.html_url}/files/{attachment_id}/download?verifier=fake',
+            }
+
+        export['progress_url'] = self._new_job(export_content, context_id=course_id)['progress_url']
+        self._course(course_id)['content_exports'][export['id']] = export
+        return copy.deepcopy(export)
+
+    def get_content_export(self, course_id: str, export_id: str, query: dict, body: dict) -> dict:
+        return copy.deepcopy(self._course(course_id)['content_exports'][int(export_id)])
+
+    def download_export(self, file_id: str, query: dict, body: dict) -> bytes:
+        return self.export_files[int(file_id)]
+
+    @staticmethod
+    def _identifier(kind: str, item_id: int) -> str:
+        return 'g' + hashlib.md5(f'{kind}_{item_id}'.encode()).hexdigest()
+
+    def common_cartridge(self, course_id: int) -> bytes:
+        """
+        Packs a course into a .imscc zip laid out like canvas' common cartridge exports:
+        a manifest, module settings, wiki_content html pages, assignment folders, discussion topics and quiz metadata
+        """
+        state = self.courses[course_id]
+        out = io.BytesIO()
+        resources = []
+        identifiers = {}
+        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for page in state['pages'].values():
+                identifier = identifiers[('Page', page['url'])] = self._identifier('wiki_page', page['id'])
+                href = f'wiki_content/{page["url"]}.html'
+                archive.writestr(href, self._cartridge_html(page['title'], page['body'], {
+                    'identifier': identifier,
+                    'workflow_state': 'active' if page['published'] else 'unpublished',
+                    **({'front_page': 'true'} if page['front_page'] else {}),
+                }))
+                resources.append(self._cartridge_resource(identifier, 'webcontent', href, [href]))
+
+            for assignment in state['assignments'].values():
+                identifier = identifiers[('Assignment', assignment['id'])] = (
+                    self._identifier('assignment', assignment['id']))
+                href = f'{identifier}/{self.slug(assignment["name"])}.html'
+                settings = f'{identifier}/assignment_settings.xml'
+                archive.writestr(href, self._cartridge_html(assignment['name'], assignment['description'], {}))
+                archive.writestr(settings, self._cartridge_xml('assignment', identifier, {
+                    'title': assignment['name'],
+                    'due_at': assignment['due_at'] or '',
+                    'points_possible': assignment['points_possible'],
+                    'submission_types': ','.join(assignment['submission_types']),
+                    'workflow_state': 'published',
+                }))
+                resources.append(self._cartridge_resource(
+                    identifier, 'associatedcontent/imscc_xmlv1p1/learning-application-resource', href, [href, settings]))
+
+            for discussion in state['discussion_topics'].values():
+                identifier = identifiers[('Discussion', discussion['id'])] = (
+                    self._identifier('discussion_topic', discussion['id']))
+                href = f'{identifier}.xml'
+                archive.writestr(href, (
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<topic xmlns="http://www.imsglobal.org/xsd/imsccv1p1/imsdt_v1p1">'
+                    f'<title>{html.escape(discussion["title"])}</title>'
+                    f'<text texttype="text/html">{html.escape(discussion["message"])}</text></topic>'))
+                resources.append(self._cartridge_resource(identifier, 'imsdt_xmlv1p1', None, [href]))
+
+            for quiz in state['quizzes'].values():
+                identifier = identifiers[('Quiz', quiz['id'])] = self._identifier('quiz', quiz['id'])
+                href = f'{identifier}/assessment_meta.xml'
+                archive.writestr(href, self._cartridge_xml('quiz', identifier, {
+                    'title': quiz['title'],
+                    'description': quiz['description'],
+                    'due_at': quiz['due_at'] or '',
+                    'available': 'true',
+                }))
+                resources.append(self._cartridge_resource(
+                    identifier, 'associatedcontent/imscc_xmlv1p1/learning-application-resource', href, [href]))
+
+            content_types = {
+                'Page': 'WikiPage',
+                'Assignment': 'Assignment',
+                'Discussion': 'DiscussionTopic',
+                'Quiz': 'Quizzes::Quiz',
+                'File': 'Attachment',
+                'SubHeader': 'ContextModuleSubHeader',
+            }
+            modules = []
+            for module in state['modules']:
+                items = []
+                for item in module['items']:
+                    key = (item['type'], item.get('page_url') if item['type'] == 'Page' else item.get('content_id'))
+                    ref = f'<identifierref>{identifiers[key]}</identifierref>' if key in identifiers else ''
+                    items.append(
+                        f'<item identifier="{self._identifier("content_tag", item["id"])}">'
+                        f'<content_type>{content_types.get(item["type"], item["type"])}</content_type>'
+                        f'<workflow_state>{"active" if item["published"] else "unpublished"}</workflow_state>'
+                        f'<title>{html.escape(item["title"])}</title>{ref}'
+                        f'<position>{item["position"]}</position><indent>{item["indent"]}</indent></item>')
+                modules.append(
+                    f'<module identifier="{self._identifier("context_module", module["id"])}">'
+                    f'<title>{html.escape(module["name"])}</title>'
+                    f'<workflow_state>{"active" if module["published"] else "unpublished"}</workflow_state>'
+                    f'<position>{module["position"]}</position><items>{"".join(items)}</items></module>')
+            archive.writestr('course_settings/module_meta.xml', (
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<modules xmlns="http://canvas.instructure.com/xsd/cccv1p0">' + ''.join(modules) + '</modules>'))
+
+            archive.writestr('imsmanifest.xml', (
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<manifest xmlns="http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1" '
+                f'identifier="{self._identifier("course", course_id)}"><resources>'
+                + ''.join(resources) + '</resources></manifest>'))
+        return out.getvalue()
+
+    @staticmethod
+    def _cartridge_resource(identifier: str, type_: str, href: str | None, files: list[str]) -> str:
+        attributes = f'identifier="{identifier}" type="{type_}"' + (f' href="{href}"' if href else '')
+        return f'<resource {attributes}>' + ''.join(f'<file href="{file}"/>' for file in files) + '</resource>'
+
+    @staticmethod
+    def _cartridge_html(title: str, body: str, meta: dict) -> str:
+        tags = ''.join(f'<meta name="{key}" content="{html.escape(value)}"/>' for key, value in meta.items())
+        return (f'<html>\n<head>\n<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>\n'
+                f'<title>{html.escape(title)}</title>\n{tags}\n</head>\n<body>{body}</body>\n</html>')
+
+    @staticmethod
+    def _cartridge_xml(tag: str, identifier: str, fields: dict) -> str:
+        children = ''.join(f'<{key}>{html.escape(str(value))}</{key}>' for key, value in fields.items())
+        return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<{tag} xmlns="http://canvas.instructure.com/xsd/cccv1p0" identifier="{identifier}">{children}</{tag}>')
+
+
+def parse_form(pairs: list[tuple[str, str]]) -> dict:
+    """
+    Nests rails style form fields, e.g. wiki_page[body]=x&ids[]=1&ids[]=2 into {'wiki_page': {'body': 'x'}, 'ids': [1, 2]}
+    """
+    out: dict = {}
+    for key, value in pairs:
+        names = [key.split('[', 1)[0]] + re.findall(r'\[([^\]]*)\]', key)
+        is_list = len(names) > 1 and names[-1] == ''
+        if is_list:
+            names = names[:-1]
+        target = out
+        for name in names[:-1]:
+            target = target.setdefault(name, {})
+        if is_list:
+            target.setdefault(names[-1], []).append(_coerce(value))
+        else:
+            target[names[-1]] = _coerce(value)
+    return out
+
+
+def _coerce(value: str) -> Any:
+    if value in ('true', 'True'):
+        return True
+    if value in ('false', 'False'):
+        return False
+    if re.fullmatch(r'-?\d+', value):
+        return int(value)
+    return value
+
+
+class FakeCanvasRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    canvas: FakeCanvas = None
+    # send headers and body in one segment, or delayed acks add ~40ms to every request
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _respond(self) -> None:
+        parsed = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed.query, keep_blank_values=True)
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        body: dict = {}
+        if raw:
+            if 'json' in (self.headers.get('Content-Type') or ''):
+                body = json.loads(raw)
+            else:
+                body = parse_form(urllib.parse.parse_qsl(raw.decode(), keep_blank_values=True))
+
+        status, payload, headers = self.canvas.handle(self.command, parsed.path, query, body)
+        if isinstance(payload, bytes):
+            # file downloads, already compressed
+            content, encoding, content_type = payload, None, 'application/octet-stream'
+        else:
+            content = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+            if self.canvas.etags and self.command == 'GET' and status == 200:
+                etag = f'"{hashlib.sha1(content).hexdigest()}"'
+                headers = {**headers, 'ETag': etag}
+                if self.headers.get('If-None-Match') == etag:
+                    status, content = 304, b''
+            content, encoding = self.canvas.compress(content, self.headers.get('Accept-Encoding') or '')
+            content_type = 'text/plain' if isinstance(payload, str) else 'application/json; charset=utf-8'
+        self.canvas.log(self.command, parsed.path, status, len(content))
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for key, value in {**self.canvas.rate_limit_headers(), **headers}.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _respond
+    do_PUT = _respond
+    do_POST = _respond
+    do_PATCH = _respond
+    do_DELETE = _respond
+
+
+if __name__ == '__main__':
+    with FakeCanvas(port=8765, latency=0.05) as fake:
+        fake.add_term('DE8W01.08.24')
+        fake.add_synthetic_course()
+        print(f'Fake canvas listening at {fake.api_url}')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
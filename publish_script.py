@@ -1,7 +1,9 @@
 import urllib
+import urllib.parse
 from functools import cached_property
 import warnings
 import inspect
+import itertools
 
 try:
     import aiohttp
@@ -10,22 +12,46 @@ except ImportError as e:
     warnings.warn(e.msg)
     print("aiohttp not loaded, no async operations")
 
+try:
+    import orjson
+except ImportError:
+    # the stdlib decoder is used instead
+    orjson = None
+
 import asyncio
+import atexit
+import base64
+import collections
+import concurrent.futures
+import contextlib
 import datetime
+import email.utils
+import gzip
+import hashlib
+import html
 import json
+import math
 import os
+import random
 import re
+import sqlite3
 import sys
+import tempfile
+import threading
 import time
 import tkinter as tk
 import traceback
 import webbrowser
+import weakref
+import xml.etree.ElementTree as ElementTree
 import zipfile
 from tkinter import messagebox, StringVar, simpledialog
 from tkinter import ttk
 from typing import *
 import docx
 import requests
+import requests.adapters
+import requests.structures
 from PIL import Image
 from bs4 import BeautifulSoup
 
@@ -48,6 +74,23 @@ ROOT_ACCOUNT_ID: int
 CONSTANTS: dict
 CONSTANTS_FILE: str = 'constants.json'
 MAX_PROFILE_IMAGE_SIZE: int = 400
+DEFAULT_POOL_SIZE: int = 10
+DEFAULT_MAX_CONCURRENCY: int = 10
+DEFAULT_ASYNC_CONCURRENCY: int = 100
+CANVAS_RATE_LIMIT_BUCKET: float = 700.0
+CANVAS_RATE_LIMIT_REFILL: float = 10.0
+CANVAS_RATE_LIMIT_RESERVE: float = 100.0
+CANVAS_RATE_LIMIT_PREFLIGHT: float = 50.0
+DEFAULT_MAX_RETRIES: int = 5
+HTTP_CACHE_FILE: str = '.canvas_http_cache.sqlite'
+HTTP_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+HTTP_CACHE_MAX_ENTRIES: int = 20000
+COURSE_CATALOG_FILE: str = '.canvas_course_catalog.sqlite'
+COURSE_CATALOG_MAX_AGE: float = 6 * 60 * 60
+ACCOUNT_METADATA_FILE: str = '.canvas_metadata.json'
+ACCOUNT_METADATA_MAX_AGE: float = 24 * 60 * 60
+RESPONSE_CACHE_TTL: float = 60.0
+RESPONSE_CACHE_MAX_ENTRIES: int = 1024
 
 
 class ReplaceException(BaseException):
@@ -58,6 +101,13 @@ class CourseNotFoundException(BaseException):
     pass
 
 
+class GraphQLError(Exception):
+    """
+    Canvas answered a graphql query with errors instead of data
+    """
+    pass
+
+
 class Replacement:
     def __init__(self, find: str, replace: str | Callable, success_tests: list):
         self.find = find
@@ -377,7 +427,7 @@ class LmFilter:
 class ResourcesFixSet(FixSet):
     @classmethod
     def find_content(cls, course: 'Course') -> list['Page']:
-        return course.get_pages_by_name('Student Support Resources')
+        return course.get_pages_by_name('Student Support Resources', include_body=True)
 
     replacements = [
         Replacement(
@@ -434,7 +484,7 @@ class OverviewFixSet(FixSet):
     def find_content(cls, course: 'Course') -> list['Page']:
         pages = []
         for i in range(1, 9):
-            pages += course.get_pages_by_name(f'Week {i} Overview')
+            pages += course.get_pages_by_name(f'Week {i} Overview', include_body=True)
         return pages
 
     replacements = [
@@ -468,266 +518,2577 @@ class FrontPageFixSet(FixSet):
 FIXES_TO_RUN = [OverviewFixSet, ResourcesFixSet, FrontPageFixSet, IntroFixSet]
 
 
-class CanvasApiLink:
+class RateLimitGovernor:
     """
-    This class handles calls to the canvas api
+    Keeps requests made with one canvas token on one host just under canvas' rate limit.
+
+    Canvas gives each token a bucket of quota that every request drains by its cost
+    and that refills over time, reporting what is left in X-Rate-Limit-Remaining and
+    what a request cost in X-Request-Cost. Every request also holds a pre-flight charge
+    against the bucket while it is in flight. The governor mirrors that bucket locally and
+    grows or shrinks the number of requests allowed in flight: it adds one slot while the
+    bucket stays comfortably full and halves the slots when the bucket runs low or canvas
+    throttles us.
     """
+
+    _governors: dict = {}
+    _registry_lock = threading.Lock()
+
     def __init__(
             self,
-            headers: dict = None,
-            api_url: str = None,
-            account_id: int = None
-    ) -> None:
+            max_concurrency: int = None,
+            min_concurrency: int = 1,
+            bucket_size: float = CANVAS_RATE_LIMIT_BUCKET,
+            refill_rate: float = CANVAS_RATE_LIMIT_REFILL,
+            reserve: float = CANVAS_RATE_LIMIT_RESERVE,
+            preflight_cost: float = CANVAS_RATE_LIMIT_PREFLIGHT):
         """
-
         Args:
-            headers: The headers to use for requests when not otherwise specified
-            api_url: The api url to use for requests
-            account_id: The account id to use. Not currently used.
+            max_concurrency: the most requests ever allowed in flight at once
+            min_concurrency: the fewest requests allowed in flight at once
+            bucket_size: the size of canvas' quota bucket
+            refill_rate: how many units of quota canvas restores per second
+            reserve: the amount of quota to try to leave in the bucket
+            preflight_cost: the quota canvas holds against each request while it is in flight
         """
-
-        self.account_id = account_id if account_id else ACCOUNT_ID
+        self.max_concurrency = max_concurrency if max_concurrency else DEFAULT_MAX_CONCURRENCY
+        self.min_concurrency = min_concurrency
+        self.bucket_size = bucket_size
+        self.refill_rate = refill_rate
+        self.reserve = reserve
+        self.preflight_cost = preflight_cost
+
+        self.limit: int = min(self.max_concurrency, max(self.min_concurrency, 2))
         """
-        The canvas account to use when making requests to the canvas api
+        The number of requests currently allowed in flight
         """
 
-        self.headers = headers if headers else HEADERS
+        self.in_flight: int = 0
+        self.remaining: float = bucket_size
         """
-        the default headers to send to the canvas api when making requests
+        Our estimate of the quota left in canvas' bucket
         """
 
-        self.api_url = api_url if api_url else API_URL
+        self.cost_estimate: float = 1.0
         """
-        The canvas api base url
+        A running average of X-Request-Cost
         """
 
-    @property
-    def html_url(self):
+        self.throttled_count: int = 0
+        self._successes_at_limit = 0
+        self._last_refill = time.monotonic()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def for_link(cls, headers: dict, api_url: str) -> Self:
         """
+        Gets the governor shared by every link using the same token against the same host
+        Args:
+            headers: the headers holding the authorization token
+            api_url: the api url of the canvas host
+
         Returns:
-        The full base html url of the canvas site
+            The shared RateLimitGovernor
         """
-        return re.sub('/api/v1', '', self.api_url)
-
-    def _query(self, func: callable, url: str, **args):
+        token = headers.get('Authorization', '') if headers else ''
+        key = (hashlib.sha256(token.encode()).hexdigest(), urllib.parse.urlparse(api_url).netloc)
+        with cls._registry_lock:
+            if key not in cls._governors:
+                cls._governors[key] = cls()
+            return cls._governors[key]
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.remaining = min(self.bucket_size, self.remaining + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
+
+    def _try_acquire(self) -> tuple[bool, float | None]:
         """
-        Recurring code for all requests wrapper functions
-        Args:
-            func: the function to use for calls, assumed to be one of
-            request.get, request.post, request.put, request.delete
-            url: The url PAST the base API url
-            params: any params to pass to the call
-            **args: any additional params to pass to the call
+        Takes a slot if one is free and there is enough quota. Must hold self._condition.
         Returns:
-            The json decoded data from the response
-
+            Whether a slot was taken, and if not how long to wait for quota (None if waiting on a slot)
         """
-        url = f"{self.api_url}/{url}"
-        print('calling ' + url)
-        if 'headers' not in args:
-            args['headers'] = self.headers
-        response = func(url, **args)
-        assert response.ok, response.text
-        try:
-            return response.json()
-        except json.decoder.JSONDecodeError:
-            return response
+        self._refill()
+        has_slot = self.in_flight < self.limit
+        needed = self.cost_estimate + (self.in_flight + 1) * self.preflight_cost
+        # with nothing in flight, spend the reserve rather than stall, so we keep learning what is left
+        floor = self.reserve if self.in_flight else 0
+        if has_slot and self.remaining - needed >= floor:
+            self.in_flight += 1
+            self.remaining -= self.cost_estimate
+            return True, None
+        return False, None if not has_slot else max(needed + floor - self.remaining, 1) / self.refill_rate
+
+    def acquire(self) -> None:
+        """
+        Blocks until there is a free slot and enough quota left to send a request
+        """
+        with self._condition:
+            acquired, wait = self._try_acquire()
+            while not acquired:
+                self._condition.wait(timeout=wait)
+                acquired, wait = self._try_acquire()
 
-    def get(self, url: str, params: dict = None, **args):
+    async def acquire_async(self) -> None:
         """
-        Performs a canvas api call
+        Waits without blocking the event loop until there is a free slot and enough quota left
+        """
+        while True:
+            with self._condition:
+                acquired, wait = self._try_acquire()
+            if acquired:
+                return
+            # a release frees pre-flight quota as well as a slot, and nothing wakes us for it the way
+            # notify_all wakes acquire, so poll rather than sleep out the whole refill estimate
+            await asyncio.sleep(min(wait, 0.05) if wait is not None else 0.05)
+
+    def release(self, response: requests.Response | None = None) -> None:
+        """
+        Frees a slot and adjusts the number of slots to what canvas reported
         Args:
-            url: any url to use after the canvas api base
-            params: any params to pass to the requests.get call
-            **args: and other args to pass to requests.get
-        Returns:
-            A dict or list holding the response from the canvas api
+            response: the response to the request, if there was one
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if response is not None:
+                self._update(response)
+            self._condition.notify_all()
+
+    def _update(self, response: requests.Response) -> None:
+        headers = response.headers
+        if 'X-Request-Cost' in headers:
+            self.cost_estimate = 0.8 * self.cost_estimate + 0.2 * float(headers['X-Request-Cost'])
+        if 'X-Rate-Limit-Remaining' in headers:
+            self.remaining = float(headers['X-Rate-Limit-Remaining'])
+            self._last_refill = time.monotonic()
+
+        if self.is_throttled(response):
+            self.throttled_count += 1
+            self.limit = max(self.min_concurrency, self.limit // 2)
+            self.remaining = 0
+            self._successes_at_limit = 0
+        elif self.remaining < self.reserve * 2:
+            self.limit = max(self.min_concurrency, self.limit - 1)
+            self._successes_at_limit = 0
+        elif self.remaining > self.bucket_size / 2:
+            # additive increase, one slot per full round of requests at the current limit
+            self._successes_at_limit += 1
+            if self._successes_at_limit >= self.limit:
+                self.limit = min(self.max_concurrency, self.limit + 1)
+                self._successes_at_limit = 0
 
+    @staticmethod
+    def is_throttled(response: requests.Response) -> bool:
         """
-        return self._query(requests.get, url=url, params=params, **args)
+        Returns: True if canvas refused the request because of the rate limit
+        """
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and 'rate limit exceeded' in response.text.lower()
 
-    def delete(self, url: str, params: dict = None, **args):
-        return self._query(requests.delete, url=url, params=params, **args)
 
-    def put(self, url: str, params: dict = None, data=None, **kwargs):
+class RetryPolicy:
+    """
+    Decides whether a failed canvas request is retried and how long to back off first,
+    and keeps count of what retrying has cost us.
+
+    Only idempotent methods are retried; a POST such as a duplicate or a content migration
+    might have gone through before it failed, so sending it again could do the work twice.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+            self,
+            max_retries: int = DEFAULT_MAX_RETRIES,
+            backoff_base: float = 0.5,
+            backoff_max: float = 30.0,
+            methods: Iterable[str] = IDEMPOTENT_METHODS,
+            statuses: Iterable[int] = RETRY_STATUSES):
         """
-        Performs a canvas api put call
         Args:
-            data: data to put
-            url: any url to use after the canvas api base
-            params: any params to pass to the requests.get call
-            **kwargs: and other args to pass to requests.get
-        Returns:
-            A dict or list holding the response from the canvas api
+            max_retries: the most times a single request is retried
+            backoff_base: the backoff ceiling in seconds for the first retry, doubled for each one after
+            backoff_max: the largest backoff ceiling in seconds
+            methods: the http methods that are safe to retry
+            statuses: the http statuses that are worth retrying
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.methods = frozenset(method.upper() for method in methods)
+        self.statuses = frozenset(statuses)
 
+        self.retries: int = 0
+        """
+        The total number of retries sent
         """
-        return self._query(requests.put, url=url, params=params, data=data, **kwargs)
 
-    def post(self, url, params: dict = None, data=None, **kwargs):
-        return self._query(requests.post, url=url, params=params, data=data, **kwargs)
+        self.retried_requests: int = 0
+        """
+        The number of requests that needed at least one retry
+        """
 
-    def patch(self, url, params: dict = None, data=None, **kwargs):
-        return self._query(requests.patch, url=url, params=params, data=data, **kwargs)
+        self.exhausted: int = 0
+        """
+        The number of requests that were still failing when we ran out of retries
+        """
 
+        self.time_spent: float = 0.0
+        """
+        Seconds spent on failed attempts and backing off before retrying them
+        """
 
+        self._lock = threading.Lock()
 
-    def get_paged_data(self, url: str, headers: dict = None, params: dict = None) -> list | None:
-        """Summary
-            returns a list of data from a get request, going through
-            multiple pages of data requests as necessary
+    def should_retry(
+            self,
+            method: str,
+            attempt: int,
+            response: requests.Response = None,
+            error: Exception = None,
+            force: bool = None) -> bool:
+        """
+        Args:
+            method: the http method of the request
+            attempt: how many retries have been made already
+            response: the response, if we got one
+            error: the connection error raised instead, if there was one
+            force: retry whatever the method if True, never retry if False
+
+        Returns:
+            True if the request should be sent again
+        """
+        if force is False or (force is None and method.upper() not in self.methods):
+            return False
+        if response is not None:
+            retryable = response.status_code in self.statuses or RateLimitGovernor.is_throttled(response)
+        else:
+            retryable = isinstance(error, (requests.ConnectionError, requests.Timeout))
+        if not retryable:
+            return False
+        if attempt >= self.max_retries:
+            with self._lock:
+                self.exhausted += 1
+            return False
+        return True
 
+    def backoff(self, attempt: int, response: requests.Response = None) -> float:
+        """
         Args:
-            params: Any additional parameters to pass to the query
-            url: The url path to query, not including the api_url
-            headers: Headers for the request
+            attempt: how many retries have been made already
+            response: the failed response, if there was one
 
         Returns:
-            list: The paged data
+            The number of seconds to wait, honoring Retry-After if canvas sent one
         """
-        headers = headers if headers else self.headers
-        response = requests.get(f'{self.api_url}/{url}', headers=headers, params=params)
-        out = response.json()
-        if not response.ok:
-            return None
-        next_page_link = "!"
-        while len(next_page_link) != 0 \
-                and 'link' in response.headers \
-                and response.ok:
-            pagination_links = response.headers["Link"].split(",")
-            for link in pagination_links:
-                if 'next' in link:
-                    next_page_link = link.split(";")[0].split("<")[1].split(">")[0]
-                    response = requests.get(next_page_link, headers=headers, params=params)
-                    out = out + response.json()
-                    break
-                else:
-                    next_page_link = ""
+        if response is not None and 'Retry-After' in response.headers:
+            retry_after = response.headers['Retry-After']
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                try:
+                    retry_at = email.utils.parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+                    return min(max(delay, 0.0), self.backoff_max)
+                except (TypeError, ValueError):
+                    pass
+
+        # "full jitter": anywhere between zero and an exponentially growing ceiling
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def record(self, attempt: int, elapsed: float) -> None:
+        """
+        Records a retry
+        Args:
+            attempt: the number of retries already made before this one
+            elapsed: seconds spent on the failed attempt and the backoff after it
+        """
+        with self._lock:
+            self.retries += 1
+            if attempt == 0:
+                self.retried_requests += 1
+            self.time_spent += elapsed
 
-        return out
+    @property
+    def stats(self) -> dict:
+        """
+        Returns:
+            A dict of what retrying has cost so far
+        """
+        return {
+            'retries': self.retries,
+            'retried_requests': self.retried_requests,
+            'exhausted': self.exhausted,
+            'time_spent': round(self.time_spent, 3),
+        }
 
 
-class BaseCanvasObject:
+def _numbered_page_urls(response: requests.Response) -> list[str] | None:
     """
-    A base class for classes that talk to and hold data from canvas API
+    Works out the urls of every page after this one, if canvas is paging by number
+    and told us the last page. Bookmark cursors can't be worked out ahead of time.
+    Args:
+        response: the response for a page of a paged listing
+
+    Returns:
+        The urls of the remaining pages in order, or None if they can't be worked out
     """
+    links = response.links
+    if 'next' not in links or 'last' not in links:
+        return None
 
-    _id_property = 'id'
+    next_url = urllib.parse.urlparse(links['next']['url'])
+    query = urllib.parse.parse_qsl(next_url.query, keep_blank_values=True)
+    next_page = dict(query).get('page', '')
+    last_page = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(links['last']['url']).query)).get('page', '')
+    if not next_page.isdigit() or not last_page.isdigit():
+        return None
+
+    return [
+        urllib.parse.urlunparse(next_url._replace(query=urllib.parse.urlencode(
+            [(key, str(page) if key == 'page' else value) for key, value in query])))
+        for page in range(int(next_page), int(last_page) + 1)
+    ]
+
+
+def json_loads(data: bytes | str) -> Any:
     """
-    The field name of the id of the canvas object type
+    Decodes json with orjson if it's installed, which is several times faster on large listings,
+    or with the stdlib otherwise
     """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-    _name_property = None
-    """
-    The field name of the primary name of the canvas object type
+
+def decode_json(response: requests.Response) -> Any:
     """
+    Decodes a response's json body
+    Args:
+        response: the response
 
-    _content_url_template = None
+    Returns:
+        The decoded data, or the response itself if its body is empty or isn't json
     """
-    A templated url to get a single item
+    content_type = response.headers.get('Content-Type', '')
+    if not response.content or (content_type and 'json' not in content_type):
+        return response
+    try:
+        return json_loads(response.content)
+    except ValueError:
+        return response
+
+
+def _build_response(
+        status_code: int,
+        headers: Mapping,
+        body: bytes,
+        url: str,
+        reason: str = None,
+        encoding: str = None) -> requests.Response:
     """
+    Builds a requests.Response from parts we already have, e.g. a stored body or an aiohttp response
+    Args:
+        status_code: the http status
+        headers: the response headers
+        body: the raw response body
+        url: the url the response is for
+        reason: the http reason phrase
+        encoding: the body's text encoding, if known
 
-    _all_content_url_template = None
+    Returns:
+        A response that behaves like one requests made
     """
-    A templated url to get all items
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = reason
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = encoding
+    response._content = body
+    return response
+
+
+class HttpCache:
+    """
+    An on-disk cache of GET responses that carried an ETag or Last-Modified header.
+    Stored responses are revalidated with If-None-Match / If-Modified-Since on every read,
+    so unchanged resources cost a 304 round trip instead of the full body.
+    The least recently used entries are evicted once the cache outgrows its size limits.
     """
 
-    def __init__(self, data, headers=None, api_url=None, api_link=None, account_id=None, **kwargs):
+    _caches: dict[str, 'HttpCache'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str = None, max_bytes: int = None, max_entries: int = None) -> None:
         """
-        Initializes the object
         Args:
-            data: the canvas data this class is wrapping
-            headers: the headers to use, passed to the api_link
-            api_url: the api_url, passed to the api_link. CURRENTLY pulls from constant if not included
-            **kwargs: all other args passed directly to api_link constructor
+            path: the sqlite file to store responses in
+            max_bytes: the most body bytes to keep before evicting
+            max_entries: the most responses to keep before evicting
         """
-        self.account_id = account_id
+        self.path = path if path else HTTP_CACHE_FILE
+        self.max_bytes = max_bytes if max_bytes is not None else HTTP_CACHE_MAX_BYTES
+        self.max_entries = max_entries if max_entries is not None else HTTP_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, '
+                'headers TEXT, body BLOB, size INTEGER, used REAL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+
+    @classmethod
+    def shared(cls, path: str = None, max_bytes: int = None, max_entries: int = None) -> 'HttpCache':
         """
-        The account ID that this object primarily lives in. Passed as a default to the api link.
+        Gets the cache for a file, so every link using the same file shares one connection to it
         """
+        path = os.path.abspath(path if path else HTTP_CACHE_FILE)
+        with cls._registry_lock:
+            if path not in cls._caches:
+                cls._caches[path] = cls(path, max_bytes, max_entries)
+            return cls._caches[path]
 
-        self._canvas_data: dict = data if data is not None else {}
+    @staticmethod
+    def key(url: str, headers: dict = None, params: dict = None) -> str:
         """
-        A dict holding the decoded json representation of the object in canvas
+        The cache key for a GET. Includes a hash of the authorization header, since different tokens
+        can see different content at the same url.
         """
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        authorization = (headers or {}).get('Authorization', '')
+        return hashlib.sha256(f'{authorization}\n{full_url}'.encode()).hexdigest()
 
-        self.api_link: CanvasApiLink = api_link if api_link is not None else (
-            BaseCanvasObject.new_api_link(headers=headers, api_url=api_url, account_id=account_id))
+    def validators(self, key: str) -> dict:
         """
-        The api link to Canvas that all canvas api calls are made through.
+        Args:
+            key: the cache key of the request
+
+        Returns:
+            The conditional headers to send for a stored response, or an empty dict if there isn't one
         """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT etag, last_modified FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return {}
+        etag, last_modified = row
+        out = {}
+        if etag:
+            out['If-None-Match'] = etag
+        if last_modified:
+            out['If-Modified-Since'] = last_modified
+        return out
 
-    def __getitem__(self, item):
-        if item not in self._canvas_data:
-            return None
-        return self._canvas_data[item]
+    def resolve(self, key: str, response: requests.Response) -> requests.Response | None:
+        """
+        Serves the stored body if canvas said it hasn't changed, or stores the new one if it can be validated later
+        Args:
+            key: the cache key of the request
+            response: the response canvas sent
 
-    def __eq__(self, other):
-        return self.id == other.id
+        Returns:
+            The stored response on a 304, otherwise the response canvas sent.
+            None on a 304 whose stored response has gone since its validators were sent, e.g. evicted or cleared
+            by another process; the request has to be sent again without them.
+        """
+        if response.status_code == 304:
+            with self._lock:
+                row = self._db.execute('SELECT url, headers, body FROM responses WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self._db.execute('UPDATE responses SET used = ? WHERE key = ?', (time.time(), key))
+                    self._db.commit()
+            if row is None:
+                return None
+            url, headers, body = row
+            headers = json.loads(headers)
+            # the 304 carries the current rate limit and validator headers
+            headers.update(response.headers)
+            self.hits += 1
+            self.bytes_saved += len(body)
+            return _build_response(200, headers, body, url, reason='OK', encoding=response.encoding)
+
+        if response.status_code != 200:
+            return response
+        self.misses += 1
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return response
+        body = response.content
+        if len(body) > self.max_bytes:
+            return response
+        # the body is stored decoded, so the headers describing how it was sent no longer apply
+        headers = {key: value for key, value in response.headers.items()
+                   if key.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, response.url, etag, last_modified, json.dumps(headers),
+                 body, len(body), time.time()))
+            self._evict()
+            self._db.commit()
+        return response
+
+    def _evict(self) -> None:
+        """
+        Drops the least recently used responses until the cache is back under its limits.
+        Must be called holding the lock.
+        """
+        count, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        for key, entry_size in self._db.execute('SELECT key, size FROM responses ORDER BY used').fetchall():
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            count -= 1
+            size -= entry_size
 
-    @property
-    def content_url_path(self):
-        return self._content_url_template.format(content_id=self.id, account_id=self.account_id)
+    def clear(self) -> None:
+        """
+        Empties the cache
+        """
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._db.commit()
 
     @property
-    def html_content_url(self):
-        url = self.api_link.api_url
-        if self.content_url_path:
-            url += self.content_url_path
+    def stats(self) -> dict:
+        """
+        Returns:
+            How many reads were served from the cache and how many body bytes that saved
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes_saved': self.bytes_saved,
+        }
 
-        return re.sub('api/v1', '', url)
 
-    @property
-    def api_content_url(self):
-        raise ValueError(f"property content_link is not defined for {type(self).__name__}")
+def get_http_cache() -> HttpCache | None:
+    """
+    Gets the on-disk response cache configured in the constants file, if caching isn't turned off.
+    Set "httpCacheFile" to null in the constants file to turn it off; "httpCacheMaxBytes" and
+    "httpCacheMaxEntries" set its size.
+    Returns:
+        The shared HttpCache, or None
+    """
+    constants = globals().get('CONSTANTS', {})
+    path = constants.get('httpCacheFile', HTTP_CACHE_FILE)
+    if not path:
+        return None
+    return HttpCache.shared(path, constants.get('httpCacheMaxBytes'), constants.get('httpCacheMaxEntries'))
 
-    @property
-    def json(self):
-        return json.dumps(self._canvas_data)
 
-    @staticmethod
-    def new_api_link(headers=None, api_url=None, account_id=None):
-        return CanvasApiLink(headers=headers, api_url=api_url, account_id=account_id)
+class CourseCatalog:
+    """
+    A local sqlite index of every course in the accounts we search, so course lookups by code or term know which
+    account to ask without searching accounts/{id}/courses?search_term= in each one.
+    Canvas can't list only the courses changed since a time, so each account is re-listed once its listing
+    is older than max_age, a page at a time, and courses it no longer lists are dropped. Listing an account
+    is slow, so that happens in the background while callers search canvas directly.
+    Courses found by searching canvas are added as they're found.
+    Rows are scoped to the canvas instance and token of the link they were listed through, so links to
+    different instances can share a file.
+    """
 
-    @classmethod
-    def get_by_id(cls, course: 'Course', content_id: int, account_id=None, params: dict = None) -> Self:
-        return cls(course, cls._get_data_by_id(
-            course=course,
-            content_id=content_id,
-            account_id=account_id,
-            params=params,
-        ))
+    SCHEMA_VERSION = 2
 
-    @classmethod
-    def _get_data_by_id(cls, course: 'Course', content_id: int, account_id=None, params: dict = None) -> dict:
-        link = course.api_link
-        return link.get(cls.get_url_path_from_ids(course_id=course.id, content_id=content_id, account_id=account_id), params=params)
+    _catalogs: dict[str, 'CourseCatalog'] = {}
+    _registry_lock = threading.Lock()
 
-    @classmethod
-    def get_all(cls, course: 'Course' = None, params: dict = None) -> list[Self]:
-        link = course.api_link
-        data = link.get_paged_data(cls.get_all_url(course_id=course.id), params=params)
-        return [cls(course, item) for item in data]
+    def __init__(self, path: str = None, max_age: float = None) -> None:
+        """
+        Args:
+            path: the sqlite file to store the catalog in
+            max_age: seconds before an account's listing is refreshed
+        """
+        self.path = path if path else COURSE_CATALOG_FILE
+        self.max_age = max_age if max_age is not None else COURSE_CATALOG_MAX_AGE
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._refreshing: dict[tuple[str, int], threading.Thread] = {}
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            # catalogs written before rows were scoped can't say which instance they came from
+            if self._db.execute('PRAGMA user_version').fetchone()[0] < self.SCHEMA_VERSION:
+                self._db.execute('DROP TABLE IF EXISTS courses')
+                self._db.execute('DROP TABLE IF EXISTS accounts')
+                self._db.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+            # listed_account is the account searched, which lists the courses of its sub accounts too
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS courses ('
+                'scope TEXT, listed_account INTEGER, id INTEGER, course_code TEXT, name TEXT, sis_course_id TEXT, '
+                'enrollment_term_id INTEGER, blueprint INTEGER, workflow_state TEXT, account_id INTEGER, data TEXT, '
+                'PRIMARY KEY (scope, listed_account, id))')
+            self._db.execute('CREATE INDEX IF NOT EXISTS courses_term ON courses (scope, enrollment_term_id)')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS accounts (scope TEXT, id INTEGER, refreshed REAL, PRIMARY KEY (scope, id))')
 
     @classmethod
-    def get_url_path_from_ids(cls, course_id: int, content_id: int, account_id: int = None):
-        return cls._content_url_template.format(course_id=course_id, content_id=content_id, account_id=account_id)
+    def shared(cls, path: str = None, max_age: float = None) -> 'CourseCatalog':
+        """
+        Gets the catalog for a file, so every lookup using the same file shares one connection to it
+        """
+        path = os.path.abspath(path if path else COURSE_CATALOG_FILE)
+        with cls._registry_lock:
+            if path not in cls._catalogs:
+                cls._catalogs[path] = cls(path, max_age)
+            return cls._catalogs[path]
 
-    @classmethod
-    def get_all_url(cls, course_id: int, account_id=None):
-        return cls._all_content_url_template.format(course_id=course_id, account_id=account_id)
+    @staticmethod
+    def _link_and_scope(link: 'CanvasApiLink' = None) -> tuple['CanvasApiLink', str]:
+        link = link if link is not None else get_default_api_link()
+        return link, AccountMetadata.scope(link.api_url, link.headers)
+
+    def is_fresh(self, account_id: int, link: 'CanvasApiLink' = None) -> bool:
+        _, scope = self._link_and_scope(link)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT refreshed FROM accounts WHERE scope = ? AND id = ?', (scope, account_id)).fetchone()
+        return row is not None and time.time() - row[0] < self.max_age
+
+    def record(self, account_id: int, courses: Iterable[dict], link: 'CanvasApiLink' = None) -> None:
+        """
+        Adds or updates courses as listed under an account through link
+        """
+        _, scope = self._link_and_scope(link)
+        rows = [(
+            scope, account_id, course['id'], course.get('course_code'), course.get('name'),
+            course.get('sis_course_id'), course.get('enrollment_term_id'), bool(course.get('blueprint')),
+            course.get('workflow_state'), course.get('account_id'), json.dumps(course),
+        ) for course in courses]
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO courses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self._db.commit()
+
+    def refresh(self, account_id: int, link: 'CanvasApiLink' = None) -> int:
+        """
+        Re-lists every course in an account, storing each page as it arrives
 
-    @property
-    def id(self) -> int:
-        return self._canvas_data[self._id_property]
+        Returns:
+            How many courses the account lists
+        """
+        link, scope = self._link_and_scope(link)
+        started = time.time()
+        seen = []
+        pages = link._iter_pages(f'accounts/{account_id}/courses', params={'per_page': 100}, cache=False, strict=True)
+        for page in pages:
+            self.record(account_id, page, link)
+            seen.extend(course['id'] for course in page)
+        with self._lock:
+            self._db.execute('CREATE TEMP TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY)')
+            self._db.execute('DELETE FROM seen')
+            self._db.executemany('INSERT OR IGNORE INTO seen VALUES (?)', [(id_,) for id_ in seen])
+            self._db.execute(
+                'DELETE FROM courses WHERE scope = ? AND listed_account = ? AND id NOT IN (SELECT id FROM seen)',
+                (scope, account_id))
+            self._db.execute('INSERT OR REPLACE INTO accounts VALUES (?, ?, ?)', (scope, account_id, started))
+            self._db.commit()
+        return len(seen)
+
+    def refresh_in_background(self, account_id: int, link: 'CanvasApiLink' = None) -> threading.Thread:
+        """
+        Starts re-listing an account on another thread, unless it's already being re-listed
 
-    @property
-    def name(self) -> str:
-        return self[self._name_property]
+        Returns:
+            The thread doing the refresh
+        """
+        link, scope = self._link_and_scope(link)
+        with self._lock:
+            thread = self._refreshing.get((scope, account_id))
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(
+                    target=self._refresh_quietly, args=(account_id, link),
+                    name=f'course-catalog-{account_id}', daemon=True)
+                self._refreshing[(scope, account_id)] = thread
+                thread.start()
+        return thread
+
+    def _refresh_quietly(self, account_id: int, link: 'CanvasApiLink') -> None:
+        try:
+            self.refresh(account_id, link)
+        except (requests.RequestException, sqlite3.Error) as e:
+            # the account stays stale, so the next search tries again
+            warnings.warn(f'Could not refresh the course catalog for account {account_id}: {e}')
 
-    def _save_data(self, data: dict) -> dict:
-        return self.api_link.put(self.content_url_path, data=data)
+    def wait(self, timeout: float = None) -> None:
+        """
+        Waits for background refreshes to finish
+        """
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
 
-    def delete(self) -> dict:
+    def replace(self, old_id: int, course: dict, link: 'CanvasApiLink' = None) -> None:
+        """
+        Swaps a course for the one that replaced it, under every account that listed it.
+        Resetting a course's content gives it a new id and deletes the old one.
+        """
+        link, scope = self._link_and_scope(link)
+        with self._lock:
+            accounts = [account_id for account_id, in self._db.execute(
+                'SELECT listed_account FROM courses WHERE scope = ? AND id = ?', (scope, old_id))]
+            self._db.execute('DELETE FROM courses WHERE scope = ? AND id = ?', (scope, old_id))
+            self._db.commit()
+        for account_id in accounts:
+            self.record(account_id, [course], link)
+
+    @staticmethod
+    def _conditions(code: str | None, term_id: int = None) -> tuple[str, list]:
+        conditions, args = [], []
+        if code is not None:
+            conditions.append('(instr(lower(name), ?) OR instr(lower(course_code), ?) OR CAST(id AS TEXT) = ?)')
+            args += [code.lower(), code.lower(), code]
+        if term_id is not None:
+            conditions.append('enrollment_term_id = ?')
+            args.append(term_id)
+        return ''.join(f' AND {condition}' for condition in conditions), args
+
+    def find_account(
+            self,
+            code: str | None,
+            account_ids: Iterable[int],
+            term_id: int = None,
+            link: 'CanvasApiLink' = None) -> int | None:
+        """
+        Finds the first account, in order, listing a course like canvas' search_term matches: by part of the name
+        or code, or the whole id.
+        The first account reached whose listing is stale is refreshed in the background and the search misses,
+        so the caller asks canvas until the listing is back.
+        Args:
+            code: the search term. None matches every course.
+            account_ids: the accounts to search, in order
+            term_id: only courses in this enrollment term
+            link: the link whose instance to search, and to refresh stale accounts through
+
+        Returns:
+            The account's id. None if nothing matched, or an account that had to be searched first is stale.
+        """
+        link, scope = self._link_and_scope(link)
+        where, args = self._conditions(code, term_id)
+        for account_id in account_ids:
+            if not self.is_fresh(account_id, link):
+                self.refresh_in_background(account_id, link)
+                break
+            with self._lock:
+                row = self._db.execute(
+                    f'SELECT 1 FROM courses WHERE scope = ? AND listed_account = ?{where} LIMIT 1',
+                    (scope, account_id, *args)).fetchone()
+            if row is not None:
+                self.hits += 1
+                return account_id
+        self.misses += 1
+        return None
+
+    def search(
+            self,
+            code: str | None,
+            account_ids: Iterable[int],
+            term_id: int = None,
+            link: 'CanvasApiLink' = None) -> list[dict]:
+        """
+        Finds courses as find_account does, as they were when their account was last listed
+        Args:
+            code: the search term. None matches every course.
+            account_ids: the accounts to search, in order. Only the first account with a match is used.
+            term_id: only courses in this enrollment term
+            link: the link whose instance to search, and to refresh stale accounts through
+
+        Returns:
+            The matching courses' stored data, the most recently created first. Empty if find_account found nothing.
+        """
+        link, scope = self._link_and_scope(link)
+        account_id = self.find_account(code, account_ids, term_id, link)
+        if account_id is None:
+            return []
+        where, args = self._conditions(code, term_id)
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT data FROM courses WHERE scope = ? AND listed_account = ?{where} ORDER BY id DESC',
+                (scope, account_id, *args)).fetchall()
+        return [json_loads(data) for data, in rows]
+
+    def clear(self) -> None:
+        """
+        Empties the catalog, so the next search lists every account again
+        """
+        with self._lock:
+            self._db.execute('DELETE FROM courses')
+            self._db.execute('DELETE FROM accounts')
+            self._db.commit()
+
+
+def get_course_catalog() -> CourseCatalog | None:
+    """
+    Gets the course catalog configured in the constants file, if it isn't turned off.
+    Set "courseCatalogFile" to null in the constants file to turn it off; "courseCatalogMaxAge" sets how many
+    seconds an account's listing is trusted for.
+    Returns:
+        The shared CourseCatalog, or None
+    """
+    constants = globals().get('CONSTANTS', {})
+    path = constants.get('courseCatalogFile', COURSE_CATALOG_FILE)
+    if not path:
+        return None
+    return CourseCatalog.shared(path, constants.get('courseCatalogMaxAge'))
+
+
+class AccountMetadata:
+    """
+    Slowly changing account level facts, like the account list, terms and grading standards, kept in a local
+    json file so starting up and looking them up doesn't wait on canvas. Entries are refreshed once they're
+    older than max_age, and the file is only read on first use.
+    Entries are scoped to the canvas instance and token they were fetched with.
+    """
+
+    _files: dict[str, 'AccountMetadata'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str = None, max_age: float = None) -> None:
+        """
+        Args:
+            path: the json file to keep the metadata in
+            max_age: seconds before an entry is fetched again
+        """
+        self.path = path if path else ACCOUNT_METADATA_FILE
+        self.max_age = max_age if max_age is not None else ACCOUNT_METADATA_MAX_AGE
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict | None = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def shared(cls, path: str = None, max_age: float = None) -> 'AccountMetadata':
+        """
+        Gets the metadata for a file, so everything using the same file shares what's been read
+        """
+        path = os.path.abspath(path if path else ACCOUNT_METADATA_FILE)
+        with cls._registry_lock:
+            if path not in cls._files:
+                cls._files[path] = cls(path, max_age)
+            return cls._files[path]
+
+    @staticmethod
+    def scope(api_url: str, headers: dict = None) -> str:
+        """
+        The prefix of entries fetched from api_url with headers. Different tokens can see different accounts.
+        """
+        authorization = (headers or {}).get('Authorization', '')
+        return f'{api_url} {hashlib.sha256(authorization.encode()).hexdigest()[:16]}'
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(temp_path, self.path)
+
+    def get(self, key: str, fetch: Callable[[], Any], keep: Callable[[Any], bool] = bool) -> Any:
+        """
+        Gets an entry, fetching and storing it if it's missing or stale
+        Args:
+            key: the entry, scoped with AccountMetadata.scope
+            fetch: gets the current value from canvas
+            keep: whether a fetched value should be stored. By default empty results aren't, so they're asked for again.
+
+        Returns:
+            The stored or fetched value
+        """
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is not None and time.time() - entry['fetched'] < self.max_age:
+            self.hits += 1
+            return entry['value']
+        self.misses += 1
+        value = fetch()
+        if keep(value):
+            with self._lock:
+                self._load()[key] = {'fetched': time.time(), 'value': value}
+                self._save()
+        return value
+
+    def clear(self) -> None:
+        """
+        Forgets every entry, so each is fetched again on next use
+        """
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+
+def get_account_metadata(constants: dict = None) -> AccountMetadata | None:
+    """
+    Gets the account metadata file configured in the constants file, if it isn't turned off.
+    Set "metadataFile" to null in the constants file to always ask canvas; "metadataMaxAge" sets how many
+    seconds entries are trusted for.
+    Args:
+        constants: the constants to read the settings from. Defaults to the loaded constants.
+    Returns:
+        The shared AccountMetadata, or None
+    """
+    if constants is None:
+        constants = globals().get('CONSTANTS', {})
+    path = constants.get('metadataFile', ACCOUNT_METADATA_FILE)
+    if not path:
+        return None
+    return AccountMetadata.shared(path, constants.get('metadataMaxAge'))
+
+
+def cached_metadata(
+        key: str,
+        fetch: Callable[[], Any],
+        api_url: str = None,
+        headers: dict = None,
+        keep: Callable[[Any], bool] = bool,
+        constants: dict = None) -> Any:
+    """
+    Gets an account level fact from the metadata file, fetching it if it's missing, stale or the file is turned off
+    Args:
+        key: names the fact, e.g. 'accounts'
+        fetch: gets the current value from canvas
+        api_url: the canvas instance it's fetched from. Defaults to API_URL.
+        headers: the headers it's fetched with. Defaults to HEADERS.
+        keep: whether a fetched value should be stored
+        constants: the constants the metadata file is configured in. Defaults to the loaded constants.
+
+    Returns:
+        The value
+    """
+    metadata = get_account_metadata(constants)
+    if metadata is None:
+        return fetch()
+    scope = AccountMetadata.scope(api_url if api_url else API_URL, headers if headers is not None else HEADERS)
+    return metadata.get(f'{scope} {key}', fetch, keep)
+
+
+class ResponseCache:
+    """
+    An in-memory, time limited, least recently used cache of successful GET responses.
+    Writes through a link drop every cached read of the resource they were made under,
+    so reads after our own writes see what we wrote.
+    """
+
+    _shared: 'ResponseCache | None' = None
+    _registry_lock = threading.Lock()
+
+    def __init__(self, ttl: float = None, max_entries: int = None) -> None:
+        """
+        Args:
+            ttl: how many seconds a response is served from the cache for
+            max_entries: the most responses to hold before dropping the least recently used
+        """
+        self.ttl = ttl if ttl is not None else RESPONSE_CACHE_TTL
+        self.max_entries = max_entries if max_entries is not None else RESPONSE_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: collections.OrderedDict[str, tuple[float, str, requests.Response]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'ResponseCache':
+        """
+        Gets the cache every link uses unless given its own, so a write through one link
+        invalidates reads cached by another
+        """
+        with cls._registry_lock:
+            if cls._shared is None:
+                constants = globals().get('CONSTANTS', {})
+                cls._shared = cls(constants.get('responseCacheTtl'), constants.get('responseCacheMaxEntries'))
+            return cls._shared
+
+    @staticmethod
+    def scope(url: str) -> str:
+        """
+        The part of a url a write to it can affect: everything under the course, account or user it belongs to,
+        or under its parent collection if it doesn't belong to one
+        Args:
+            url: a full url
+
+        Returns:
+            The url prefix whose cached reads a write to this url invalidates
+        """
+        parsed = urllib.parse.urlparse(url)
+        path = re.sub('/+', '/', parsed.path).rstrip('/')
+        match = re.match(r'(.*?/(?:courses|accounts|users)/[^/]+)', path)
+        prefix = match.group(1) if match else path.rsplit('/', 1)[0]
+        return f'{parsed.scheme}://{parsed.netloc}{prefix}'
+
+    def get(self, key: str) -> requests.Response | None:
+        """
+        Args:
+            key: the cache key of the request
+
+        Returns:
+            The cached response, if there is one that hasn't expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: str, url: str, response: requests.Response) -> None:
+        """
+        Caches a successful response
+        Args:
+            key: the cache key of the request
+            url: the full url of the request, used to invalidate it later
+            response: the response to cache
+        """
+        if self.ttl <= 0 or not response.ok:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, re.sub('(?<!:)/+', '/', url), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        """
+        Drops every cached read a write to this url could have changed
+        Args:
+            url: the full url that was written to
+        """
+        prefix = self.scope(url)
+        with self._lock:
+            stale = [
+                key for key, (_, cached_url, _) in self._entries.items()
+                if cached_url == prefix or cached_url.startswith((prefix + '/', prefix + '?'))]
+            for key in stale:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Empties the cache, e.g. after canvas has changed content on its own, like during a migration
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns:
+            How many reads were served from memory, and how many cached reads writes dropped
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces identical GETs that are in flight at the same time, so only one goes out
+    and everyone waiting on it gets its response
+    """
+
+    _shared: 'SingleFlight | None' = None
+    _registry_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        """
+        How many requests were answered by one already in flight instead of going out themselves
+        """
+        self._calls: dict[str, concurrent.futures.Future] = {}
+        self._tasks: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'SingleFlight':
+        """
+        Gets the instance every link uses unless given its own, so threads using different links still coalesce
+        """
+        with cls._registry_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Calls func, unless a call for the same key is already in flight, in which case waits for its result
+        Args:
+            key: identifies the request
+            func: makes the request
+
+        Returns:
+            The result of the call for this key
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = concurrent.futures.Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+
+        try:
+            result = func()
+        except BaseException as error:
+            with self._lock:
+                del self._calls[key]
+            call.set_exception(error)
+            raise
+        with self._lock:
+            del self._calls[key]
+        call.set_result(result)
+        return result
+
+    async def do_async(self, key: str, func: Callable[[], Awaitable]) -> Any:
+        """
+        Awaits func, unless a call for the same key is already in flight, in which case awaits that one.
+        A caller being cancelled doesn't cancel the call for everyone else.
+        Args:
+            key: identifies the request
+            func: makes the request
+
+        Returns:
+            The result of the call for this key
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+
+class IdentityMap:
+    """
+    Keeps one live wrapper per canvas object, keyed by (class, id), so every lookup of the same course or page
+    gets the same object and its cached properties. Fresh data is merged into the object already held.
+    Objects are held weakly: once nothing else references one, the next lookup makes a new one.
+    """
+
+    def __init__(self) -> None:
+        self.merged = 0
+        """
+        How many lookups were merged into an object that already existed
+        """
+        self._objects: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, cls: type, id_) -> Any:
+        """
+        Returns:
+            The live object of type cls with the id, if there is one
+        """
+        with self._lock:
+            return self._objects.get((cls, id_))
+
+    def merge(self, cls: type, data: dict, create: Callable[[], Any]) -> Any:
+        """
+        Merges data into the live object it describes, or creates and holds one
+        Args:
+            cls: the class of the object, whose _id_property identifies it in data
+            data: the canvas data just fetched
+            create: makes a new object from data, if there isn't one yet
+
+        Returns:
+            The live object
+        """
+        id_ = data.get(cls._id_property) if isinstance(data, dict) else None
+        if id_ is None:
+            return create()
+        with self._lock:
+            existing = self._objects.get((cls, id_))
+            if existing is None:
+                existing = self._objects[(cls, id_)] = create()
+                return existing
+            self.merged += 1
+        existing._merge(data)
+        return existing
+
+    def rekey(self, cls: type, old_id, new_id) -> None:
+        """
+        Moves the live object held for old_id to new_id, for objects canvas gives a new id, like a reset course
+        """
+        with self._lock:
+            existing = self._objects.pop((cls, old_id), None)
+            if existing is not None:
+                self._objects[(cls, new_id)] = existing
+
+    def clear(self) -> None:
+        with self._lock:
+            self._objects.clear()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+
+class RequestMetrics:
+    """
+    Counts what each endpoint costs us: calls, status codes, latency, bytes and retries.
+    Endpoints are grouped by template, e.g. courses/{id}/pages/{url}, so N+1 patterns stand out.
+    """
+
+    _shared: 'RequestMetrics | None' = None
+    _registry_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._endpoints: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'RequestMetrics':
+        """
+        Gets the metrics every link records to unless given its own
+        """
+        with cls._registry_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def template(url: str) -> str:
+        """
+        Args:
+            url: a full url
+
+        Returns:
+            The url's path past the api base, with ids and page urls replaced by placeholders
+        """
+        path = re.sub('/+', '/', urllib.parse.urlparse(url).path)
+        path = re.sub(r'^.*?/api/v1/', '', path).strip('/')
+        segments = path.split('/')
+        for i, segment in enumerate(segments):
+            if re.fullmatch(r'\d+|sis_\w+:.+|self', segment):
+                segments[i] = '{id}'
+            elif i > 0 and segments[i - 1] == 'pages' and segment != 'front_page':
+                segments[i] = '{url}'
+        return '/'.join(segments)
+
+    @staticmethod
+    def wire_size(response: requests.Response) -> int:
+        """
+        The size the body was sent at, compressed if it was, falling back to its decoded size
+        """
+        length = response.headers.get('Content-Length')
+        return int(length) if length and length.isdigit() else len(response.content)
+
+    def _endpoint(self, method: str, url: str) -> dict:
+        key = f'{method.upper()} {self.template(url)}'
+        if key not in self._endpoints:
+            self._endpoints[key] = {
+                'calls': 0,
+                'cache_hits': 0,
+                'statuses': collections.Counter(),
+                'latencies': [],
+                'bytes': 0,
+                'retries': 0,
+                'elided': 0,
+            }
+        return self._endpoints[key]
+
+    def record(
+            self,
+            method: str,
+            url: str,
+            response: requests.Response | None,
+            elapsed: float,
+            retries: int) -> None:
+        """
+        Records a request that went out to canvas
+        Args:
+            method: the http method
+            url: the full url
+            response: the final response, or None if the request failed without one
+            elapsed: the seconds spent on the request, including retries
+            retries: how many times the request was retried
+        """
+        with self._lock:
+            endpoint = self._endpoint(method, url)
+            endpoint['calls'] += 1
+            endpoint['statuses'][response.status_code if response is not None else 'error'] += 1
+            endpoint['latencies'].append(elapsed)
+            endpoint['bytes'] += self.wire_size(response) if response is not None else 0
+            endpoint['retries'] += retries
+
+    def record_hit(self, method: str, url: str) -> None:
+        """
+        Records a request that was answered from memory without going out
+        """
+        with self._lock:
+            self._endpoint(method, url)['cache_hits'] += 1
+
+    def record_elided(self, method: str, url: str) -> None:
+        """
+        Records a write that was skipped because it wouldn't have changed anything in canvas
+        """
+        with self._lock:
+            self._endpoint(method, url)['elided'] += 1
+
+    @property
+    def writes_avoided(self) -> int:
+        """
+        How many writes were skipped as no-ops
+        """
+        with self._lock:
+            return sum(endpoint['elided'] for endpoint in self._endpoints.values())
+
+    @staticmethod
+    def _percentile(values: list[float], percent: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+    def summary(self) -> list[dict]:
+        """
+        Returns:
+            One row per endpoint template, most total time first
+        """
+        out = []
+        with self._lock:
+            for key, endpoint in self._endpoints.items():
+                latencies = endpoint['latencies'] or [0.0]
+                out.append({
+                    'endpoint': key,
+                    'calls': endpoint['calls'],
+                    'cache_hits': endpoint['cache_hits'],
+                    'statuses': {str(status): count for status, count in endpoint['statuses'].items()},
+                    'p50': round(self._percentile(latencies, 50), 3),
+                    'p90': round(self._percentile(latencies, 90), 3),
+                    'p99': round(self._percentile(latencies, 99), 3),
+                    'total_time': round(sum(latencies), 3),
+                    'bytes': endpoint['bytes'],
+                    'retries': endpoint['retries'],
+                    'elided': endpoint['elided'],
+                })
+        out.sort(key=lambda row: row['total_time'], reverse=True)
+        return out
+
+    def report(self, path: str = None, extra: dict = None) -> list[dict]:
+        """
+        Prints the summary as a table, and writes it to a json file if given one
+        Args:
+            path: a json file to write the summary to
+            extra: any run wide stats to print and write alongside the summary
+
+        Returns:
+            The summary
+        """
+        rows = self.summary()
+        print(f"{'endpoint':<60} {'calls':>6} {'hits':>5} {'p50':>7} {'p90':>7} {'p99':>7} "
+              f"{'total':>8} {'KiB':>8} {'retry':>5} {'skip':>5}  statuses")
+        for row in rows:
+            statuses = ' '.join(f'{status}:{count}' for status, count in row['statuses'].items())
+            print(f"{row['endpoint'][:60]:<60} {row['calls']:>6} {row['cache_hits']:>5} {row['p50']:>7.3f} "
+                  f"{row['p90']:>7.3f} {row['p99']:>7.3f} {row['total_time']:>8.2f} {row['bytes'] / 1024:>8.1f} "
+                  f"{row['retries']:>5} {row['elided']:>5}  {statuses}")
+        for name, stats in (extra or {}).items():
+            print(f'{name}: {stats}')
+
+        if path:
+            with open(path, 'w') as file:
+                json.dump({'endpoints': rows, **(extra or {})}, file, indent=2)
+        return rows
+
+    def reset(self) -> None:
+        """
+        Forgets everything recorded so far
+        """
+        with self._lock:
+            self._endpoints.clear()
+
+
+class Cassette:
+    """
+    Records the http traffic of a run to a file, or replays a recorded run without touching the network.
+    Sits under every requests session, so it captures both CanvasApiLink traffic and bare requests calls,
+    and under AsyncCanvasApiLink. Request headers aren't recorded, so tokens never end up in cassettes.
+    Identical requests are replayed in the order they were recorded; once those run out the last one repeats.
+    Links don't revalidate against their on-disk HttpCache while a cassette is in use, so replays don't depend on it.
+    """
+
+    active: 'Cassette | None' = None
+    """
+    The cassette currently in use, if any
+    """
+
+    RECORD = 'record'
+    REPLAY = 'replay'
+
+    def __init__(self, path: str, mode: str = REPLAY, latency_scale: float = 0.0) -> None:
+        """
+        Args:
+            path: the cassette file. Gzipped if it ends in .gz
+            mode: Cassette.RECORD to capture traffic, or Cassette.REPLAY to serve it
+            latency_scale: when replaying, sleep this many times each response's recorded latency
+        """
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(f'Unknown cassette mode {mode}')
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.interactions: dict[str, list[dict]] = {}
+        self._positions: collections.Counter = collections.Counter()
+        self._lock = threading.Lock()
+        self._send = None
+        if mode == self.REPLAY:
+            self.load()
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Puts the cassette under every requests session
+        """
+        if Cassette.active is not None:
+            raise RuntimeError('Another cassette is already in use')
+        Cassette.active = self
+        self._send = requests.adapters.HTTPAdapter.send
+        cassette = self
+
+        def send(adapter, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+            return cassette._play(adapter, request, **kwargs)
+
+        requests.adapters.HTTPAdapter.send = send
+
+    def stop(self) -> None:
+        """
+        Takes the cassette back out, saving what was recorded
+        """
+        if Cassette.active is not self:
+            return
+        requests.adapters.HTTPAdapter.send = self._send
+        Cassette.active = None
+        if self.mode == self.RECORD:
+            self.save()
+
+    @staticmethod
+    def key(method: str, url: str, body: bytes | str | None = None) -> str:
+        """
+        Identifies a request by its method, url with sorted query params, and body
+        """
+        parsed = urllib.parse.urlparse(url)
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)))
+        if isinstance(body, str):
+            body = body.encode()
+        digest = hashlib.sha256(body).hexdigest()[:16] if body else ''
+        return f'{method.upper()} {parsed._replace(query=query).geturl()} {digest}'.strip()
+
+    @staticmethod
+    def prepare(method: str, url: str, params=None, data=None) -> requests.PreparedRequest:
+        """
+        Encodes a request the way requests would, so async requests are keyed the same as sync ones
+        """
+        return requests.Request(method, url, params=params, data=data).prepare()
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float) -> None:
+        """
+        Adds a response to the cassette
+        Args:
+            request: the request that was sent
+            response: the response it got
+            elapsed: how many seconds the response took
+        """
+        try:
+            body, encoding = response.content.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(response.content).decode(), 'base64'
+        interaction = {
+            'status': response.status_code,
+            'reason': response.reason,
+            'url': response.url,
+            'headers': {
+                key: value for key, value in response.headers.items()
+                if key.lower() not in ('set-cookie', 'content-encoding', 'content-length', 'transfer-encoding')},
+            'body': body,
+            'encoding': encoding,
+            'elapsed': round(elapsed, 4),
+        }
+        with self._lock:
+            self.interactions.setdefault(self.key(request.method, request.url, request.body), []).append(interaction)
+
+    def find(self, request: requests.PreparedRequest) -> tuple[requests.Response, float]:
+        """
+        Args:
+            request: the request to replay
+
+        Returns:
+            The recorded response and its recorded latency
+        """
+        key = self.key(request.method, request.url, request.body)
+        with self._lock:
+            recorded = self.interactions.get(key)
+            if not recorded:
+                raise KeyError(f'No recorded response for {key}')
+            interaction = recorded[min(self._positions[key], len(recorded) - 1)]
+            self._positions[key] += 1
+        body = interaction['body'].encode() if interaction['encoding'] == 'utf-8' \
+            else base64.b64decode(interaction['body'])
+        response = _build_response(
+            interaction['status'], interaction['headers'], body, interaction['url'], reason=interaction['reason'])
+        response.request = request
+        return response, interaction['elapsed'] * self.latency_scale
+
+    def _play(self, adapter: requests.adapters.HTTPAdapter, request: requests.PreparedRequest, **kwargs):
+        if self.mode == self.REPLAY:
+            response, delay = self.find(request)
+            if delay:
+                time.sleep(delay)
+            response.connection = adapter
+            return response
+
+        started = time.monotonic()
+        response = self._send(adapter, request, **kwargs)
+        self.record(request, response, time.monotonic() - started)
+        return response
+
+    def load(self) -> None:
+        """
+        Reads recorded interactions from the cassette file
+        """
+        opener = gzip.open if self.path.endswith('.gz') else open
+        with opener(self.path, 'rt', encoding='utf-8') as file:
+            self.interactions = json.load(file)
+        self._positions.clear()
+
+    def save(self) -> None:
+        """
+        Writes recorded interactions to the cassette file
+        """
+        opener = gzip.open if self.path.endswith('.gz') else open
+        with opener(self.path, 'wt', encoding='utf-8') as file:
+            json.dump(self.interactions, file, separators=(',', ':'))
+
+
+def use_cassette(path: str, mode: str = Cassette.REPLAY, latency_scale: float = 0.0) -> Cassette:
+    """
+    Starts recording or replaying a run, e.g. from the "cassette" entry of the constants file.
+    A recording is saved when the program exits.
+    Args:
+        path: the cassette file
+        mode: 'record' or 'replay'
+        latency_scale: when replaying, sleep this many times each response's recorded latency
+
+    Returns:
+        The cassette in use
+    """
+    if Cassette.active is not None:
+        return Cassette.active
+    cassette = Cassette(path, mode, latency_scale)
+    cassette.start()
+    atexit.register(cassette.stop)
+    return cassette
+
+
+class CanvasApiLink:
+    """
+    This class handles calls to the canvas api
+    """
+    def __init__(
+            self,
+            headers: dict = None,
+            api_url: str = None,
+            account_id: int = None,
+            pool_size: int = None,
+            session: requests.Session = None,
+            governor: RateLimitGovernor = None,
+            retry_policy: RetryPolicy = None,
+            http_cache: HttpCache | bool = None,
+            response_cache: ResponseCache | bool = None,
+            single_flight: SingleFlight = None,
+            metrics: RequestMetrics = None,
+            identity_map: 'IdentityMap' = None
+    ) -> None:
+        """
+
+        Args:
+            headers: The headers to use for requests when not otherwise specified
+            api_url: The api url to use for requests
+            account_id: The account id to use. Not currently used.
+            pool_size: The number of keep-alive connections to hold open per host
+            session: An existing session to share a connection pool with. A new one is made if not provided.
+            governor: The rate limit governor to send requests through.
+                Defaults to the one shared by all links using the same token and host.
+            retry_policy: The policy for retrying throttled and transiently failing requests
+            http_cache: The on-disk cache to revalidate GETs against. Defaults to the one set up in the constants file;
+                False turns caching off for this link.
+            response_cache: The in-memory cache to serve repeated GETs from. Defaults to the one all links share;
+                False turns it off for this link.
+            single_flight: Coalesces identical in-flight GETs. Defaults to the one all links share.
+            metrics: Where to record what each request cost. Defaults to the metrics all links share.
+            identity_map: Where canvas objects made through this link are kept, one per (class, id).
+                Defaults to a new one for this link.
+        """
+
+        self.account_id = account_id if account_id else ACCOUNT_ID
+        """
+        The canvas account to use when making requests to the canvas api
+        """
+
+        self.headers = headers if headers else HEADERS
+        """
+        the default headers to send to the canvas api when making requests
+        """
+
+        self.api_url = api_url if api_url else API_URL
+        """
+        The canvas api base url
+        """
+
+        self.pool_size = pool_size if pool_size else DEFAULT_POOL_SIZE
+        """
+        The maximum number of pooled connections kept alive per host
+        """
+
+        self.session: requests.Session = session if session is not None else self.new_session(self.pool_size)
+        """
+        The pooled, keep-alive session all requests through this link are made with.
+        Shared by every canvas object created from this link.
+        """
+
+        self.governor: RateLimitGovernor = governor if governor is not None else (
+            RateLimitGovernor.for_link(self.headers, self.api_url))
+        """
+        Limits how many requests are in flight so we stay under canvas' rate limit
+        """
+
+        self.retry_policy: RetryPolicy = retry_policy if retry_policy is not None else RetryPolicy()
+        """
+        Retries idempotent requests that were throttled or failed transiently
+        """
+
+        self.http_cache: HttpCache | None = (
+            get_http_cache() if http_cache is None else http_cache if http_cache else None)
+        """
+        Stores GET responses on disk and revalidates them, so unchanged content isn't downloaded again
+        """
+
+        self.response_cache: ResponseCache | None = (
+            ResponseCache.shared() if response_cache is None else response_cache if response_cache else None)
+        """
+        Serves repeated GETs within a run from memory. Writes through this link invalidate it.
+        """
+
+        self.single_flight: SingleFlight = single_flight if single_flight is not None else SingleFlight.shared()
+        """
+        Makes identical GETs in flight at the same time share one request
+        """
+
+        self.metrics: RequestMetrics = metrics if metrics is not None else RequestMetrics.shared()
+        """
+        Records calls, statuses, latency, bytes and retries per endpoint
+        """
+
+        self.identity_map: IdentityMap = identity_map if identity_map is not None else IdentityMap()
+        """
+        Hands out the same course, page or assignment object for the same canvas id
+        """
+
+        self.writes_sent = 0
+        """
+        How many writes (anything but a GET) this link has sent, so data derived from earlier reads
+        can tell whether it may be stale
+        """
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @staticmethod
+    def new_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+        """
+        Creates a session that keeps up to pool_size connections per host alive between calls
+        Args:
+            pool_size: the number of connections to keep alive per host
+
+        Returns:
+            A new requests session
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Closes all pooled connections held by this link
+        """
+        self.session.close()
+
+    @property
+    def html_url(self):
+        """
+        Returns:
+        The full base html url of the canvas site
+        """
+        return re.sub('/api/v1', '', self.api_url)
+
+    def full_url(self, url: str) -> str:
+        """
+        Args:
+            url: a url path past the base API url, or a full url
+
+        Returns:
+            The full url, prefixed with the api url if it was not already absolute
+        """
+        if re.match(r'https?://', url):
+            return url
+        return f"{self.api_url}/{url}"
+
+    def graphql(self, query: str, variables: dict = None) -> dict:
+        """
+        Runs a query against canvas' graphql endpoint
+        Args:
+            query: the graphql query
+            variables: values for the query's variables
+
+        Returns:
+            The query's data
+
+        Raises:
+            GraphQLError: if canvas reports errors
+        """
+        url = f'{self.html_url}/api/graphql'
+        print('calling ' + url)
+        # queries are POSTed but only read, so they're safe to retry and don't invalidate cached reads
+        response = self._send('POST', url, self.headers, True, json={'query': query, 'variables': variables or {}})
+        assert response.ok, response.text
+        out = decode_json(response)
+        if not isinstance(out, dict) or out.get('errors') or 'data' not in out:
+            errors = out.get('errors') if isinstance(out, dict) else response.text
+            raise GraphQLError(errors)
+        return out['data']
+
+    @property
+    def retry_stats(self) -> dict:
+        """
+        Returns:
+            How many retries this link has made and how long they took
+        """
+        return self.retry_policy.stats
+
+    def request(
+            self,
+            method: str,
+            url: str,
+            headers: dict = None,
+            retry: bool = None,
+            cache: bool = True,
+            **kwargs) -> requests.Response:
+        """
+        Sends a request through this link's session and rate limit governor,
+        retrying it if it is safe to and it was throttled or failed transiently
+        Args:
+            method: the http method, e.g. 'GET'
+            url: a url path past the base API url, or a full url
+            headers: the headers to send. Defaults to this link's headers
+            retry: True to retry even if the method is not idempotent, False to never retry
+            cache: False to skip the in-memory cache, e.g. when polling for a change
+            **kwargs: any other args to pass to requests
+
+        Returns:
+            The raw response
+        """
+        headers = headers if headers is not None else self.headers
+        url = self.full_url(url)
+        if method.upper() != 'GET':
+            self.writes_sent += 1
+            if self.response_cache is not None:
+                self.response_cache.invalidate(url)
+            response = self._send(method, url, headers, retry, **kwargs)
+            if self.response_cache is not None:
+                # drop anything read while the write was in flight
+                self.response_cache.invalidate(url)
+            return response
+
+        key = HttpCache.key(url, headers, kwargs.get('params'))
+        if cache and self.response_cache is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                self.metrics.record_hit('GET', url)
+                return cached
+        return self.single_flight.do(key, lambda: self._get(key, url, headers, retry, **kwargs))
+
+    def _get(self, key: str, url: str, headers: dict, retry: bool, **kwargs) -> requests.Response:
+        """
+        Sends a GET, revalidating against the on-disk cache and filling the in-memory one
+        """
+        # validators aren't part of a cassette's keys, so while one is in use a recorded 304 would be replayed
+        # against whatever this machine's cache holds
+        http_cache = self.http_cache if Cassette.active is None else None
+        if http_cache is None:
+            response = self._send('GET', url, headers, retry, **kwargs)
+        else:
+            response = self._send('GET', url, {**headers, **http_cache.validators(key)}, retry, **kwargs)
+            resolved = http_cache.resolve(key, response)
+            if resolved is None:
+                # the stored body went between asking and the 304, so ask for the whole thing
+                response = self._send('GET', url, headers, retry, **kwargs)
+                resolved = http_cache.resolve(key, response) or response
+            response = resolved
+        if self.response_cache is not None:
+            self.response_cache.put(key, url, response)
+        return response
+
+    def _send(self, method: str, url: str, headers: dict, retry: bool, **kwargs) -> requests.Response:
+        """
+        Sends a request through the governor, retrying it as the retry policy allows
+        """
+        attempt = 0
+        first_started = time.monotonic()
+        while True:
+            started = time.monotonic()
+            response = None
+            try:
+                self.governor.acquire()
+                try:
+                    response = self.session.request(method, url, headers=headers, **kwargs)
+                finally:
+                    self.governor.release(response)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if not self.retry_policy.should_retry(method, attempt, error=error, force=retry):
+                    self.metrics.record(method, url, None, time.monotonic() - first_started, attempt)
+                    raise
+            else:
+                if not self.retry_policy.should_retry(method, attempt, response=response, force=retry):
+                    self.metrics.record(method, url, response, time.monotonic() - first_started, attempt)
+                    return response
+
+            delay = self.retry_policy.backoff(attempt, response)
+            print(f'retrying {method} {url} in {delay:.2f}s'
+                  + (f' after {response.status_code}' if response is not None else ''))
+            time.sleep(delay)
+            self.retry_policy.record(attempt, time.monotonic() - started)
+            attempt += 1
+
+    def _query(self, method: str, url: str, **args):
+        """
+        Recurring code for all requests wrapper functions
+        Args:
+            method: the http method to use for the call, e.g. 'GET', 'POST', 'PUT', 'DELETE'
+            url: The url PAST the base API url
+            params: any params to pass to the call
+            **args: any additional params to pass to the call
+        Returns:
+            The json decoded data from the response
+
+        """
+        url = self.full_url(url)
+        print('calling ' + url)
+        response = self.request(method, url, **args)
+        assert response.ok, response.text
+        return decode_json(response)
+
+    def get(self, url: str, params: dict = None, **args):
+        """
+        Performs a canvas api call
+        Args:
+            url: any url to use after the canvas api base
+            params: any params to pass to the requests.get call
+            **args: and other args to pass to requests.get
+        Returns:
+            A dict or list holding the response from the canvas api
+
+        """
+        return self._query('GET', url=url, params=params, **args)
+
+    def delete(self, url: str, params: dict = None, **args):
+        return self._query('DELETE', url=url, params=params, **args)
+
+    def put(self, url: str, params: dict = None, data=None, **kwargs):
+        """
+        Performs a canvas api put call
+        Args:
+            data: data to put
+            url: any url to use after the canvas api base
+            params: any params to pass to the requests.get call
+            **kwargs: and other args to pass to requests.get
+        Returns:
+            A dict or list holding the response from the canvas api
+
+        """
+        return self._query('PUT', url=url, params=params, data=data, **kwargs)
+
+    def post(self, url, params: dict = None, data=None, **kwargs):
+        return self._query('POST', url=url, params=params, data=data, **kwargs)
+
+    def patch(self, url, params: dict = None, data=None, **kwargs):
+        return self._query('PATCH', url=url, params=params, data=data, **kwargs)
+
+    def get_paged_data(
+            self, url: str, headers: dict = None, params: dict = None, cache: bool = True) -> list | None:
+        """Summary
+            returns a list of data from a get request, going through
+            multiple pages of data requests as necessary
+
+        Args:
+            params: Any additional parameters to pass to the query
+            url: The url path to query, not including the api_url. Full urls are also accepted.
+            headers: Headers for the request
+            cache: False to skip the in-memory cache
+
+        Returns:
+            list: The paged data
+        """
+        pages = self._iter_pages(url, headers=headers, params=params, cache=cache)
+        out = next(pages, None)
+        # a failed first request, or a single object rather than a listing
+        if not isinstance(out, list):
+            return out
+        for page in pages:
+            out.extend(page)
+
+        return out
+
+    def iter_paged(self, url: str, headers: dict = None, params: dict = None, cache: bool = True) -> Iterator:
+        """
+        Yields the items of a paged listing as each page arrives, so callers can start work
+        on the first page while later pages are still being fetched
+
+        Args:
+            url: The url path to query, not including the api_url. Full urls are also accepted.
+            headers: Headers for the request
+            params: Any additional parameters to pass to the query
+            cache: False to skip the in-memory cache
+
+        Returns:
+            A generator of the items in the listing
+        """
+        for page in self._iter_pages(url, headers=headers, params=params, cache=cache):
+            yield from page
+
+    def _iter_pages(
+            self,
+            url: str,
+            headers: dict = None,
+            params: dict = None,
+            cache: bool = True,
+            strict: bool = False) -> Iterator[list]:
+        """
+        Yields each page of a paged listing in order. Numbered pages are prefetched a few at a time
+        ahead of the page being consumed; bookmark cursors are followed one page at a time.
+        Stops at the first page that fails, or raises its HTTPError if strict, for callers that must see every page.
+        """
+        headers = headers if headers else self.headers
+        response = self.request('GET', url, headers=headers, params=params, cache=cache)
+        if not response.ok:
+            if strict:
+                response.raise_for_status()
+            return
+        yield json_loads(response.content)
+
+        # next links already carry the original query, so params aren't passed again past the first page
+        page_urls = _numbered_page_urls(response)
+        if page_urls:
+            window = self.governor.max_concurrency
+            page_urls = iter(page_urls)
+            pending = collections.deque()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=window) as executor:
+                try:
+                    for page_url in itertools.islice(page_urls, window):
+                        pending.append(executor.submit(self.request, 'GET', page_url, headers=headers, cache=cache))
+                    while pending:
+                        response = pending.popleft().result()
+                        if not response.ok:
+                            if strict:
+                                response.raise_for_status()
+                            return
+                        page_url = next(page_urls, None)
+                        if page_url is not None:
+                            pending.append(executor.submit(self.request, 'GET', page_url, headers=headers, cache=cache))
+                        yield json_loads(response.content)
+                finally:
+                    # the caller may stop early; don't fetch pages nobody will read
+                    for future in pending:
+                        future.cancel()
+            return
+
+        while 'next' in response.links:
+            response = self.request('GET', response.links['next']['url'], headers=headers, cache=cache)
+            if not response.ok:
+                if strict:
+                    response.raise_for_status()
+                return
+            yield json_loads(response.content)
+
+
+_default_api_link: CanvasApiLink | None = None
+
+
+def get_default_api_link() -> CanvasApiLink:
+    """
+    Gets the api link module level helpers use when one isn't passed in, creating it on first use.
+    Shares its connection pool with every object and helper that doesn't bring their own link.
+    Returns:
+        The default CanvasApiLink
+    """
+    global _default_api_link
+    if _default_api_link is None:
+        _default_api_link = CanvasApiLink()
+    return _default_api_link
+
+
+def reset_default_api_link() -> None:
+    """
+    Closes and discards the default api link, e.g. after constants have been reloaded
+    """
+    global _default_api_link
+    if _default_api_link is not None:
+        _default_api_link.close()
+    _default_api_link = None
+
+
+def report_metrics(path: str = None, api_link: CanvasApiLink = None) -> list[dict]:
+    """
+    Prints what each endpoint cost over the run, along with cache and retry stats, e.g. at the end of a workflow.
+    Args:
+        path: a json file to write the report to. Defaults to "metricsFile" in the constants file, if set.
+        api_link: the link whose metrics to report. Defaults to the default link
+
+    Returns:
+        The per endpoint summary
+    """
+    api_link = api_link if api_link is not None else get_default_api_link()
+    if path is None:
+        path = globals().get('CONSTANTS', {}).get('metricsFile')
+    extra = {
+        'retries': api_link.retry_stats,
+        'coalesced': api_link.single_flight.coalesced,
+        'writes_avoided': api_link.metrics.writes_avoided,
+    }
+    if api_link.response_cache is not None:
+        extra['response_cache'] = api_link.response_cache.stats
+    if api_link.http_cache is not None:
+        extra['http_cache'] = api_link.http_cache.stats
+    return api_link.metrics.report(path, extra=extra)
+
+
+def _form_items(values: dict | list | None) -> list[tuple[str, str]] | None:
+    """
+    Flattens a params or form dict the way requests would encode it, repeating keys holding lists,
+    since aiohttp only accepts flat string pairs
+    Args:
+        values: a dict of params or form data
+
+    Returns:
+        A list of key, value pairs
+    """
+    if values is None or not isinstance(values, dict):
+        return values
+    out = []
+    for key, value in values.items():
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            if item is not None:
+                out.append((key, str(item)))
+    return out
+
+
+class AsyncCanvasApiLink:
+    """
+    An asyncio twin of CanvasApiLink. Holds one long-lived aiohttp session, so a single event loop
+    can fan hundreds of requests out over a few pooled connections.
+
+    Requests share the rate limit governor and retry policy of the CanvasApiLink it wraps, and
+    objects fetched through it are given that link for any synchronous calls made on them later.
+    """
+
+    def __init__(self, link: CanvasApiLink = None, max_concurrency: int = None) -> None:
+        """
+        Args:
+            link: the synchronous link to take the token, urls, governor and retry policy from
+            max_concurrency: the most requests waiting on canvas at once. Further requests queue.
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for async operations")
+
+        self.link: CanvasApiLink = link if link is not None else get_default_api_link()
+        """
+        The synchronous link this link mirrors
+        """
+
+        self.max_concurrency = max_concurrency if max_concurrency else DEFAULT_ASYNC_CONCURRENCY
+        self.single_flight = SingleFlight()
+        """
+        Makes identical GETs awaited at the same time share one request. Tasks belong to one event loop,
+        so this isn't shared with the synchronous link.
+        """
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore: asyncio.BoundedSemaphore | None = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    @property
+    def headers(self) -> dict:
+        return self.link.headers
+
+    @property
+    def api_url(self) -> str:
+        return self.link.api_url
+
+    @property
+    def account_id(self) -> int:
+        return self.link.account_id
+
+    @property
+    def session(self) -> 'aiohttp.ClientSession':
+        """
+        The shared session, opened on first use since it has to be made inside the running event loop
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.BoundedSemaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Closes the shared session and its connections
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            headers: dict = None,
+            retry: bool = None,
+            params: dict = None,
+            data: dict = None,
+            cache: bool = True,
+            **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session, the rate limit governor and the retry policy
+        Args:
+            method: the http method, e.g. 'GET'
+            url: a url path past the base API url, or a full url
+            headers: the headers to send. Defaults to the link's headers
+            retry: True to retry even if the method is not idempotent, False to never retry
+            cache: False to skip the in-memory cache, e.g. when polling for a change
+            params: any query params, encoded as requests would
+            data: any form data, encoded as requests would
+            **kwargs: any other args to pass to aiohttp
+
+        Returns:
+            The response, read in full and wrapped as a requests.Response
+        """
+        headers = headers if headers is not None else self.headers
+        url = self.link.full_url(url)
+        response_cache = self.link.response_cache
+        if method.upper() != 'GET':
+            if response_cache is not None:
+                response_cache.invalidate(url)
+            response = await self._send(method, url, headers, retry, params=params, data=data, **kwargs)
+            if response_cache is not None:
+                response_cache.invalidate(url)
+            return response
+
+        key = HttpCache.key(url, headers, params)
+        if cache and response_cache is not None:
+            cached = response_cache.get(key)
+            if cached is not None:
+                self.link.metrics.record_hit('GET', url)
+                return cached
+        return await self.single_flight.do_async(
+            key, lambda: self._get(key, url, headers, retry, params=params, data=data, **kwargs))
+
+    async def _get(self, key: str, url: str, headers: dict, retry: bool, **kwargs) -> requests.Response:
+        """
+        Sends a GET, revalidating against the on-disk cache and filling the in-memory one
+        """
+        # see CanvasApiLink._get
+        http_cache = self.link.http_cache if Cassette.active is None else None
+        if http_cache is None:
+            response = await self._send('GET', url, headers, retry, **kwargs)
+        else:
+            response = await self._send('GET', url, {**headers, **http_cache.validators(key)}, retry, **kwargs)
+            resolved = http_cache.resolve(key, response)
+            if resolved is None:
+                # the stored body went between asking and the 304, so ask for the whole thing
+                response = await self._send('GET', url, headers, retry, **kwargs)
+                resolved = http_cache.resolve(key, response) or response
+            response = resolved
+        if self.link.response_cache is not None:
+            self.link.response_cache.put(key, url, response)
+        return response
+
+    async def _send(
+            self,
+            method: str,
+            url: str,
+            headers: dict,
+            retry: bool,
+            params: dict = None,
+            data: dict = None,
+            **kwargs) -> requests.Response:
+        """
+        Sends a request through the semaphore and the governor, retrying it as the retry policy allows
+        """
+        session = self.session
+        policy = self.link.retry_policy
+        metrics = self.link.metrics
+        attempt = 0
+        first_started = time.monotonic()
+        while True:
+            started = time.monotonic()
+            response = None
+            try:
+                async with self._semaphore:
+                    await self.link.governor.acquire_async()
+                    try:
+                        if Cassette.active is not None:
+                            response = await self._play(Cassette.active, method, url, headers, params, data, **kwargs)
+                        else:
+                            async with session.request(
+                                    method, url, headers=headers, params=_form_items(params),
+                                    data=_form_items(data), **kwargs) as client_response:
+                                response = self._to_response(client_response, await client_response.read())
+                    finally:
+                        self.link.governor.release(response)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                if not policy.should_retry(method, attempt, error=requests.ConnectionError(error), force=retry):
+                    metrics.record(method, url, None, time.monotonic() - first_started, attempt)
+                    raise
+            else:
+                if not policy.should_retry(method, attempt, response=response, force=retry):
+                    metrics.record(method, url, response, time.monotonic() - first_started, attempt)
+                    return response
+
+            delay = policy.backoff(attempt, response)
+            await asyncio.sleep(delay)
+            policy.record(attempt, time.monotonic() - started)
+            attempt += 1
+
+    async def _play(
+            self,
+            cassette: Cassette,
+            method: str,
+            url: str,
+            headers: dict,
+            params: dict = None,
+            data: dict = None,
+            **kwargs) -> requests.Response:
+        """
+        Replays a request from the cassette, or sends it and records it
+        """
+        request = cassette.prepare(method, url, params, data)
+        if cassette.mode == Cassette.REPLAY:
+            response, delay = cassette.find(request)
+            await asyncio.sleep(delay)
+            return response
+
+        started = time.monotonic()
+        async with self.session.request(
+                method, url, headers=headers, params=_form_items(params),
+                data=_form_items(data), **kwargs) as client_response:
+            response = self._to_response(client_response, await client_response.read())
+        cassette.record(request, response, time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def _to_response(client_response: 'aiohttp.ClientResponse', body: bytes) -> requests.Response:
+        return _build_response(
+            client_response.status, client_response.headers, body, str(client_response.url),
+            reason=client_response.reason, encoding=client_response.charset)
+
+    async def _query(self, method: str, url: str, **kwargs):
+        print('calling async ' + self.link.full_url(url))
+        response = await self.request(method, url, **kwargs)
+        assert response.ok, response.text
+        return decode_json(response)
+
+    async def get(self, url: str, params: dict = None, **kwargs):
+        return await self._query('GET', url, params=params, **kwargs)
+
+    async def delete(self, url: str, params: dict = None, **kwargs):
+        return await self._query('DELETE', url, params=params, **kwargs)
+
+    async def put(self, url: str, params: dict = None, data=None, **kwargs):
+        return await self._query('PUT', url, params=params, data=data, **kwargs)
+
+    async def post(self, url: str, params: dict = None, data=None, **kwargs):
+        return await self._query('POST', url, params=params, data=data, **kwargs)
+
+    async def patch(self, url: str, params: dict = None, data=None, **kwargs):
+        return await self._query('PATCH', url, params=params, data=data, **kwargs)
+
+    async def get_paged_data(self, url: str, headers: dict = None, params: dict = None) -> list | None:
+        """
+        Awaitable version of CanvasApiLink.get_paged_data
+        Args:
+            url: The url path to query, not including the api_url. Full urls are also accepted.
+            headers: Headers for the request
+            params: Any additional parameters to pass to the query
+
+        Returns:
+            list: The paged data
+        """
+        response = await self.request('GET', url, headers=headers, params=params)
+        if not response.ok:
+            return None
+        out = json_loads(response.content)
+
+        page_urls = _numbered_page_urls(response)
+        if page_urls:
+            responses = await asyncio.gather(*[self.request('GET', page_url, headers=headers) for page_url in page_urls])
+            for response in responses:
+                if not response.ok:
+                    break
+                out.extend(json_loads(response.content))
+            return out
+
+        while 'next' in response.links:
+            response = await self.request('GET', response.links['next']['url'], headers=headers)
+            if not response.ok:
+                break
+            out.extend(json_loads(response.content))
+
+        return out
+
+
+class BaseCanvasObject:
+    """
+    A base class for classes that talk to and hold data from canvas API
+    """
+
+    _id_property = 'id'
+    """
+    The field name of the id of the canvas object type
+    """
+
+    _name_property = None
+    """
+    The field name of the primary name of the canvas object type
+    """
+
+    _content_url_template = None
+    """
+    A templated url to get a single item
+    """
+
+    _all_content_url_template = None
+    """
+    A templated url to get all items
+    """
+
+    def __init__(self, data, headers=None, api_url=None, api_link=None, account_id=None, **kwargs):
+        """
+        Initializes the object
+        Args:
+            data: the canvas data this class is wrapping
+            headers: the headers to use, passed to the api_link
+            api_url: the api_url, passed to the api_link. CURRENTLY pulls from constant if not included
+            **kwargs: all other args passed directly to api_link constructor
+        """
+        self.account_id = account_id
+        """
+        The account ID that this object primarily lives in. Passed as a default to the api link.
+        """
+
+        self._canvas_data: dict = data if data is not None else {}
+        """
+        A dict holding the decoded json representation of the object in canvas
+        """
+
+        self.api_link: CanvasApiLink = api_link if api_link is not None else (
+            BaseCanvasObject.new_api_link(headers=headers, api_url=api_url, account_id=account_id))
+        """
+        The api link to Canvas that all canvas api calls are made through.
+        """
+
+    def __getitem__(self, item):
+        if item not in self._canvas_data:
+            return None
+        return self._canvas_data[item]
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+    @property
+    def content_url_path(self):
+        return self._content_url_template.format(content_id=self.id, account_id=self.account_id)
+
+    @property
+    def html_content_url(self):
+        url = self.api_link.api_url
+        if self.content_url_path:
+            url += self.content_url_path
+
+        return re.sub('api/v1', '', url)
+
+    @property
+    def api_content_url(self):
+        raise ValueError(f"property content_link is not defined for {type(self).__name__}")
+
+    @property
+    def json(self):
+        return json.dumps(self._canvas_data)
+
+    @staticmethod
+    def new_api_link(headers=None, api_url=None, account_id=None):
+        if headers is None and api_url is None and account_id is None:
+            return get_default_api_link()
+        # share the default connection pool even when the link settings differ
+        return CanvasApiLink(
+            headers=headers, api_url=api_url, account_id=account_id, session=get_default_api_link().session)
+
+    def _merge(self, data: dict) -> None:
+        """
+        Takes in freshly fetched data for this object, which another lookup found. See IdentityMap.
+        """
+        self._canvas_data.update(data)
+
+    @classmethod
+    def _live(cls, course: 'Course', data: dict, link: CanvasApiLink) -> Self:
+        """
+        Gets the one object link holds for data, with data merged in
+        """
+        return link.identity_map.merge(cls, data, lambda: cls(course, data, api_link=link))
+
+    @classmethod
+    def get_by_id(cls, course: 'Course', content_id: int, account_id=None, params: dict = None) -> Self:
+        return cls._live(course, cls._get_data_by_id(
+            course=course,
+            content_id=content_id,
+            account_id=account_id,
+            params=params,
+        ), course.api_link)
+
+    @classmethod
+    def _get_data_by_id(cls, course: 'Course', content_id: int, account_id=None, params: dict = None) -> dict:
+        link = course.api_link
+        return link.get(cls.get_url_path_from_ids(course_id=course.id, content_id=content_id, account_id=account_id), params=params)
+
+    @classmethod
+    def get_all(cls, course: 'Course' = None, params: dict = None) -> list[Self]:
+        link = course.api_link
+        data = link.get_paged_data(cls.get_all_url(course_id=course.id), params=params)
+        return [cls._live(course, item, link) for item in data]
+
+    @classmethod
+    def iter_all(cls, course: 'Course' = None, params: dict = None) -> Iterator[Self]:
+        """
+        Like get_all, but yields each item as its page arrives
+        Args:
+            course: the course the content lives in
+            params: any params to pass to the request
+        """
+        for item in course.api_link.iter_paged(cls.get_all_url(course_id=course.id), params=params):
+            yield cls._live(course, item, course.api_link)
+
+    @classmethod
+    async def get_by_id_async(
+            cls,
+            course: 'Course',
+            content_id: int,
+            link: AsyncCanvasApiLink,
+            params: dict = None) -> Self:
+        """
+        Awaitable version of get_by_id
+        Args:
+            course: the course the content lives in
+            content_id: the id of the content
+            link: the async link to fetch with
+            params: any params to pass to the request
+        """
+        data = await link.get(cls.get_url_path_from_ids(course_id=course.id, content_id=content_id), params=params)
+        return cls._live(course, data, link.link)
+
+    @classmethod
+    async def get_all_async(cls, course: 'Course', link: AsyncCanvasApiLink, params: dict = None) -> list[Self]:
+        """
+        Awaitable version of get_all
+        Args:
+            course: the course the content lives in
+            link: the async link to fetch with
+            params: any params to pass to the request
+        """
+        data = await link.get_paged_data(cls.get_all_url(course_id=course.id), params=params)
+        return [cls._live(course, item, link.link) for item in data]
+
+    @classmethod
+    def get_url_path_from_ids(cls, course_id: int, content_id: int, account_id: int = None):
+        return cls._content_url_template.format(course_id=course_id, content_id=content_id, account_id=account_id)
+
+    @classmethod
+    def get_all_url(cls, course_id: int, account_id=None):
+        return cls._all_content_url_template.format(course_id=course_id, account_id=account_id)
+
+    @property
+    def id(self) -> int:
+        return self._canvas_data[self._id_property]
+
+    @property
+    def name(self) -> str:
+        return self[self._name_property]
+
+    def _is_current(self, data: dict) -> bool:
+        """
+        Whether saving data would leave canvas as it is, going by the last known _canvas_data.
+        Form keys like wiki_page[body] are compared against the field named in the brackets.
+        """
+        for key, value in data.items():
+            match = re.fullmatch(r'\w+\[(\w+)]', key)
+            field = match.group(1) if match else key
+            if field not in self._canvas_data or self._canvas_data[field] != value:
+                return False
+        return True
+
+    def _elide_write(self, method: str = 'PUT') -> None:
+        """
+        Records a write to this object that was skipped as a no-op
+        """
+        self.api_link.metrics.record_elided(method, self.api_link.full_url(self.content_url_path))
+
+    def _save_data(self, data: dict) -> dict:
+        """
+        Saves data to canvas, unless it matches what canvas already holds.
+        Call before updating _canvas_data with the new values, or every save will look like a no-op.
+
+        Returns:
+            canvas' response, or the last known _canvas_data if the write was skipped
+        """
+        if self._is_current(data):
+            self._elide_write()
+            return self._canvas_data
+        return self.api_link.put(self.content_url_path, data=data)
+
+    def delete(self) -> dict:
         return self.api_link.delete(self.content_url_path)
 
 
@@ -735,6 +3096,8 @@ class BaseContentItem(BaseCanvasObject):
     _body_property = None
 
     def __init__(self, course: 'Course', data, **kwargs):
+        if course is not None and 'api_link' not in kwargs:
+            kwargs['api_link'] = course.api_link
         super().__init__(data, **kwargs)
         self._course = course
 
@@ -744,14 +3107,42 @@ class BaseContentItem(BaseCanvasObject):
         out = re.sub(r'</?script[^>]*>', '', out)
         return out
 
+    def __getitem__(self, item):
+        if item == self._body_property:
+            self.hydrate()
+        return super().__getitem__(item)
+
     @property
     def body(self) -> str | None:
         if self._body_property is None:
             return None
         else:
+            self.hydrate()
             return self.clear_added_content_tags(
                 self._canvas_data[self._body_property])
 
+    def _merge(self, data: dict) -> None:
+        # a listing stub of an item edited since its body was fetched makes that body stale
+        if self._body_property not in data and data.get('updated_at') != self._canvas_data.get('updated_at'):
+            self._canvas_data.pop(self._body_property, None)
+        super()._merge(data)
+
+    @property
+    def is_hydrated(self) -> bool:
+        """
+        False if this is a listing stub that hasn't fetched its body yet
+        """
+        return self._body_property is None or self._body_property in self._canvas_data
+
+    def hydrate(self) -> Self:
+        """
+        Fetches the full item, body included, if this is a listing stub. Called on first access to the body.
+        See the module level hydrate to fetch many at once.
+        """
+        if not self.is_hydrated:
+            self._canvas_data.update(self.api_link.get(self.content_url_path))
+        return self
+
     @property
     def content_url_path(self):
         return self._content_url_template.format(course_id=self.course.id, content_id=self.id)
@@ -763,19 +3154,37 @@ class BaseContentItem(BaseCanvasObject):
     def update_content(self, text: str = None, name: str = None):
         data = {}
         if text and self._body_property:
-            self._canvas_data[self._body_property] = text
             data[self._body_property] = text
 
         if name and self._name_property:
-            self._canvas_data[self._name_property] = name
-            data[self._name_property] = text
+            data[self._name_property] = name
 
-        return self._save_data(data)
+        result = self._save_data(data)
+        self._canvas_data.update(data)
+        return result
 
     def delete(self):
         return self.api_link.delete(self.content_url_path)
 
 
+def hydrate(items: Iterable[BaseContentItem]) -> list[BaseContentItem]:
+    """
+    Fetches the bodies of any listing stubs among items, several at a time
+    Args:
+        items: content items, e.g. from Course.get_pages
+
+    Returns:
+        The items, as a list
+    """
+    items = list(items)
+    stubs = [item for item in items if not item.is_hydrated]
+    if stubs:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=stubs[0].api_link.governor.max_concurrency) as executor:
+            # list() so errors are raised here
+            list(executor.map(BaseContentItem.hydrate, stubs))
+    return items
+
+
 class Discussion(BaseContentItem):
     _name_property = 'title'
     _body_property = 'message'
@@ -804,6 +3213,10 @@ class Quiz(BaseContentItem):
         return datetime.datetime.fromisoformat(self._canvas_data['due_at'])
 
     def set_due_at(self, due_at: datetime.datetime):
+        # canvas' Z suffixed times don't compare equal to isoformat's as strings
+        if self.due_at == due_at:
+            self._elide_write()
+            return
 
         self._save_data({
             'quiz[due_at]': due_at.isoformat()
@@ -841,69 +3254,633 @@ class Page(BaseContentItem):
         revision = revisions[steps_back]
         self.apply_revision(revision)
 
-    def reset_content(self, revision_id=1):
-        revisions = self.revisions
-        revision = next(filter(lambda a: a['revision_id'] == revision_id, revisions), None)
-        if revision is None:
-            raise ValueError(f'No revision found for {revision_id}')
-        self.apply_revision(revision)
+    def reset_content(self, revision_id=1):
+        revisions = self.revisions
+        revision = next(filter(lambda a: a['revision_id'] == revision_id, revisions), None)
+        if revision is None:
+            raise ValueError(f'No revision found for {revision_id}')
+        self.apply_revision(revision)
+
+    def apply_revision(self, revision):
+        revision_id = revision['revision_id']
+        result = self.api_link.post(f"{self.content_url_path}/revisions/{revision_id}", params={
+            'revision_id': revision_id
+        })
+        self._canvas_data[self._body_property] = result['body']
+        self._canvas_data[self._name_property] = result['title']
+
+    def update_content(self, text: str = None, name: str = None) -> dict:
+        data = {}
+        if text:
+            data['wiki_page[body]'] = text
+        if name:
+            data['title'] = name
+
+        result = self._save_data(data)
+        if text:
+            self._canvas_data[self._body_property] = text
+        if name:
+            self._canvas_data[self._name_property] = name
+        return result
+
+
+class Rubric(BaseContentItem):
+    _name_property = 'title'
+    _body_property = None
+    _content_url_template = "courses/{course_id}/rubrics/{content_id}"
+    _all_content_url_template = "courses/{course_id}/rubrics"
+
+    @property
+    def associations(self, reload: bool = False) -> list['RubricAssociation']:
+        if 'associations' in self._canvas_data and reload:
+            return self._body_property['associations']
+
+        data: dict = self._get_data_by_id(
+            course=self.course,
+            content_id=self.id,
+            params={'include': ['associations']}
+        )
+        associations: list[RubricAssociation] = [RubricAssociation(self.course, ra) for ra in data['associations']]
+        self._canvas_data['associations'] = associations
+        return associations
+
+
+class RubricAssociation(BaseContentItem):
+    _name_property = None
+    _content_url_template = "courses/{course_id}/rubric_associations/{content_id}"
+    _all_content_url_template = "courses/{course_id}/rubric_associations"
+
+    @property
+    def use_for_grading(self) -> bool:
+        return self._canvas_data['use_for_grading']
+
+    def set_use_for_grading(self, value):
+        result = self._save_data({
+            'rubric_association[use_for_grading]': value
+        })
+        self._canvas_data['use_for_grading'] = value
+        return result
+
+
+class CompactRecord:
+    """
+    A slotted record of just the fields of a canvas payload the code reads, for listings kept by the thousand,
+    like the module items of every course in a term. Reads like the dict it was made from.
+    The full payload is only kept when asked for with keep_raw.
+    """
+    __slots__ = ('_raw',)
+
+    FIELDS: tuple[str, ...] = ()
+    """
+    The fields kept. Subclasses slot exactly these.
+    """
+
+    def __init__(self, data: dict, keep_raw: bool = False):
+        for field in self.FIELDS:
+            setattr(self, field, data.get(field))
+        self._raw = data if keep_raw else None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self._raw is not None:
+            return self._raw[key]
+        raise KeyError(f'{type(self).__name__} only keeps {", ".join(self.FIELDS)}; load it with keep_raw for {key}')
+
+    def __contains__(self, key: str) -> bool:
+        if key in self.FIELDS:
+            return getattr(self, key) is not None
+        return self._raw is not None and key in self._raw
+
+    def get(self, key: str, default=None) -> Any:
+        return self[key] if key in self else default
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+    @property
+    def raw(self) -> dict:
+        """
+        The payload this was made from, if it was made with keep_raw
+        """
+        if self._raw is None:
+            raise ValueError(f'This {type(self).__name__} was made without keep_raw')
+        return self._raw
+
+    def to_dict(self) -> dict:
+        """
+        The raw payload if it was kept, otherwise the kept fields that have values
+        """
+        if self._raw is not None:
+            return self._raw
+        return {field: self[field] for field in self.FIELDS if field in self}
+
+
+class ModuleItem(CompactRecord):
+    __slots__ = FIELDS = ('id', 'module_id', 'position', 'type', 'title', 'content_id', 'url', 'page_url')
+
+
+class Module(CompactRecord):
+    __slots__ = FIELDS = ('id', 'name', 'position', 'items')
+
+    def __init__(self, data: dict, keep_raw: bool = False):
+        super().__init__(data, keep_raw)
+        if self.items is not None:
+            self.items = [ModuleItem(item, keep_raw) for item in self.items]
+
+    def to_dict(self) -> dict:
+        out = super().to_dict()
+        if self._raw is None and self.items is not None:
+            out['items'] = [item.to_dict() for item in self.items]
+        return out
+
+
+class CourseSummary(CompactRecord):
+    """
+    A course as listed in a search, for term wide scans that only need codes and ids before choosing
+    which courses to look at closely. See Course.get_summaries.
+    """
+    __slots__ = FIELDS = (
+        'id', 'name', 'course_code', 'sis_course_id', 'enrollment_term_id', 'account_id', 'blueprint', 'workflow_state')
+
+    @property
+    def base_code(self) -> str:
+        match = re.search(Course.CODE_REGEX, self.course_code or '')
+        return match.group(2) if match else ''
+
+    @property
+    def code_prefix(self) -> str:
+        match = re.search(Course.CODE_REGEX, self.course_code or '')
+        return match.group(1) if match else ''
+
+    def course(self, link: CanvasApiLink = None) -> 'Course':
+        """
+        The Course this summarizes, made from the kept fields without another request
+        """
+        link = link if link is not None else get_default_api_link()
+        return Course._live(self.to_dict(), link)
+
+
+class CourseStructureLoader:
+    """
+    Loads the structure of one or several courses through canvas' graphql endpoint: modules and their items,
+    assignments, discussions and rubric associations. All the courses are asked for in one query per page
+    of results, rather than in dozens of paged REST calls and a GET per rubric.
+    Results are reshaped the way the REST api returns them and preloaded into the courses, so get_module_outline,
+    get_assignments, get_discussions and get_rubric_associations answer from them. Modules only carry the fields
+    listed in get_module_outline, so get_modules still asks canvas for the full REST modules.
+    Assignments and discussions are loaded as listing stubs; their bodies are fetched on first use, or with hydrate.
+
+    Usage:
+        CourseStructureLoader(link).load([course, source_course])
+        modules = course.get_module_outline()
+    """
+
+    CONNECTIONS = {
+        'modules': 'Module',
+        'assignments': 'Assignment',
+        'discussions': 'Discussion',
+    }
+    """
+    The course connections loaded, and their node types
+    """
+
+    FRAGMENTS = {
+        'Module': """
+fragment ModuleFields on Module {
+  _id name position
+  moduleItems {
+    _id
+    content {
+      __typename
+      ... on Assignment { _id name }
+      ... on Discussion { _id title }
+      ... on Quiz { _id title }
+      ... on File { _id displayName }
+      ... on Page { _id title url }
+      ... on ExternalUrl { title url }
+      ... on SubHeader { title }
+    }
+  }
+}""",
+        'Assignment': """
+fragment AssignmentFields on Assignment {
+  _id name position dueAt pointsPossible
+  quiz { _id }
+  discussion { _id title }
+  rubric { _id title }
+  rubricAssociation { _id useForGrading }
+}""",
+        'Discussion': """
+fragment DiscussionFields on Discussion {
+  _id title
+  assignment { _id }
+}""",
+    }
+
+    def __init__(self, link: CanvasApiLink = None, page_size: int = 100, courses_per_query: int = 10):
+        """
+        Args:
+            link: the link to query through. Defaults to the default link
+            page_size: how many nodes of each connection to ask for per query
+            courses_per_query: how many courses to ask for in each query, to stay under canvas' query cost limit
+        """
+        self.link = link if link is not None else get_default_api_link()
+        self.page_size = page_size
+        self.courses_per_query = courses_per_query
+        self.queries = 0
+        """
+        How many queries have been sent
+        """
+
+    def load(self, courses: Iterable['Course']) -> list['Course']:
+        """
+        Loads and preloads the structure of each course
+        Args:
+            courses: the courses to load. Only their ids are needed.
+
+        Returns:
+            The courses
+
+        Raises:
+            GraphQLError: if canvas rejects a query, e.g. because graphql is turned off
+        """
+        courses = list(courses)
+        for start in range(0, len(courses), self.courses_per_query):
+            batch = {f'c{i}': course for i, course in enumerate(courses[start:start + self.courses_per_query])}
+            nodes = self._load_batch(batch)
+            for alias, course in batch.items():
+                self._preload(course, {connection: nodes[alias, connection] for connection in self.CONNECTIONS})
+        return courses
+
+    def _load_batch(self, batch: dict[str, 'Course']) -> dict[tuple[str, str], list[dict]]:
+        """
+        Follows every connection of every course in the batch to its last page, a query per page
+
+        Returns:
+            The nodes of each connection, keyed by course alias and connection
+        """
+        nodes = {(alias, connection): [] for alias in batch for connection in self.CONNECTIONS}
+        # connections with pages left, and the cursor each continues after
+        pending: dict[tuple[str, str], str | None] = {key: None for key in nodes}
+        while pending:
+            data = self.link.graphql(self.query(batch, pending), variables={
+                'first': self.page_size,
+                **{f'{alias}_{connection}': cursor for (alias, connection), cursor in pending.items()},
+            })
+            self.queries += 1
+            next_pending = {}
+            for alias, connection in pending:
+                result = data[alias][f'{connection}Connection']
+                nodes[alias, connection].extend(result['nodes'])
+                if result['pageInfo']['hasNextPage']:
+                    next_pending[alias, connection] = result['pageInfo']['endCursor']
+            pending = next_pending
+        return nodes
+
+    def query(self, batch: dict[str, 'Course'], pending: Iterable[tuple[str, str]]) -> str:
+        """
+        Builds a query for the next page of each pending connection, aliasing each course by its key in batch.
+        Cursors are passed as variables named alias_connection.
+        """
+        pending = list(pending)
+        variables = ['$first: Int!'] + [f'${alias}_{connection}: String' for alias, connection in pending]
+        lines = [f'query CourseStructure({", ".join(variables)}) {{']
+        for alias, course in batch.items():
+            connections = [connection for connection_alias, connection in pending if connection_alias == alias]
+            if not connections:
+                continue
+            lines.append(f'  {alias}: course(id: "{course.id}") {{')
+            lines.append('    _id')
+            for connection in connections:
+                lines.append(
+                    f'    {connection}Connection(first: $first, after: ${alias}_{connection}) {{ '
+                    f'pageInfo {{ hasNextPage endCursor }} nodes {{ ...{self.CONNECTIONS[connection]}Fields }} }}')
+            lines.append('  }')
+        lines.append('}')
+        # graphql rejects fragments a query doesn't use
+        used = {self.CONNECTIONS[connection] for _, connection in pending}
+        return '\n'.join(lines) + ''.join(self.FRAGMENTS[node_type] for node_type in self.CONNECTIONS.values()
+                                          if node_type in used)
+
+    CONTENT_PATHS = {
+        'Assignment': 'assignments',
+        'Discussion': 'discussion_topics',
+        'Quiz': 'quizzes',
+        'File': 'files',
+    }
+    """
+    The api collections module item content types live in, for building the urls REST module items carry
+    """
+
+    @classmethod
+    def module_from_node(cls, node: dict, course: 'Course') -> dict:
+        """
+        Reshapes a graphql module the way GET courses/:id/modules?include[]=items returns it,
+        with only the fields listed in Course.get_module_outline
+        """
+        link = course.api_link
+        module_id = int(node['_id'])
+        items = []
+        for position, item in enumerate(node.get('moduleItems') or [], start=1):
+            content = item.get('content') or {}
+            type_ = content.get('__typename')
+            out = {
+                'id': int(item['_id']),
+                'module_id': module_id,
+                'position': position,
+                'type': type_,
+                'title': content.get('title') or content.get('name') or content.get('displayName'),
+            }
+            if type_ == 'Page':
+                out['page_url'] = (content.get('url') or '').rstrip('/').rsplit('/', 1)[-1]
+                out['url'] = f'{link.api_url}/courses/{course.id}/pages/{out["page_url"]}'
+            elif type_ == 'ExternalUrl':
+                out['external_url'] = content.get('url')
+            elif '_id' in content:
+                out['content_id'] = int(content['_id'])
+                if type_ in cls.CONTENT_PATHS:
+                    out['url'] = f'{link.api_url}/courses/{course.id}/{cls.CONTENT_PATHS[type_]}/{out["content_id"]}'
+            if type_ != 'SubHeader':
+                out['html_url'] = f'{link.html_url}/courses/{course.id}/modules/items/{out["id"]}'
+            items.append(out)
+        return {
+            'id': module_id,
+            'name': node['name'],
+            'position': node.get('position'),
+            'items_count': len(items),
+            'items': items,
+        }
+
+    @staticmethod
+    def assignment_from_node(node: dict) -> dict:
+        """
+        Reshapes a graphql assignment the way the REST assignment listing returns it, without its description
+        """
+        out = {
+            'id': int(node['_id']),
+            'name': node['name'],
+            'position': node.get('position'),
+            'due_at': node.get('dueAt'),
+            'points_possible': node.get('pointsPossible'),
+        }
+        if node.get('quiz'):
+            out['quiz_id'] = int(node['quiz']['_id'])
+        if node.get('discussion'):
+            out['discussion_topic'] = {'id': int(node['discussion']['_id']), 'title': node['discussion']['title']}
+        if node.get('rubric'):
+            out['rubric_settings'] = {'id': int(node['rubric']['_id']), 'title': node['rubric']['title']}
+        return out
+
+    @staticmethod
+    def discussion_from_node(node: dict) -> dict:
+        """
+        Reshapes a graphql discussion the way the REST discussion listing returns it, without its message
+        """
+        out = {'id': int(node['_id']), 'title': node['title'], 'assignment_id': None}
+        if node.get('assignment'):
+            out['assignment_id'] = int(node['assignment']['_id'])
+            out['assignment'] = {'id': out['assignment_id']}
+        return out
+
+    @staticmethod
+    def rubric_association_from_node(node: dict) -> dict | None:
+        """
+        Reshapes the rubric association of a graphql assignment the way the REST api returns rubric associations
+        """
+        if not node.get('rubricAssociation') or not node.get('rubric'):
+            return None
+        return {
+            'id': int(node['rubricAssociation']['_id']),
+            'rubric_id': int(node['rubric']['_id']),
+            'association_id': int(node['_id']),
+            'association_type': 'Assignment',
+            'purpose': 'grading',
+            'use_for_grading': node['rubricAssociation'].get('useForGrading'),
+        }
+
+    def _preload(self, course: 'Course', nodes: dict[str, list[dict]]) -> None:
+        associations = filter(None, map(self.rubric_association_from_node, nodes['assignments']))
+        course.preload(
+            modules=[self.module_from_node(node, course) for node in nodes['modules']],
+            assignments=[Assignment(course, self.assignment_from_node(node)) for node in nodes['assignments']],
+            discussions=[Discussion(course, self.discussion_from_node(node)) for node in nodes['discussions']],
+            rubric_associations=[RubricAssociation(course, association) for association in associations],
+        )
+
 
-    def apply_revision(self, revision):
-        revision_id = revision['revision_id']
-        result = self.api_link.post(f"{self.content_url_path}/revisions/{revision_id}", params={
-            'revision_id': revision_id
-        })
-        self._canvas_data[self._body_property] = result['body']
-        self._canvas_data[self._name_property] = result['title']
+class CourseSnapshot:
+    """
+    A read only copy of a course, parsed locally from a common cartridge (.imscc) export. See Course.snapshot.
+    The zip is read lazily: the manifest and module settings are parsed on first use, and the member holding
+    a page, assignment, discussion or quiz is only read when that kind of content is asked for.
+    Nothing is extracted to disk.
+
+    Exports don't carry canvas ids, so items are shaped like the REST api's less their ids, with the export's
+    identifier instead. Module items and pages do carry page urls; to write to anything else, look it up
+    in the course by name.
+
+    Usage:
+        with course.snapshot() as snapshot:
+            for page in snapshot.get_pages():
+                ...
+    """
 
-    def update_content(self, text: str = None, name: str = None) -> dict:
-        data = {}
-        if text:
-            self._canvas_data[self._body_property] = text
-            data['wiki_page[body]'] = text
-        if name:
-            self._canvas_data[self._name_property] = name
-            data['title'] = name
+    MODULE_ITEM_TYPES = {
+        'WikiPage': 'Page',
+        'Assignment': 'Assignment',
+        'DiscussionTopic': 'Discussion',
+        'Quizzes::Quiz': 'Quiz',
+        'Attachment': 'File',
+        'ExternalUrl': 'ExternalUrl',
+        'ContextExternalTool': 'ExternalTool',
+        'ContextModuleSubHeader': 'SubHeader',
+    }
+    """
+    The module item types canvas exports, and the types the REST api calls them
+    """
 
-        return self._save_data(data)
+    def __init__(self, path: str, course: 'Course' = None, delete_on_close: bool = False):
+        """
+        Args:
+            path: the .imscc file
+            course: the course the export was taken from, which items are attached to
+            delete_on_close: remove the file once the snapshot is closed
+        """
+        self.path = path
+        self.course = course
+        self.delete_on_close = delete_on_close
+        self._zip = zipfile.ZipFile(path)
 
+    def __enter__(self) -> Self:
+        return self
 
-class Rubric(BaseContentItem):
-    _name_property = 'title'
-    _body_property = None
-    _content_url_template = "courses/{course_id}/rubrics/{content_id}"
-    _all_content_url_template = "courses/{course_id}/rubrics"
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
 
-    @property
-    def associations(self, reload: bool = False) -> list['RubricAssociation']:
-        if 'associations' in self._canvas_data and reload:
-            return self._body_property['associations']
+    def close(self) -> None:
+        self._zip.close()
+        if self.delete_on_close and os.path.exists(self.path):
+            os.remove(self.path)
 
-        data: dict = self._get_data_by_id(
-            course=self.course,
-            content_id=self.id,
-            params={'include': ['associations']}
-        )
-        associations: list[RubricAssociation] = [RubricAssociation(self.course, ra) for ra in data['associations']]
-        self._canvas_data['associations'] = associations
-        return associations
+    def _read(self, name: str) -> str:
+        return self._zip.read(name).decode('utf-8')
 
+    def _xml(self, name: str) -> ElementTree.Element:
+        with self._zip.open(name) as f:
+            return ElementTree.parse(f).getroot()
 
-class RubricAssociation(BaseContentItem):
-    _name_property = None
-    _content_url_template = "courses/{course_id}/rubric_associations/{content_id}"
-    _all_content_url_template = "courses/{course_id}/rubric_associations"
+    @cached_property
+    def resources(self) -> dict[str, dict]:
+        """
+        The manifest's resources by identifier, as dicts of type, href and the files they're made of
+        """
+        root = self._xml('imsmanifest.xml')
+        return {
+            resource.get('identifier'): {
+                'type': resource.get('type'),
+                'href': resource.get('href'),
+                'files': [file.get('href') for file in resource.iterfind('{*}file')],
+            }
+            for resource in root.iterfind('.//{*}resources/{*}resource')
+        }
 
-    @property
-    def use_for_grading(self) -> bool:
-        return self._canvas_data['use_for_grading']
+    def _page_url(self, href: str | None) -> str | None:
+        match = re.fullmatch(r'wiki_content/(.+)\.html', href or '')
+        return match.group(1) if match else None
 
-    def set_use_for_grading(self, value):
-        self._canvas_data['use_for_grading'] = value
-        result = self._save_data({
-            'rubric_association[use_for_grading]': value
-        })
-        return result
+    def _parse_html(self, name: str) -> tuple[str, dict, str]:
+        """
+        Returns:
+            The title, the meta tags and the body of an exported html file
+        """
+        text = self._read(name)
+        head, _, rest = text.partition('</head>')
+        title = re.search(r'<title>(.*?)</title>', head, re.S)
+        meta = {
+            key: html.unescape(value) for key, value in re.findall(r'<meta name="([^"]+)" content="([^"]*)"', head)}
+        body = re.search(r'<body[^>]*>(.*)</body>', rest, re.S)
+        return (html.unescape(title.group(1)) if title else None), meta, (body.group(1) if body else '')
+
+    def get_modules(self) -> list[dict]:
+        """
+        Returns:
+            Module dicts with their items, shaped like the REST api's modules?include[]=items
+        """
+        if 'course_settings/module_meta.xml' not in self._zip.namelist():
+            return []
+        modules = []
+        for module in self._xml('course_settings/module_meta.xml').iterfind('{*}module'):
+            items = []
+            for item in module.iterfind('{*}items/{*}item'):
+                content_type = item.findtext('{*}content_type')
+                data = {
+                    'identifier': item.get('identifier'),
+                    'title': item.findtext('{*}title'),
+                    'type': self.MODULE_ITEM_TYPES.get(content_type, content_type),
+                    'position': int(item.findtext('{*}position') or len(items) + 1),
+                    'indent': int(item.findtext('{*}indent') or 0),
+                    'published': item.findtext('{*}workflow_state') == 'active',
+                }
+                if data['type'] == 'ExternalUrl':
+                    data['external_url'] = item.findtext('{*}url')
+                identifierref = item.findtext('{*}identifierref')
+                if identifierref:
+                    data['identifierref'] = identifierref
+                    page_url = self._page_url(self.resources.get(identifierref, {}).get('href'))
+                    if data['type'] == 'Page' and page_url:
+                        data['page_url'] = page_url
+                        if self.course is not None:
+                            data['url'] = self.course.api_link.full_url(f'courses/{self.course.id}/pages/{page_url}')
+                items.append(data)
+            modules.append({
+                'identifier': module.get('identifier'),
+                'name': module.findtext('{*}title'),
+                'position': int(module.findtext('{*}position') or len(modules) + 1),
+                'published': module.findtext('{*}workflow_state') == 'active',
+                'items': items,
+            })
+        return modules
+
+    def _page_data(self, name: str) -> dict:
+        title, meta, body = self._parse_html(name)
+        return {
+            'identifier': meta.get('identifier'),
+            'title': title,
+            'url': self._page_url(name),
+            'body': body,
+            'front_page': meta.get('front_page') == 'true',
+            'published': meta.get('workflow_state', 'active') == 'active',
+        }
+
+    def get_pages(self, search_term: str = None) -> list[Page]:
+        """
+        Args:
+            search_term: only pages whose titles contain this, ignoring case
+        """
+        pages = [self._page_data(name) for name in self._zip.namelist() if self._page_url(name)]
+        if search_term is not None:
+            pages = [page for page in pages if search_term.lower() in (page['title'] or '').lower()]
+        return [Page(self.course, page) for page in pages]
+
+    def get_page(self, url: str) -> Page | None:
+        """
+        Reads one page by its url, leaving the rest of the archive alone
+        """
+        name = f'wiki_content/{url}.html'
+        if name not in self._zip.namelist():
+            return None
+        return Page(self.course, self._page_data(name))
+
+    def _members_named(self, filename: str) -> list[str]:
+        return [name for name in self._zip.namelist() if name.endswith(f'/{filename}')]
+
+    def get_assignments(self) -> list[Assignment]:
+        assignments = []
+        for name in self._members_named('assignment_settings.xml'):
+            settings = self._xml(name)
+            folder = name.rsplit('/', 1)[0]
+            description = next(
+                (self._parse_html(member)[2] for member in self._zip.namelist()
+                 if member.startswith(f'{folder}/') and member.endswith('.html')), '')
+            points_possible = settings.findtext('{*}points_possible')
+            assignments.append(Assignment(self.course, {
+                'identifier': settings.get('identifier') or folder,
+                'name': settings.findtext('{*}title'),
+                'description': description,
+                'due_at': settings.findtext('{*}due_at') or None,
+                'points_possible': float(points_possible) if points_possible else None,
+                'submission_types': (settings.findtext('{*}submission_types') or '').split(','),
+                'position': int(settings.findtext('{*}position') or 0) or None,
+                'published': settings.findtext('{*}workflow_state') == 'published',
+            }))
+        return assignments
+
+    def get_discussions(self) -> list[Discussion]:
+        discussions = []
+        for identifier, resource in self.resources.items():
+            if resource['type'] != 'imsdt_xmlv1p1' or not resource['files']:
+                continue
+            topic = self._xml(resource['files'][0])
+            discussions.append(Discussion(self.course, {
+                'identifier': identifier,
+                'title': topic.findtext('{*}title'),
+                'message': topic.findtext('{*}text') or '',
+            }))
+        return discussions
+
+    def get_quizzes(self) -> list[Quiz]:
+        quizzes = []
+        for name in self._members_named('assessment_meta.xml'):
+            quiz = self._xml(name)
+            quizzes.append(Quiz(self.course, {
+                'identifier': quiz.get('identifier') or name.rsplit('/', 1)[0],
+                'title': quiz.findtext('{*}title'),
+                'description': quiz.findtext('{*}description') or '',
+                'due_at': quiz.findtext('{*}due_at') or None,
+                'published': quiz.findtext('{*}available') == 'true',
+            }))
+        return quizzes
 
 
 class Term(BaseCanvasObject):
@@ -918,18 +3895,23 @@ class Term(BaseCanvasObject):
             return_list: bool = False,
             workflow_state: str = 'all'
     ) -> Self | List[Self]:
-        ct = CanvasApiLink(account_id=ROOT_ACCOUNT_ID)
-        data = ct.get(f'accounts/{ROOT_ACCOUNT_ID}/terms', params={
-            'workflow_state[]': workflow_state,
-            'term_name': code
-        })
+        ct = CanvasApiLink(account_id=ROOT_ACCOUNT_ID, session=get_default_api_link().session)
+        # terms that aren't found aren't remembered, so new ones show up
+        data = cached_metadata(
+            f'terms {ROOT_ACCOUNT_ID} {workflow_state} {code}',
+            lambda: ct.get(f'accounts/{ROOT_ACCOUNT_ID}/terms', params={
+                'workflow_state[]': workflow_state,
+                'term_name': code
+            }),
+            ct.api_url, ct.headers,
+            keep=lambda result: bool(result.get('enrollment_terms')))
         print(json.dumps(data))
         if 'enrollment_terms' not in data:
             warnings.warn(f'No enrollment terms found for {code}')
         terms = data['enrollment_terms']
         if not terms or len(terms) == 0:
             return None
-        return Term(terms[0]) if not return_list else list(map(lambda a: Term(a), terms))
+        return Term(terms[0], api_link=ct) if not return_list else list(map(lambda a: Term(a, api_link=ct), terms))
 
     @property
     def code(self) -> str:
@@ -942,10 +3924,24 @@ class Course(BaseCanvasObject):
     """
     _name_property = 'name'
     CODE_REGEX = re.compile(r'([\-.\w^]+[^_])?_?(\w{4}\d{3})', re.IGNORECASE)
+    _pending_changes: 'PendingCourseChanges | None' = None
+    _preloaded: dict | None = None
 
     def __init__(self, data, **kwargs):
         super().__init__(data, **kwargs)
 
+    def _merge(self, data: dict) -> None:
+        if 'course_code' in data and data['course_code'] != self._canvas_data.get('course_code'):
+            self.__dict__.pop('_code_match', None)
+        super()._merge(data)
+
+    @classmethod
+    def _live(cls, data: dict, link: CanvasApiLink) -> Self:
+        """
+        Gets the one Course link holds for data, with data merged in
+        """
+        return link.identity_map.merge(cls, data, lambda: cls(data, api_link=link))
+
     # Class Methods
     @classmethod
     def get_by_id(cls, id_: int, params=None, account_id=None, link: CanvasApiLink = None) -> Self:
@@ -959,12 +3955,28 @@ class Course(BaseCanvasObject):
             params: any parameters to pass to the request
 
         Returns:
-            A new Course
+            The Course, the same one as any earlier lookup of it through link
         """
         if link is None:
-            link = CanvasApiLink(account_id=account_id)
+            link = BaseCanvasObject.new_api_link(account_id=account_id)
         data = link.get(f'courses/{id_}', params=params)
-        return Course(data)
+        return cls._live(data, link)
+
+    @classmethod
+    async def get_by_id_async(cls, id_: int, link: AsyncCanvasApiLink, params=None) -> Self:
+        """
+        Awaitable version of get_by_id
+
+        Args:
+            id_: The id of the course to fetch
+            link: The AsyncCanvasApiLink to fetch with
+            params: any parameters to pass to the request
+
+        Returns:
+            A new Course, holding the synchronous link behind the async one
+        """
+        data = await link.get(f'courses/{id_}', params=params)
+        return cls._live(data, link.link)
 
     @classmethod
     def get_all_by_code(
@@ -998,33 +4010,107 @@ class Course(BaseCanvasObject):
         Returns:
             A course or list of courses if return_list is true, matching the code
         """
+        link = link if link is not None else get_default_api_link()
+        courses = cls._search(code, params=params, link=link, term=term)
+        if not courses:
+            return None
+
+        return list(
+            map(lambda a: Course._live(a, link), courses)
+        ) if return_list else Course._live(courses[0], link)
+
+    @classmethod
+    def get_summaries(
+            cls,
+            code: str | None = None,
+            params: dict = None,
+            link: CanvasApiLink = None,
+            term: 'Term' = None) -> List[CourseSummary]:
+        """
+        Like get_all_by_code, but returns compact CourseSummary records instead of Courses,
+        for scans over a whole term that only need codes and ids before choosing which courses to open
+        """
+        link = link if link is not None else get_default_api_link()
+        return [CourseSummary(course) for course in cls._search(code, params=params, link=link, term=term)]
+
+    @classmethod
+    def _search(
+            cls,
+            code: str | None,
+            params: dict = None,
+            link: CanvasApiLink = None,
+            term: 'Term' = None) -> list[dict]:
+        """
+        Searches the accounts for courses matching code, using the first account in order with any.
+        The course catalog says which account that is when it can, and only that account is searched. Otherwise
+        every account is searched at once; once an account's match decides the result, the other searches stop
+        before their next page, though a page already requested still arrives.
+        Either way the courses come from canvas, not from the catalog, so their data is current.
+
+        Returns:
+            The matching courses' data, the most recently created first
+        """
+        link = link if link is not None else get_default_api_link()
+        params = dict(params) if params is not None else {}
+        if code is not None:
+            params['search_term'] = code
+        if term is not None:
+            params['enrollment_term_id'] = term.id
+
+        stop = threading.Event()
+
+        def search_account(account_id: int) -> list | None:
+            pages = link._iter_pages(f"accounts/{account_id}/courses", params=params)
+            found = []
+            try:
+                for page in pages:
+                    if stop.is_set():
+                        return None
+                    found.extend(page)
+            finally:
+                # cancels any pages prefetched but not started
+                pages.close()
+            return found
+
+        account_ids = list(ACCOUNT_IDS_BY_NAME.values())
         courses = None
-        for account in ACCOUNT_IDS_BY_NAME:
-            account_id = ACCOUNT_IDS_BY_NAME[account]
-            url = f"accounts/{account_id}/courses"
-            params = params if params is not None else {}
-            if code is not None:
-                params['search_term'] = code
-            if term is not None:
-                params['enrollment_term_id'] = term.id
-            link = link if link is not None else CanvasApiLink()
-            courses = link.get_paged_data(
-                url,
-                params=params
-            )
-            if courses and len(courses) > 0:
-                break
+        catalog = get_course_catalog()
+        # the catalog can only locate the searches it indexes
+        if catalog is not None and not set(params) - {'search_term', 'enrollment_term_id'}:
+            account_id = catalog.find_account(
+                code, account_ids, term_id=term.id if term is not None else None, link=link)
+            if account_id is not None:
+                # courses created in that account since it was last listed are included, but a first match created
+                # since then in an account searched before it isn't seen until that account is re-listed
+                courses = search_account(account_id)
+                if courses:
+                    catalog.record(account_id, courses, link)
+
+        if not courses:
+            # the first account in order with a match wins, without waiting on the accounts after it,
+            # which stop paging once it's found
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(len(account_ids), link.governor.max_concurrency)))
+            try:
+                searches = [(account_id, executor.submit(search_account, account_id)) for account_id in account_ids]
+                for account_id, search in searches:
+                    courses = search.result()
+                    if courses and len(courses) > 0:
+                        if catalog is not None:
+                            # created since the catalog was last refreshed
+                            catalog.record(account_id, courses, link)
+                        break
+            finally:
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
 
         if courses is None or len(courses) == 0:
-            return None
+            return []
 
         # if there are multiple courses, return by the most recently assigned a new ID
         if len(courses) > 1:
             courses.sort(reverse=True, key=lambda course: course['id'])
-
-        return list(
-            map(lambda a: Course(a), courses)
-        ) if return_list else Course(courses[0])
+        return courses
 
     @classmethod
     def publish_all(cls, courses: List[Self]):
@@ -1064,7 +4150,7 @@ class Course(BaseCanvasObject):
             # list of course ids
             'course_ids[]': list(map(lambda a: a['id'], courses))
         }
-        response = requests.put(url, headers=HEADERS, data=data)
+        response = get_default_api_link().request('PUT', url, headers=HEADERS, data=data)
         if not response.ok:
             print(response)
             print(response.content)
@@ -1136,7 +4222,7 @@ class Course(BaseCanvasObject):
         if 'syllabus_body' not in self._canvas_data:
             data = Course.get_by_id(self.id, params={
                 'include[]': 'syllabus_body'
-            })
+            }, link=self.api_link)
             self._canvas_data['syllabus_body'] = data['syllabus_body']
         return self._canvas_data['syllabus_body']
 
@@ -1151,7 +4237,7 @@ class Course(BaseCanvasObject):
         url = f"courses/{self.id}/blueprint_templates/default/associated_courses"
         courses = self.api_link.get_paged_data(url, params={"per_page": 50})
 
-        return list(map(lambda a: Course(a), courses))
+        return list(map(lambda a: Course._live(a, self.api_link), courses))
 
     @cached_property
     def subsections(self) -> list[dict]:
@@ -1181,6 +4267,9 @@ class Course(BaseCanvasObject):
         return next(filter(lambda x: x['label'] == label, self.tabs), None)
 
     def set_navigation_tab_hidden(self, label: str, value: bool):
+        if self._pending_changes is not None:
+            self._pending_changes.set_tab(label, hidden=value)
+            return None
         tab = self.get_tab(label)
         if tab is None:
             return None
@@ -1189,11 +4278,38 @@ class Course(BaseCanvasObject):
         })
 
     def change_syllabus(self, val: str):
+        if self._canvas_data.get('syllabus_body') == val:
+            self.api_link.metrics.record_elided('PUT', self.api_link.full_url(f'courses/{self.id}'))
+            return
         self._canvas_data['syllabus_body'] = val
+        if self._pending_changes is not None:
+            self._pending_changes.set_course_fields(syllabus_body=val)
+            return
         self.api_link.put(f'courses/{self.id}', data={
             'course[syllabus_body]': val
         })
 
+    @contextlib.contextmanager
+    def deferred_writes(self) -> Iterator['PendingCourseChanges']:
+        """
+        Holds back course settings writes (navigation tabs, late policy, course fields) made inside the block
+        and sends them merged when it exits, one request per endpoint.
+        Nested blocks join the outermost one. If the block raises, the held back writes are dropped.
+
+        Yields:
+            The pending changes, whose late_policy holds canvas' response once they have been sent
+        """
+        if self._pending_changes is not None:
+            yield self._pending_changes
+            return
+        changes = PendingCourseChanges(self)
+        self._pending_changes = changes
+        try:
+            yield changes
+        finally:
+            self._pending_changes = None
+        changes.flush()
+
     def get_potential_sections(self, term: 'Term') -> List[Self]:
         courses = Course.get_all_by_code(self.base_code, term=term)
         return courses
@@ -1221,11 +4337,26 @@ class Course(BaseCanvasObject):
         self._canvas_data = response
         self.reset_cache()
 
+    def preload(self, **structure) -> None:
+        """
+        Holds already loaded modules, assignments, discussions or rubric_associations, which get_module_outline,
+        get_assignments, get_discussions and get_rubric_associations then return instead of asking canvas,
+        until reset_cache is called. See CourseStructureLoader.
+        """
+        self._preloaded = {**(self._preloaded or {}), **structure}
+
+    def _get_preloaded(self, name: str, search_term=None, params=None) -> list | None:
+        if self._preloaded is None or search_term is not None or params:
+            return None
+        return self._preloaded.get(name)
+
     def reset_cache(self) -> None:
-        if hasattr(self, 'subsections'):
+        self._preloaded = None
+        # hasattr would fetch a cached_property that hasn't been yet, just to throw it away
+        if 'subsections' in self.__dict__:
             delattr(self, 'subsections')
 
-        if hasattr(self, 'associated_courses'):
+        if 'associated_courses' in self.__dict__:
             delattr(self, 'associated_courses')
 
     def publish(self):
@@ -1246,7 +4377,7 @@ class Course(BaseCanvasObject):
             # WHY IS THIS CALLED CLAIM
             'course[event]': 'claim'
         })
-        self._canvas_data = Course.get_by_id(self.id)._canvas_data
+        self._canvas_data = Course.get_by_id(self.id, link=self.api_link)._canvas_data
 
     def get_late_policy(self):
         url = f'courses/{self.id}/late_policy'
@@ -1255,6 +4386,9 @@ class Course(BaseCanvasObject):
         return policyData['late_policy']
 
     def patch_late_policy(self, data):
+        if self._pending_changes is not None:
+            self._pending_changes.set_late_policy(**data['late_policy'])
+            return None
         url = f'courses/{self.id}/late_policy'
         policy: dict = self.api_link.patch(url, json=data)
         print(policy)
@@ -1266,38 +4400,37 @@ class Course(BaseCanvasObject):
             as a few one-off fixes.
         """
 
-        self.set_navigation_tab_hidden('Dropout Detective', False)
-        self.set_navigation_tab_hidden('BigBlueButton', False)
-
-        self.patch_late_policy({
-            'late_policy': {
-                'missing_submission_deduction_enabled': True,
-            }
-        })
-
-        late_policy = self.get_late_policy()
-        assert (late_policy['missing_submission_deduction_enabled'])
-
         applied_to = []
         if fixes_to_run is None:
             fixes_to_run = FIXES_TO_RUN
 
-        for page in EvalFix.find_content(self):
-            page.delete()
-            applied_to.append(page)
+        with self.deferred_writes() as changes:
+            self.set_navigation_tab_hidden('Dropout Detective', False)
+            self.set_navigation_tab_hidden('BigBlueButton', False)
+
+            self.patch_late_policy({
+                'late_policy': {
+                    'missing_submission_deduction_enabled': True,
+                }
+            })
+            # send the tabs and policy now, so a rejected policy stops us before any content is edited.
+            # the PATCH response is the policy as saved, so it isn't read back
+            changes.flush()
+            assert (changes.late_policy['missing_submission_deduction_enabled'])
 
-        for fix_set in fixes_to_run:
-            pages = fix_set.find_content(self)
-            for page in pages:
-                text = fix_set.fix(page.body)
-                page.update_content(text)
+            for page in EvalFix.find_content(self):
+                page.delete()
                 applied_to.append(page)
 
-        syllabus = SyllabusFix.fix(self.syllabus)
-        self.api_link.put(
-            f'courses/{self.id}',
-            data={"course[syllabus_body]": syllabus})
-        self._canvas_data['syllabus_body'] = syllabus
+            for fix_set in fixes_to_run:
+                pages = hydrate(fix_set.find_content(self))
+                for page in pages:
+                    text = fix_set.fix(page.body)
+                    page.update_content(text)
+                    applied_to.append(page)
+
+            self.change_syllabus(SyllabusFix.fix(self.syllabus))
+
         return applied_to
 
     def reset(self, prompt=True):
@@ -1310,8 +4443,14 @@ class Course(BaseCanvasObject):
                 title="Do You Want To Reset",
                 message=f"Are you sure you want to reset {self.course_code}?'"):
             url = f'/courses/{self.id}/reset_content'
+            old_id = self.id
             data = self.api_link.post(url)
             self._canvas_data['id'] = data['id']
+            # the old course is deleted, so lookups by code and id have to find this one instead
+            self.api_link.identity_map.rekey(type(self), old_id, self.id)
+            catalog = get_course_catalog()
+            if catalog is not None:
+                catalog.replace(old_id, {**self._canvas_data, **data}, self.api_link)
 
         return False
 
@@ -1352,7 +4491,7 @@ class Course(BaseCanvasObject):
 
         url = f"courses/{self.id}/content_migrations"
         response = self.api_link.post(url, data=payload)
-        return poll_migration(migration=response, progress_bar=progress_bar)
+        return poll_migration(migration=response, progress_bar=progress_bar, api_link=self.api_link)
 
     def get_parent_course(self, return_dev_search=False):
         migrations = self.api_link.get(f'courses/{self.id}/content_migrations')
@@ -1370,46 +4509,93 @@ class Course(BaseCanvasObject):
 
         try:
             for migration in migrations:
-                course = Course.get_by_id(migration['settings']['source_course_id'])
+                course = Course.get_by_id(migration['settings']['source_course_id'], link=self.api_link)
                 if course.code_prefix == "DEV":
                     return course
 
         except AssertionError:
             return Course.get_by_code('DEV_' + self.base_code)
 
-    def get_modules(self) -> list:
+    def _modules_url(self, compact: bool) -> str:
+        # compact items don't keep content_details, so they aren't asked for
+        return f'courses/{self.id}/modules?include[]=items' + ('' if compact else '&include[]=content_details')
+
+    def get_modules(self, compact: bool = False) -> list:
         """Gets all modules including module item details
+        Args:
+            compact: return Module records, holding only the item fields scripts read, instead of the full dicts.
+                For keeping the modules of many courses at once.
         Returns:
             list: A list of module dicts
         """
-        return self.api_link.get_paged_data(
-            f'courses/{self.id}/modules?include[]=items&include[]=content_details',
-        )
+        modules = self.api_link.get_paged_data(self._modules_url(compact))
+        return [Module(module) for module in modules] if compact else modules
+
+    def get_module_outline(self) -> list[dict]:
+        """Gets the modules with only the fields CourseStructureLoader loads: each module's id, name, position
+        and items, and each item's id, module_id, position, type, title, content_id, page_url, url,
+        external_url and html_url. Answered from the preloaded structure if there is one, otherwise get_modules.
+        Returns:
+            list: A list of module dicts
+        """
+        preloaded = self._get_preloaded('modules')
+        return preloaded if preloaded is not None else self.get_modules()
+
+    def iter_modules(self, compact: bool = False) -> Iterator[dict]:
+        """Like get_modules, but yields each module as its page arrives
+        Args:
+            compact: yield Module records instead of the full dicts
+        Returns:
+            A generator of module dicts
+        """
+        for module in self.api_link.iter_paged(self._modules_url(compact)):
+            yield Module(module) if compact else module
+
+    async def get_modules_async(self, link: AsyncCanvasApiLink, compact: bool = False) -> list:
+        """Awaitable version of get_modules
+        Args:
+            link: The AsyncCanvasApiLink to fetch with
+            compact: return Module records instead of the full dicts
+        Returns:
+            list: A list of module dicts
+        """
+        modules = await link.get_paged_data(self._modules_url(compact))
+        return [Module(module) for module in modules] if compact else modules
 
-    def get_pages(self, search_term=None) -> list[Page]:
+    def get_pages(self, search_term=None, include_body: bool = False) -> list[Page]:
         """Gets all pages in the course
+        Args:
+            search_term: Page titles to match
+            include_body: Download every body with the listing. Otherwise pages fetch their body
+                on first use, or use hydrate to fetch the bodies of many at once.
         """
-        params = {
-            'include[]': 'body'
-        }
+        params = {}
+        if include_body:
+            params['include[]'] = 'body'
         if search_term is not None:
             params['search_term'] = search_term
 
         return Page.get_all(self, params=params)
 
-    def get_assignments(self, search_term=None, params=None) -> list[Assignment]:
+    def get_assignments(self, search_term=None, params=None, include_body: bool = True) -> list[Assignment]:
         """Gets assignments in a course
         Args:
             search_term: Assignment names to match
             params: additional params to pass to the request
+            include_body: False to leave descriptions out of the listing, to be fetched on first use or with hydrate
 
         Returns:
             a list of Assignments
 
         """
+        preloaded = self._get_preloaded('assignments', search_term, params)
+        if preloaded is not None:
+            return preloaded
         params = params if params else {}
         if search_term is not None:
             params['search_term'] = search_term
+        if not include_body:
+            params['exclude_response_fields[]'] = 'description'
 
         return Assignment.get_all(self, params=params)
 
@@ -1423,6 +4609,9 @@ class Course(BaseCanvasObject):
             a list of Assignments
 
         """
+        preloaded = self._get_preloaded('discussions', search_term, params)
+        if preloaded is not None:
+            return preloaded
         params = params if params else {}
         if search_term is not None:
             params['search_term'] = search_term
@@ -1448,15 +4637,60 @@ class Course(BaseCanvasObject):
     def get_rubrics(self) -> List['Rubric']:
         return Rubric.get_all(self)
 
-    def get_pages_by_name(self, search_term: str) -> List[Page]:
+    def get_rubric_associations(self) -> List['RubricAssociation']:
+        """
+        Gets every rubric association in the course. Canvas has no REST listing for these,
+        so unless they were preloaded this takes a GET per rubric.
+        """
+        preloaded = self._get_preloaded('rubric_associations')
+        if preloaded is not None:
+            return preloaded
+        return [association for rubric in self.get_rubrics() for association in rubric.associations]
+
+    def get_pages_by_name(self, search_term: str, include_body: bool = False) -> List[Page]:
         """Gets a page by name
         Args:
             search_term: the name of the course to search for
+            include_body: Download the bodies with the listing, for callers that will read every one
         """
 
-        pages = self.get_pages(search_term)
+        pages = self.get_pages(search_term, include_body=include_body)
         return pages
 
+    def snapshot(self, path: str = None, poll_interval: float = 2.0) -> CourseSnapshot:
+        """
+        Exports the course as a common cartridge and downloads it once, so read heavy work can parse pages,
+        assignments, discussions, quizzes and modules locally instead of paging through the api.
+        The snapshot is as of the export; it doesn't see later changes.
+        Args:
+            path: where to save the .imscc. Defaults to a temporary file, removed when the snapshot is closed.
+            poll_interval: seconds between polls of the export's progress
+
+        Returns:
+            The snapshot. Close it, or use it as a context manager, when done.
+        """
+        export = self.api_link.post(f'courses/{self.id}/content_exports', data={
+            'export_type': 'common_cartridge',
+            'skip_notifications': True,
+        })
+        poll_migration(export, poll_interval=poll_interval, api_link=self.api_link)
+        export = self.api_link.get(f'courses/{self.id}/content_exports/{export["id"]}', cache=False)
+        if export['workflow_state'] != 'exported':
+            raise RuntimeError(f"Export of {self.course_code} ended {export['workflow_state']}")
+
+        delete_on_close = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix='.imscc')
+            os.close(fd)
+        # streamed to disk, not through the caches, which would hold the whole archive in memory
+        response = self.api_link._send('GET', export['attachment']['url'], self.api_link.headers, None, stream=True)
+        with response:
+            assert response.ok, response.text
+            with open(path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+        return CourseSnapshot(path, course=self, delete_on_close=delete_on_close)
+
     def overwrite_home_page(self, profile: 'Profile') -> str:
         """Summary
             Replaces the picture and bio element, if able
@@ -1478,6 +4712,70 @@ class Course(BaseCanvasObject):
 
 
 
+class PendingCourseChanges:
+    """
+    Course settings writes waiting to be sent, merged per endpoint. See Course.deferred_writes
+    Canvas has no bulk tab endpoint, so each changed tab still gets its own PUT, but the tab list is only read once
+    and tabs already in the requested state are left alone.
+    """
+
+    def __init__(self, course: Course):
+        self.course = course
+        self.course_fields: dict[str, Any] = {}
+        self.late_policy_fields: dict[str, Any] = {}
+        self.tabs: dict[str, dict[str, Any]] = {}
+        self.late_policy: dict | None = None
+        """
+        The late policy canvas returned from the merged PATCH, once sent
+        """
+        self.requests_sent = 0
+
+    def set_course_fields(self, **fields) -> None:
+        self.course_fields.update(fields)
+
+    def set_late_policy(self, **fields) -> None:
+        self.late_policy_fields.update(fields)
+
+    def set_tab(self, label: str, **fields) -> None:
+        self.tabs.setdefault(label, {}).update(fields)
+
+    def flush(self) -> int:
+        """
+        Sends everything pending, one request per endpoint, then clears it
+
+        Returns:
+            The number of write requests sent
+        """
+        course, link = self.course, self.course.api_link
+        sent = 0
+        if self.tabs:
+            tabs = {tab['label']: tab for tab in course.tabs}
+            for label, fields in self.tabs.items():
+                tab = tabs.get(label)
+                if tab is None:
+                    continue
+                # canvas leaves hidden out of visible tabs
+                if all(tab.get(key, False if key == 'hidden' else None) == value for key, value in fields.items()):
+                    link.metrics.record_elided('PUT', link.full_url(f'courses/{course.id}/tabs/{tab["id"]}'))
+                    continue
+                link.put(f'courses/{course.id}/tabs/{tab["id"]}', data=fields)
+                sent += 1
+
+        if self.late_policy_fields:
+            response = link.patch(f'courses/{course.id}/late_policy', json={'late_policy': self.late_policy_fields})
+            self.late_policy = response['late_policy']
+            sent += 1
+
+        if self.course_fields:
+            link.put(f'courses/{course.id}', data={
+                f'course[{key}]': value for key, value in self.course_fields.items()})
+            sent += 1
+
+        self.course_fields, self.late_policy_fields, self.tabs = {}, {}, {}
+        self.requests_sent += sent
+        return sent
+
+
 class User(BaseCanvasObject):
     _id_property = 'id'
     _name_property = 'name'
@@ -1485,7 +4783,7 @@ class User(BaseCanvasObject):
     _all_content_url_template = 'users/'
 
     def __init__(self, data, headers=None, api_url=None, api_link=None, account_id=None, **kwargs):
-        api_link = api_link if api_link is not None else CanvasApiLink(headers, api_url, account_id)
+        api_link = api_link if api_link is not None else BaseCanvasObject.new_api_link(headers, api_url, account_id)
         super().__init__(data=data, api_link=api_link, **kwargs)
 
     @classmethod
@@ -1494,7 +4792,7 @@ class User(BaseCanvasObject):
             params = {}
 
         params['search_term'] = name.lower()
-        link = CanvasApiLink(account_id=account_id)
+        link = BaseCanvasObject.new_api_link(account_id=account_id)
         account_id = link.account_id
         data = link.get(f'accounts/{account_id}/users', params=params, **kwargs)
 
@@ -1662,6 +4960,13 @@ def load_constants(path=CONSTANTS_FILE, context=None):
     if context is None:
         context = sys.modules[__name__]
 
+    # start before the first request so the whole run is recorded or replayed
+    if 'cassette' in constants:
+        use_cassette(
+            constants['cassette']['path'],
+            constants['cassette'].get('mode', Cassette.REPLAY),
+            constants['cassette'].get('latencyScale', 0.0))
+
     context.API_TOKEN = constants["apiToken"]
     context.API_URL = constants["apiUrl"]
     context.HTML_URL = re.sub('/api/v1', '', constants["apiUrl"])
@@ -1677,8 +4982,14 @@ def load_constants(path=CONSTANTS_FILE, context=None):
     context.HEADERS = {"Authorization": f"Bearer {context.API_TOKEN}"}
     context.LIVE_HEADERS = {"Authorization": f'Bearer {constants["liveApiToken"]}'}
 
+    def get_accounts():
+        response = requests.get(f'{context.API_URL}/accounts', headers=context.HEADERS)
+        response.raise_for_status()
+        return response.json()
+
     context.ACCOUNT_IDS_BY_NAME = dict()
-    context.ACCOUNTS = requests.get(f'{API_URL}/accounts', headers=context.HEADERS).json()
+    context.ACCOUNTS = cached_metadata(
+        'accounts', get_accounts, context.API_URL, context.HEADERS, constants=constants)
 
     for account in context.ACCOUNTS:
         context.ACCOUNT_IDS_BY_NAME[account['name']] = account['id']
@@ -1687,6 +4998,9 @@ def load_constants(path=CONSTANTS_FILE, context=None):
     context.ACCOUNT_ID = context.ACCOUNT_IDS_BY_NAME['Distance Education']
     context.CONSTANTS = constants
 
+    # the default link was built from the previous constants, if any
+    reset_default_api_link()
+
     return constants
 
 
@@ -1748,7 +5062,7 @@ def setup_main_ui(
     open_course.pack()
 
     async def _lock_module_items_async():
-        if aiohttp:
+        if not aiohttp:
             return lock_module_items(bp_course, progress_bar)
         return await lock_module_items_async(bp_course, progress_bar)
 
@@ -1869,6 +5183,7 @@ async def opening_dialog(
             value = await update['func']() if inspect.isawaitable(update['func']) else update['func']()
             ran_command_line = True
     if ran_command_line:
+        report_metrics()
         return value
     else:
         checkboxes = []
@@ -1930,6 +5245,7 @@ async def handle_run(updates: list, status_label: tk.Label):
             raise exception
 
     status_label.config(text=f'Finished!')
+    report_metrics()
 
 
 def generate_email(
@@ -1997,11 +5313,13 @@ def begin_course_sync(
         wait_for_completion: True,
         progress_bar: ttk.Progressbar = None,
         progress_callback: Callable = None,
-        status_label: tk.Label = None) -> dict | None:
+        status_label: tk.Label = None,
+        api_link: CanvasApiLink = None) -> dict | None:
     """Summary
         Begins the sync process of the blueprint to its member course
 
     Args:
+        api_link: The api link whose connection pool to use. Defaults to the course's link
         wait_for_completion: Whether to poll the results or just let the syncs happen
         progress_callback: a callback of func(percent, status)
         bp_course: The blueprint course
@@ -2013,16 +5331,17 @@ def begin_course_sync(
         dict: The migration data dict if the operation was a success,
         otherwise False
     """
+    api_link = api_link if api_link is not None else bp_course.api_link
     payload = {
         'comment': 'Automatic sync from publishing app',
         'copy_settings': True,
         'publish_after_initial_sync': False
 
     }
-    response = requests.post(
-        f'{API_URL}/courses/{bp_course["id"]}'
+    response = api_link.request(
+        'POST',
+        f'courses/{bp_course["id"]}'
         + '/blueprint_templates/default/migrations',
-        headers=HEADERS,
         data=payload)
 
     if not response.ok:
@@ -2035,9 +5354,10 @@ def begin_course_sync(
     if wait_for_completion:
         poll_migration(
             migration,
-            migration_url=f'{API_URL}/courses/{bp_course["id"]}/blueprint_templates/default/migrations/{migration["id"]}',
+            migration_url=f'{api_link.api_url}/courses/{bp_course["id"]}/blueprint_templates/default/migrations/{migration["id"]}',
             progress_bar=progress_bar,
-            progress_callback=progress_callback)
+            progress_callback=progress_callback,
+            api_link=api_link)
 
 
 def poll_migration(
@@ -2046,10 +5366,12 @@ def poll_migration(
         progress_bar: ttk.Progressbar | None = None,
         progress_callback: Callable = None,
         status_label: tk.Label | None = None,
-        poll_interval: float = 2.0):
+        poll_interval: float = 2.0,
+        api_link: CanvasApiLink = None):
     """
 
     Args:
+        api_link: The api link whose connection pool to poll with. Defaults to the default link
         progress_callback:
         migration(dict): a migration dict from canvas API
         migration_url(str): the url to poll, if different from that in the migration object
@@ -2061,11 +5383,13 @@ def poll_migration(
         The migration dict
 
     """
+    api_link = api_link if api_link is not None else get_default_api_link()
     if migration_url is None:
         migration_url = migration['progress_url']
-    response = requests.get(migration_url, headers=HEADERS)
+    response = api_link.request('GET', migration_url, cache=False)
     # poll the migration object until it is done
     while response.ok and migration['workflow_state'] in [
+        'created',
         'queued',
         'exporting',
         'imports_queued',
@@ -2083,10 +5407,14 @@ def poll_migration(
             if progress_callback is not None:
                 progress_callback(migration['completion'], status=migration['workflow_state'])
         time.sleep(poll_interval)
-        response = requests.get(migration_url, headers=HEADERS)
+        response = api_link.request('GET', migration_url, cache=False)
         if response.ok:
             migration = response.json()
 
+    # the migration changed content behind our back
+    if api_link.response_cache is not None:
+        api_link.response_cache.clear()
+
     if progress_bar is not None:
         update_progress_bar(progress_bar, 100)
     print(response)
@@ -2094,39 +5422,43 @@ def poll_migration(
     return migration
 
 
-def lock_module_items(course: Course, progress_bar: ttk.Progressbar | None = None):
+def lock_module_items(
+        course: Course,
+        progress_bar: ttk.Progressbar | None = None,
+        api_link: CanvasApiLink = None):
     """Summary
         Locks all module items in a blueprint course
 
     Args:
+        api_link: The api link whose connection pool to use. Defaults to the course's link
         progress_bar: A progress bar object to update
         course: The course to lock items on
     """
 
+    api_link = api_link if api_link is not None else course.api_link
     course_id = course.id
-    modules = course.get_modules()
 
-    total = 0
-    for module in modules:
-        if 'items' in module:
-            total = total + len(module['items'])
+    update_progress_bar(progress_bar, 0)
+    # the whole listing is read before locking, so the bar has a fixed total to count up to.
+    # compact records keep it small, and the locks take far longer than the listing does
+    modules = course.get_modules(compact=True)
+    total = sum(len(module['items']) for module in modules if 'items' in module)
     i = 0
     successes = 0
     failures = 0
-    update_progress_bar(progress_bar, 0)
     for module in modules:
         if 'items' not in module:
 
-            messagebox.showerror('error', 'Send a screenshot of this to hallie:\n' + json.dumps(module, indent=2) )
+            messagebox.showerror('error', 'Send a screenshot of this to hallie:\n' + json.dumps(module.to_dict(), indent=2) )
             continue
         for item in module['items']:
-            url = f"{API_URL}/courses/{course_id}/" \
+            url = f"{api_link.api_url}/courses/{course_id}/" \
                   + "blueprint_templates/default/restrict_item"
             i = i + 1
 
-            type_, id_ = get_item_type_and_id(item)
+            type_, id_ = get_item_type_and_id(item, api_link)
             if type_:
-                response = requests.put(url, headers=HEADERS, data={
+                response = api_link.request('PUT', url, data={
                     "content_type": type_,
                     "content_id": id_,
                     "restricted": True,
@@ -2138,7 +5470,7 @@ def lock_module_items(course: Course, progress_bar: ttk.Progressbar | None = Non
                     failures = failures + 1
                     print(response)
                     print(response.text)
-                    print(json.dumps(item, indent=2))
+                    print(json.dumps(item.to_dict(), indent=2))
 
                 update_progress_bar(progress_bar, i, total)
 
@@ -2146,9 +5478,22 @@ def lock_module_items(course: Course, progress_bar: ttk.Progressbar | None = Non
     return successes > 0 and failures == 0
 
 
-async def lock_module_items_async(course, progress_bar=None):
+async def lock_module_items_async(course, progress_bar=None, api_link: 'AsyncCanvasApiLink' = None):
+    """Summary
+        Locks all module items in a blueprint course, sending the locks concurrently
+        over one shared async session
+
+    Args:
+        course: The course to lock items on
+        progress_bar: A progress bar object to update
+        api_link: The async api link to use. One is opened and closed for this call if not provided.
+    """
+    if api_link is None:
+        async with AsyncCanvasApiLink(course.api_link) as api_link:
+            return await lock_module_items_async(course, progress_bar, api_link)
+
     # Get modules using asynchronous API call
-    modules = get_modules(course['id'])
+    modules = await course.get_modules_async(api_link, compact=True)
 
     # Iterate over modules and items asynchronously
 
@@ -2166,7 +5511,7 @@ async def lock_module_items_async(course, progress_bar=None):
                     nonlocal successes
                     nonlocal failures
                     nonlocal i
-                    success = await lock_module_item_async(course, to_lock)
+                    success = await lock_module_item_async(course, to_lock, api_link)
                     if success:
                         successes = successes + 1
                     elif success is not None:
@@ -2181,11 +5526,14 @@ async def lock_module_items_async(course, progress_bar=None):
         return True
 
 
-async def lock_module_item_async(course, item):
-    assert aiohttp
-    url = f"{API_URL}/courses/{course['id']}/blueprint_templates/default/restrict_item"
+async def lock_module_item_async(course, item, api_link: 'AsyncCanvasApiLink' = None):
+    if api_link is None:
+        async with AsyncCanvasApiLink(course.api_link) as api_link:
+            return await lock_module_item_async(course, item, api_link)
+
+    url = f"courses/{course['id']}/blueprint_templates/default/restrict_item"
 
-    type_, id_ = get_item_type_and_id(item)
+    type_, id_ = await get_item_type_and_id_async(item, api_link)
     print(item)
 
     data = {
@@ -2195,35 +5543,36 @@ async def lock_module_item_async(course, item):
     }
 
     if type_:
-        # Make asynchronous HTTP request to fetch page ID
-        async with aiohttp.ClientSession() as session:
-            async with session.put(url, headers=HEADERS, data=data) as response:
-                await response.text()
-                if response.ok:
-                    return True
-                else:
-                    return False
+        response = await api_link.request('PUT', url, data=data)
+        return response.ok
     else:
         return None
 
 
-def get_item_type_and_id(item: dict) -> tuple[Any, Any | None] | tuple[None, None]:
-    type_lut = {
-        'Assignment': 'assignment',
-        'Discussion': 'discussion_topic',
-        'Quiz': 'quiz',
-        'Attachment': 'attachment',
-        'External Tool': 'external_tool',
-        'File': 'file',
-        'Page': 'wiki_page'
-    }
-
-    if item['type'] in type_lut:
+MODULE_ITEM_CONTENT_TYPES = {
+    'Assignment': 'assignment',
+    'Discussion': 'discussion_topic',
+    'Quiz': 'quiz',
+    'Attachment': 'attachment',
+    'External Tool': 'external_tool',
+    'File': 'file',
+    'Page': 'wiki_page'
+}
+"""
+Maps module item types to the content types blueprint restrictions use
+"""
+
+
+def get_item_type_and_id(
+        item: dict,
+        api_link: CanvasApiLink = None) -> tuple[Any, Any | None] | tuple[None, None]:
+    if item['type'] in MODULE_ITEM_CONTENT_TYPES:
         id_ = None
-        type_ = type_lut[item["type"]]
+        type_ = MODULE_ITEM_CONTENT_TYPES[item["type"]]
         if type_ == "wiki_page":
             page_url = item["url"]
-            response = requests.get(page_url, headers=HEADERS)
+            api_link = api_link if api_link is not None else get_default_api_link()
+            response = api_link.request('GET', page_url)
             if response.ok and response.status_code == 200:
                 id_ = response.json()["page_id"]
         else:
@@ -2234,22 +5583,36 @@ def get_item_type_and_id(item: dict) -> tuple[Any, Any | None] | tuple[None, Non
         return None, None
 
 
+async def get_item_type_and_id_async(
+        item: dict,
+        api_link: 'AsyncCanvasApiLink') -> tuple[Any, Any | None] | tuple[None, None]:
+    if item['type'] not in MODULE_ITEM_CONTENT_TYPES:
+        return None, None
+
+    type_ = MODULE_ITEM_CONTENT_TYPES[item["type"]]
+    if type_ != "wiki_page":
+        return type_, item["content_id"]
 
+    response = await api_link.request('GET', item["url"])
+    if response.ok and response.status_code == 200:
+        return type_, response.json()["page_id"]
+    return type_, None
 
 
-def remove_lm_annotations_from_course(course):
+def remove_lm_annotations_from_course(course, snapshot: CourseSnapshot = None):
     """Summary
         Removes placeholder text for annotators from a course
         learning materials
 
     Args:
         course (TYPE): The course to remove
+        snapshot: a snapshot of the course to read modules and pages from, instead of the api
 
     Deleted Parameters:
         course (TYPE): The course to operate on
     """
     course_id = course['id']
-    modules = get_modules(course_id)
+    modules = snapshot.get_modules() if snapshot is not None else get_modules(course_id)
 
     def lm_page_filter(item):
         return item['type'] == 'Page' \
@@ -2259,16 +5622,19 @@ def remove_lm_annotations_from_course(course):
         # find an item in the module called "Week ? Learning Materials"
         lm_page = single_filter(lm_page_filter, module['items'])
         if lm_page:
-            url = f"{API_URL}/courses/{course['id']}/pages/{lm_page['page_url']}"
-            full_page = requests.get(url, headers=HEADERS).json()
+            if snapshot is not None:
+                full_page = snapshot.get_page(lm_page['page_url'])
+            else:
+                url = f"{API_URL}/courses/{course['id']}/pages/{lm_page['page_url']}"
+                full_page = get_default_api_link().request('GET', url).json()
             body = LmFilter.remove_lm_annotations(full_page['body'])
             print(lm_page['url'])
             data = {
                 'wiki_page[body]': body
             }
-            requests.put(
+            get_default_api_link().request(
+                'PUT',
                 lm_page['url'],
-                headers=HEADERS,
                 data=data)
 
 
@@ -2366,25 +5732,15 @@ def replace_faculty_profiles(
         else:
             return courses
 
-    pages = get_faculty_pages()
-    profiles = []
-    home_page_urls = []
-    i = 1
-
-    for course in courses:
-        profile = get_course_profile(course, pages)
-        profiles.append(profile)
-
-        # overwrite_home_page returns the course url. add that to list.
-        home_page_urls.append(course.overwrite_home_page(profile))
-
+    def update_progress(i):
         # update loading UI value after processing
         window.update_idletasks()
         window.update()
         progress_bar["value"] = (i / len(courses)) * 100
         window.update_idletasks()
         window.update()
-        i = i + 1
+
+    profiles, home_page_urls = update_faculty_profiles(courses, progress_callback=update_progress)
 
     bio_count = 0
     error_text = ""
@@ -2441,6 +5797,37 @@ def replace_faculty_profiles(
     return profiles
 
 
+def update_faculty_profiles(
+        courses: list[Course],
+        pages: list[Page] = None,
+        progress_callback: Callable[[int], None] = None) -> tuple[list, list[str]]:
+    """
+    Finds each course's instructor profile and writes it into the course home page
+    Args:
+        courses: The courses to update
+        pages: The faculty profile pages to search. Fetched with get_faculty_pages if not given.
+        progress_callback: Called with the number of courses handled so far, after each course
+
+    Returns:
+        The profiles found, None where a course has no instructor, and the urls of the updated home pages
+    """
+    if pages is None:
+        pages = get_faculty_pages()
+    profiles = []
+    home_page_urls = []
+
+    for i, course in enumerate(courses, 1):
+        profile = get_course_profile(course, pages)
+        profiles.append(profile)
+
+        # overwrite_home_page returns the course url. add that to list.
+        home_page_urls.append(course.overwrite_home_page(profile))
+        if progress_callback:
+            progress_callback(i)
+
+    return profiles, home_page_urls
+
+
 def open_browser_func(urls):
     """
     Opens a list of urls in a web browser
@@ -2837,7 +6224,7 @@ def get_canvas_instructor(course_id: int) -> dict | None:
     return None
 
 
-def get_paged_data(url: str, headers=None, params=None) -> list | None:
+def get_paged_data(url: str, headers=None, params=None, api_link: CanvasApiLink = None) -> list | None:
     """Summary
         returns a list of data from a get request, going through
         multiple pages of data requests as necessary
@@ -2846,35 +6233,38 @@ def get_paged_data(url: str, headers=None, params=None) -> list | None:
         params(dict): Any additional parameters to pass to the query
         url (str): The url to query
         headers (dict, optional): Headers for the request
+        api_link: The api link whose connection pool to use. Defaults to the default link
 
     Returns:
         list: Description
     """
-    if headers is None:
-        headers = HEADERS
-    response = requests.get(url, headers=headers, params=params)
-    out = response.json()
-    if not response.ok:
-        return None
-    next_page_link = "!"
-    while len(next_page_link) != 0 \
-            and 'link' in response.headers \
-            and response.ok:
-        pagination_links = response.headers["Link"].split(",")
-        for link in pagination_links:
-            if 'next' in link:
-                next_page_link = link.split(";")[0].split("<")[1].split(">")[0]
-                print(next_page_link)
-                response = requests.get(next_page_link, headers=headers, params=params)
-                out = out + response.json()
-                break
-            else:
-                next_page_link = ""
-    print(len(out))
+    api_link = api_link if api_link is not None else get_default_api_link()
+    # callers of the module level helpers often write with bare requests calls the link can't see,
+    # so they always read fresh
+    out = api_link.get_paged_data(url, headers=headers, params=params, cache=False)
+    if out is not None:
+        print(len(out))
 
     return out
 
 
+def iter_paged(url: str, headers=None, params=None, api_link: CanvasApiLink = None) -> Iterator:
+    """Summary
+        Yields the items of a paged listing as each page arrives
+
+    Args:
+        params(dict): Any additional parameters to pass to the query
+        url (str): The url to query
+        headers (dict, optional): Headers for the request
+        api_link: The api link whose connection pool to use. Defaults to the default link
+
+    Returns:
+        A generator of the items in the listing
+    """
+    api_link = api_link if api_link is not None else get_default_api_link()
+    return api_link.iter_paged(url, headers=headers, params=params, cache=False)
+
+
 def get_course_id_from_string(course_string: str):
     """Summary
         Gets a course id from a course code matching
@@ -12,41 +12,39 @@ from tkinter import ttk
 from publish_script import Quiz, Course
 CONSTANTS_FILE = 'constants.json'
 
-# Open the file and read the contents
-with open(CONSTANTS_FILE, 'r') as f:
-    constants = json.load(f)
 
-# save the api key
-api_token = constants["apiToken"]
-API_URL = constants["apiUrl"]
-
-
-# Authorize the request.
-headers = {"Authorization": f"Bearer {api_token}" }
-
-publish_script.load_constants(CONSTANTS_FILE)
+def main(course_id: int = None, offset: int = None):
+    """
+    Shifts every assignment and quiz due date in a course by a number of days
+    Args:
+        course_id: the course to shift. Taken from the command line, or asked for, if not given
+        offset: the number of days to shift by. Taken from the command line, or asked for, if not given
+    """
+    if course_id is None:
+        if len(sys.argv) > 1:
+            course_id = int(sys.argv[1])
+        else:
+            course_id = tk.simpledialog.askinteger(
+                "What Course?",
+                "Enter the course_id of the course" +
+                "(cut the number out of the url and paste here)")
 
-def main():
-    course_id: int
-    offset: int
-    if len(sys.argv) > 1:
-        course_id = int(sys.argv[1])
-    else:
-        course_id = tk.simpledialog.askinteger(
-            "What Course?",
-            "Enter the course_id of the course" +
-            "(cut the number out of the url and paste here)")
+    if offset is None:
+        if len(sys.argv) > 2:
+            offset = int(sys.argv[2])
+        else:
+            offset = tk.simpledialog.askinteger(
+                "How Many Days", "Enter the number of days to offset all assignment dates")
 
-    if len(sys.argv) > 2:
-        offset = int(sys.argv[2])
-    else:
-        offset = tk.simpledialog.askinteger("How Many Days", "Enter the number of days to offset all assignment dates")
+    if not offset:
+        print("An offset of 0 days wouldn't change any due dates")
+        return
 
     course = Course.get_by_id(course_id)
+    link = course.api_link
 
-    assignments = publish_script.get_paged_data(f"{API_URL}/courses/{course_id}/assignments?include=due_at")
-    quizzes = Quiz.get_all(course)
-    for quiz in quizzes:
+    assignments = link.iter_paged(f"courses/{course_id}/assignments?include=due_at")
+    for quiz in Quiz.iter_all(course):
         quiz.due_at_timedelta(days=offset)
 
     for assignment in assignments:
@@ -58,9 +56,9 @@ def main():
 
         due_at = datetime.datetime.fromisoformat(assignment["due_at"])
         due_at = due_at + datetime.timedelta(days=offset)
-        response = requests.put(
-            f"{API_URL}/courses/{course_id}/assignments/{assignment['id']}",
-            headers=headers,
+        response = link.request(
+            'PUT',
+            f"courses/{course_id}/assignments/{assignment['id']}",
             json={
                 "assignment": {
                     "id": assignment["id"],
@@ -75,5 +73,6 @@ def main():
             print(response.text)
 
 
-
-main()
+if __name__ == '__main__':
+    publish_script.load_constants(CONSTANTS_FILE)
+    main()
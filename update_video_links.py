@@ -9,6 +9,7 @@ from urllib.parse import urlparse, urlunparse
 import os
 import json
 import copy
+import warnings
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 from bs4 import BeautifulSoup
@@ -16,7 +17,6 @@ from bs4 import BeautifulSoup
 import publish_script
 import publish_script as ps
 from publish_script import Course
-from publish_script import get_paged_data
 
 ADD_LEARNING_MATERIALS = False
 UPDATE_SYLLABUS = True
@@ -28,58 +28,51 @@ UG_TERM_DATES = "January 15 - February 18"
 HOMETILE_WIDTH = 512
 GRAD_SCHEME_NAME = "DE Graduate Programs"
 
-publish_script.load_constants(CONSTANTS_FILE)
-# Open the file and read the contents
-try:
-    with open(CONSTANTS_FILE, 'r') as constants_file:
-        constants = json.load(constants_file)
-except ValueError:
-    messagebox.showerror(
-        message=f"Problem loading constants.json."
-                " Ask hallie for a copy of constants.json and put it in this folder.\n{e}")
-    exit()
-
-# save the api key
-try:
-    assert "apiToken" in constants, "No API Token provided"
-    API_TOKEN = constants["apiToken"]
-    assert API_TOKEN is not None, "No API Token provided"
-    API_URL = constants["apiUrl"]
-    html_url = re.sub(r'/api/v1', '', API_URL)
-    drive_url = None
-    if "driveUrl" in constants:
-        drive_url = constants["driveUrl"]
-except KeyError as e:
-    messagebox.showerror(
-        message=f"It looks like your constants file is missing some values."
-                "Ask hallie for a current copy of the constants.json file.\n{e}")
-    exit()
-
-# Authorize the request.
-headers = {
-    "Authorization": f"Bearer {API_TOKEN}",
-    "User-Agent": "UnityThemeMigratorBot/0.0"
-                  " (https://unity.edu; hlarsson@unity.edu)"
-}
 img_headers = {
     "User-Agent": "UnityThemeMigratorBot/0.0"
                   " (https://unity.edu; hlarsson@unity.edu)"
 }
 
-accounts = requests.get(f'{API_URL}/accounts', headers=headers).json()
-account_ids = dict()
-for _account in accounts:
-    account_ids[_account['name']] = _account['id']
+api_link: ps.CanvasApiLink | None = None
+"""
+The link every request in a run goes through. main sets it for its run.
+"""
+
 
-ACCOUNT_ID = account_ids['Distance Education']
-ROOT_ACCOUNT_ID = account_ids['Unity College']
+def get_api_link() -> ps.CanvasApiLink:
+    """
+    Returns:
+        The link set for this run, or publish_script's default link if none was set
+    """
+    return api_link if api_link is not None else ps.get_default_api_link()
 
-print(ACCOUNT_ID, ROOT_ACCOUNT_ID)
 
-account_id = ACCOUNT_ID
+def load_constants(path=CONSTANTS_FILE):
+    """
+    Loads the constants file into publish_script, explaining what's wrong if it's missing or incomplete
+    """
+    try:
+        publish_script.load_constants(path)
+    except (OSError, ValueError) as e:
+        messagebox.showerror(
+            message=f"Problem loading {path}."
+                    f" Ask hallie for a copy of constants.json and put it in this folder.\n{e}")
+        exit()
+    except KeyError as e:
+        messagebox.showerror(
+            message=f"It looks like your constants file is missing some values."
+                    f"Ask hallie for a current copy of the constants.json file.\n{e}")
+        exit()
+
 
+def main(link: ps.CanvasApiLink = None):
+    """
+    Args:
+        link: The link to send this run's requests through. One with our user agent is made if not given.
+    """
+    global api_link
+    api_link = link if link is not None else ps.CanvasApiLink(headers={**ps.HEADERS, **img_headers})
 
-def main():
     course_id_input: str | None = None
     source_course_id = None
 
@@ -96,9 +89,9 @@ def main():
 
         # YES we should replace with a course object but that's going to be a whole thing.
         if course_id_input.isnumeric():
-            course = Course.get_by_id(int(course_id_input))
+            course = Course.get_by_id(int(course_id_input), link=api_link)
         else:
-            course = Course.get_by_code(course_id_input)
+            course = Course.get_by_code(course_id_input, link=api_link)
 
         # Clear out course id input so if we re-loop, we ask for a new course
         course_id_input = None
@@ -118,7 +111,7 @@ def main():
             'DEV',
         ]
         for prefix in prefixes_to_try:
-            courses = Course.get_all_by_code(f'{prefix}_{base_code}')
+            courses = Course.get_all_by_code(f'{prefix}_{base_code}', link=api_link)
             if courses is not None and len(courses) > 0:
                 break
 
@@ -142,7 +135,7 @@ def main():
                     if prefix == "NEWDEV":
                         continue
 
-                source_course = Course(course)
+                source_course = Course(course, api_link=api_link)
                 source_course_id = source_course.id
                 continue
 
@@ -275,8 +268,8 @@ def execute_option(win, course_id, source_course_id, option):
 
 
 def revert_assignments(course_id):
-    assignments = get_paged_data(f"{API_URL}/courses/{course_id}/assignments")
-    discussions = get_paged_data(f"{API_URL}/courses/{course_id}/discussion_topics")
+    assignments = get_api_link().get_paged_data(f"courses/{course_id}/assignments")
+    discussions = get_api_link().get_paged_data(f"courses/{course_id}/discussion_topics")
 
     win = tk.Tk()
 
@@ -334,8 +327,8 @@ def revert_assignment(course_id, assignment_id):
     if not backup:
         print("no backup found for " + str(assignment_id))
         return False
-    url = f"{API_URL}/courses/{course_id}/assignments/{assignment_id}"
-    response = requests.put(url, headers=headers, data={
+    url = f"courses/{course_id}/assignments/{assignment_id}"
+    response = get_api_link().request('PUT', url, data={
         'assignment[name]': backup['name'],
         'assignment[description]': backup['description']
 
@@ -348,8 +341,8 @@ def revert_discussion(course_id, discussion_id):
     if not backup:
         print("no backup found for " + str(discussion_id))
         return False
-    url = f"{API_URL}/courses/{course_id}/discussion_topics/{discussion_id}"
-    response = requests.put(url, headers=headers, data={
+    url = f"courses/{course_id}/discussion_topics/{discussion_id}"
+    response = get_api_link().request('PUT', url, data={
         'title': backup['title'],
         'message': backup['message']
     })
@@ -378,27 +371,30 @@ def confirm_dialog(message):
 
 
 def update_assignment_categories(course_id, source_course_id):
-    url = f"{API_URL}/courses/{source_course_id}/assignment_groups"
-    response = requests.get(url, headers=headers)
+    url = f"courses/{source_course_id}/assignment_groups"
+    response = get_api_link().request('GET', url)
     source_groups = response.json()
 
-    url = f"{API_URL}/courses/{course_id}/assignment_groups"
-    response = requests.get(url, headers=headers)
+    url = f"courses/{course_id}/assignment_groups"
+    response = get_api_link().request('GET', url)
     destination_groups = response.json()
 
     for group in source_groups:
         dest_group = next(filter(lambda x: x['name'] == group['name'], destination_groups), None)
         if dest_group:
-            url = f"{API_URL}/courses/{course_id}/assignment_groups/{dest_group['id']}"
-            response = requests.put(url, headers=headers, data={
+            url = f"courses/{course_id}/assignment_groups/{dest_group['id']}"
+            if (dest_group['group_weight'], dest_group['position']) == (group['group_weight'], group['position']):
+                get_api_link().metrics.record_elided('PUT', get_api_link().full_url(url))
+                continue
+            response = get_api_link().request('PUT', url, data={
                 'group_weight': group['group_weight'],
                 'position': group['position'],
             })
             print(response)
             assert response.ok, "There was a problem updating assignment groups"
         else:
-            url = f"{API_URL}/courses/{course_id}/assignment_groups/"
-            response = requests.post(url, headers=headers, data={
+            url = f"courses/{course_id}/assignment_groups/"
+            response = get_api_link().request('POST', url, data={
                 'name': group['name'],
                 'group_weight': group['group_weight'],
                 'position': group['position'],
@@ -409,8 +405,8 @@ def update_assignment_categories(course_id, source_course_id):
 
 def set_hometiles(course_id):
     # Retrieve the home page content
-    home_page_url = f"{API_URL}/courses/{course_id}/pages/home"
-    response = requests.get(home_page_url, headers=headers)
+    home_page_url = f"courses/{course_id}/pages/home"
+    response = get_api_link().request('GET', home_page_url)
     page = response.json()
     soup = BeautifulSoup(page["body"], 'lxml')
 
@@ -443,8 +439,8 @@ def process_and_upload_overview_tiles(course_id, image_path):
     # Process and upload hometiles
     modules = get_modules(course_id)
     for i, module in enumerate(modules, start=1):
-        overview_url = f"{API_URL}/courses/{course_id}/pages/week_{i}_overview"
-        response = requests.get(overview_url, headers=headers)
+        overview_url = f"courses/{course_id}/pages/week_{i}_overview"
+        response = get_api_link().request('GET', overview_url)
 
         if response.ok:
             page = response.json()
@@ -459,6 +455,7 @@ def process_and_upload_overview_tiles(course_id, image_path):
 
 def retrieve_image(src):
     # Retrieve and save image data
+    # banner images can live off canvas, so these go out without our token
     response = requests.get(src, headers=img_headers)
     img_data = response.content
     ext = "png" if 'png' in response.headers["Content-Type"] else 'jpg'
@@ -473,13 +470,13 @@ def ensure_directory_exists(directory_path):
 
 def upload_hometile(course_id, local_path):
     # get the correct folder id
-    url = f"{API_URL}/courses/{course_id}/folders/by_path/Images/hometile"
-    response = requests.get(url, headers=headers)
+    url = f"courses/{course_id}/folders/by_path/Images/hometile"
+    response = get_api_link().request('GET', url)
     folders = response.json()
     hometile_folder = folders[-1]
 
     # upload the file
-    file_url = f"{API_URL}/courses/{course_id}/files"
+    file_url = f"courses/{course_id}/files"
     print(f"uploading {local_path} to {file_url}")
     data = {
         "name": os.path.basename(local_path),
@@ -488,13 +485,14 @@ def upload_hometile(course_id, local_path):
         "on_duplicate": "overwrite"
     }
 
-    response = requests.post(file_url, data=data, headers=headers)
+    response = get_api_link().request('POST', file_url, data=data)
     print(response)
     print(response.reason)
     if response.ok:
         response_data = response.json()
         files = {"file": open(local_path, 'rb')}
         url = response_data["upload_url"]
+        # the upload url is signed and not on the api, so it's posted to without our token
         response = requests.post(url, files=files, data=response_data['upload_params'])
         print(response)
         if not response.ok:
@@ -523,15 +521,67 @@ def save_hometile(img_data, data_folder, filename):
     return hometile_path
 
 
+course_structures: dict[int, Course] = {}
+"""
+The courses get_course_structures has loaded, by id
+"""
+course_structures_loaded_at: tuple[ps.CanvasApiLink, int] | None = None
+"""
+The link they were loaded through, and how many writes it had sent then
+"""
+
+
+def get_course_structures(*course_ids) -> list[Course] | None:
+    """
+    Loads the modules, assignments, discussions and rubric associations of the courses in a few graphql queries,
+    if "useGraphql" is set in the constants file.
+    Each course is loaded once and reused until the script writes anything through its link, since the write
+    may have changed it.
+    Returns:
+        The courses, in order, with their structure preloaded, or None if graphql isn't turned on
+        or canvas refused the query, in which case callers should use the REST api
+    """
+    global course_structures_loaded_at
+    if not getattr(ps, 'CONSTANTS', {}).get('useGraphql', False):
+        return None
+    link = get_api_link()
+    if course_structures_loaded_at != (link, link.writes_sent):
+        course_structures.clear()
+        course_structures_loaded_at = (link, link.writes_sent)
+
+    missing = list(dict.fromkeys(int(course_id) for course_id in course_ids if int(course_id) not in course_structures))
+    if missing:
+        courses = [Course({'id': course_id}, api_link=link) for course_id in missing]
+        try:
+            ps.CourseStructureLoader(link).load(courses)
+        except ps.GraphQLError as e:
+            warnings.warn(f"graphql query failed, falling back to the REST api: {e}")
+            return None
+        course_structures.update(zip(missing, courses))
+    return [course_structures[int(course_id)] for course_id in course_ids]
+
+
 def get_modules(course_id):
-    url = f"{API_URL}/courses/{course_id}/modules?include[]=items&include[]=content_details&per_page=100"
-    return get_paged_data(url)
+    url = f"courses/{course_id}/modules?include[]=items&include[]=content_details&per_page=100"
+    return get_api_link().get_paged_data(url)
+
+
+def get_module_outlines(*course_ids) -> list[list]:
+    """
+    Gets the modules of several courses with only the fields in Course.get_module_outline,
+    from their graphql structures if that's turned on
+    Returns:
+        Each course's modules, in order
+    """
+    structures = get_course_structures(*course_ids)
+    if structures:
+        return [course.get_module_outline() for course in structures]
+    return [get_modules(course_id) for course_id in course_ids]
 
 
 def create_missing_assignments(course_id, source_course_id):
     print("Creating missing assignments")
-    modules = get_modules(course_id)
-    source_modules = get_modules(source_course_id)
+    modules, source_modules = get_module_outlines(course_id, source_course_id)
 
     handled = []
     count = 0
@@ -577,10 +627,10 @@ def remove_module(course_id, module, delete_contents):
         for item in module["items"]:
             url = item["url"]
             print(f"Deleting {url}")
-            requests.delete(url, headers=headers)
+            get_api_link().request('DELETE', url)
 
-    url = f"{API_URL}/courses/{course_id}/modules/{module['id']}"
-    requests.delete(url, headers=headers)
+    url = f"courses/{course_id}/modules/{module['id']}"
+    get_api_link().request('DELETE', url)
 
 
 def create_missing_assignments_in_module(module, source_module, course_id, gallery_discussion_template):
@@ -601,8 +651,8 @@ def add_quizzes(module, source_module, course_id):
     if difference > 0:
         # we're looking for imported quizzes now
 
-        url = f"{API_URL}/courses/{course_id}/quizzes"
-        all_quizzes_in_course = get_paged_data(url)
+        url = f"courses/{course_id}/quizzes"
+        all_quizzes_in_course = get_api_link().get_paged_data(url)
         for source_quiz in source_quizzes:
             # if the quiz is there, we're good
             if next(filter(lambda item: item["title"] == source_quiz["title"], quizzes), None):
@@ -618,8 +668,8 @@ def add_quizzes(module, source_module, course_id):
                     filter(lambda item: item["title"].lower() in source_quiz["title"].lower(), all_quizzes_in_course),
                     None)
                 assert new_quiz, f"Quiz not found:{source_quiz['title']}"
-                url = f"{API_URL}/courses/{course_id}/modules/{module['id']}/items"
-                requests.post(url, headers=headers, data={
+                url = f"courses/{course_id}/modules/{module['id']}/items"
+                get_api_link().request('POST', url, data={
                     "module_item[type]": "Quiz",
                     "module_item[content_id]": new_quiz["id"],
                     "module_item[completion_requirement][type]": "must_submit",
@@ -696,8 +746,8 @@ def get_files_lookup_table(course_id, source_course_id, force=False):
                     files_lut_cache = json.load(f)
                     return files_lut_cache
 
-    files = get_paged_data(f"{API_URL}/courses/{course_id}/files?per_page=100")
-    source_files = get_paged_data(f"{API_URL}/courses/{source_course_id}/files?per_page=100")
+    files = get_api_link().get_paged_data(f"courses/{course_id}/files?per_page=100")
+    source_files = get_api_link().get_paged_data(f"courses/{source_course_id}/files?per_page=100")
 
     files_lut = dict()
     for source_file in source_files:
@@ -715,8 +765,8 @@ def get_files_lookup_table(course_id, source_course_id, force=False):
 
 
 def get_course(course_id):
-    url = f'{API_URL}/courses/{course_id}'
-    response = requests.get(url, headers=headers)
+    url = f'courses/{course_id}'
+    response = get_api_link().request('GET', url)
     return response.json()
 
 
@@ -743,13 +793,16 @@ def get_assignments_lookup_table(course_id, source_course_id, force=False):
                     assignments_lut_cache = json.load(f)
                     return assignments_lut_cache
 
-    source_modules = get_modules(source_course_id)
-
     # we have to create missing assignments as part of getting assignments lookup table
     create_missing_assignments(course_id, source_course_id)
 
     # reload modules after creating assignments
-    modules = get_modules(course_id)
+    structures = get_course_structures(course_id, source_course_id)
+    if structures:
+        modules, source_modules = [course.get_module_outline() for course in structures]
+    else:
+        modules = get_modules(course_id)
+        source_modules = get_modules(source_course_id)
 
     assignments_lut = dict()
 
@@ -779,8 +832,12 @@ def get_assignments_lookup_table(course_id, source_course_id, force=False):
         populate_lookup_table(assignments_lut, gallery_discussions, source_gallery_discussions)
 
     # We also want to associate discussions with their corresponding assignment ID
-    discussions = get_paged_data(f"{API_URL}/courses/{course_id}/discussion_topics")
-    source_discussions = get_paged_data(f"{API_URL}/courses/{source_course_id}/discussion_topics")
+    if structures:
+        discussions, source_discussions = [
+            [discussion._canvas_data for discussion in course.get_discussions()] for course in structures]
+    else:
+        discussions = get_api_link().get_paged_data(f"courses/{course_id}/discussion_topics")
+        source_discussions = get_api_link().get_paged_data(f"courses/{source_course_id}/discussion_topics")
 
     discussions_by_ids = dict()
     for discussion in discussions:
@@ -819,23 +876,36 @@ def get_rubrics_lookup_table(rubrics, source_rubrics):
 
 def align_rubrics(course_id, source_course_id):
     assignments_lut = get_assignments_lookup_table(course_id, source_course_id)
-    source_rubric_url = f"{API_URL}/courses/{source_course_id}/rubrics?per_page=100"
-    rubric_url = f"{API_URL}/courses/{course_id}/rubrics?per_page=100"
+    source_rubric_url = f"courses/{source_course_id}/rubrics?per_page=100"
+    rubric_url = f"courses/{course_id}/rubrics?per_page=100"
 
-    requests.post(source_rubric_url, headers=headers)
-    requests.post(rubric_url, headers=headers)
+    get_api_link().request('POST', source_rubric_url)
+    get_api_link().request('POST', rubric_url)
 
-    source_rubrics = get_paged_data(source_rubric_url)
-    rubrics = get_paged_data(rubric_url)
+    source_rubrics = get_api_link().get_paged_data(source_rubric_url)
+    rubrics = get_api_link().get_paged_data(rubric_url)
 
     rubrics_lut = get_rubrics_lookup_table(rubrics, source_rubrics)
+
+    # with graphql, every association comes in one query instead of a GET per rubric
+    associations_by_rubric = None
+    structures = get_course_structures(source_course_id)
+    if structures:
+        associations_by_rubric = {}
+        for association in structures[0].get_rubric_associations():
+            associations_by_rubric.setdefault(association['rubric_id'], []).append(association)
+
     for source_rubric in source_rubrics:
         try:
-            response = requests.get(f"{API_URL}/courses/{source_course_id}/rubrics/{source_rubric['id']}",
-                                    headers=headers, data={"include[]": "associations"})
-            assert response.ok, f"problem getting rubric {source_rubric['id']} : {source_rubric['description']}"
-            source_rubric_data = response.json()
-            for association in source_rubric_data["associations"]:
+            if associations_by_rubric is not None:
+                associations = associations_by_rubric.get(source_rubric['id'], [])
+            else:
+                response = get_api_link().request(
+                    'GET', f"courses/{source_course_id}/rubrics/{source_rubric['id']}",
+                    params={"include[]": "associations"})
+                assert response.ok, f"problem getting rubric {source_rubric['id']} : {source_rubric['description']}"
+                associations = response.json()["associations"]
+            for association in associations:
                 source_item_id = association["association_id"]
                 print(source_item_id)
                 if association["association_type"] == "Assignment":
@@ -859,8 +929,8 @@ def align_rubrics(course_id, source_course_id):
                         "rubric_association[use_for_grading]": True,
                     }
 
-                    url = f"{API_URL}/courses/{course_id}/rubric_associations"
-                    response = requests.post(url, headers=headers, data=payload)
+                    url = f"courses/{course_id}/rubric_associations"
+                    response = get_api_link().request('POST', url, data=payload)
 
                     assert response.ok
 
@@ -873,8 +943,7 @@ def align_rubrics(course_id, source_course_id):
 
 def align_assignments(course_id, source_course_id):
     get_assignments_lookup_table(course_id, source_course_id)
-    dest_modules = get_modules(course_id)
-    source_modules = get_modules(source_course_id)
+    dest_modules, source_modules = get_module_outlines(course_id, source_course_id)
 
     update_assignment_categories(course_id, source_course_id)
 
@@ -927,7 +996,8 @@ def get_new_file_url(src, course_id, source_course_id):
             url = re.sub('verifier(.*)&?', '', url)
             if "wrap" in src:
                 url = url + "wrap=1"
-            data_url = re.sub(html_url, API_URL, new_file['url'])
+            link = get_api_link()
+            data_url = re.sub(link.html_url, link.api_url, new_file['url'])
             return url, data_url
 
     return None, None
@@ -956,7 +1026,7 @@ def get_new_assignment_url(src, course_id, source_course_id):
             # handle everything else
             else:
                 content_id = new_assignment['id']
-            url = f"{html_url}/courses/{course_id}/{type_url_part}/{content_id}"
+            url = f"{get_api_link().html_url}/courses/{course_id}/{type_url_part}/{content_id}"
             data_url = url
 
             return url, data_url
@@ -1026,7 +1096,7 @@ def handle_items(dest_course_id, source_course_id, dest_items, source_items, han
     for source_item in source_items:
         item = dest_items[i]
         handled.append(item)
-        course_id_regex = re.compile(fr'{API_URL}/courses/(\d+)/(assignments|discussion_topics)/(\d+)')
+        course_id_regex = re.compile(fr'{get_api_link().api_url}/courses/(\d+)/(assignments|discussion_topics)/(\d+)')
         match = course_id_regex.match(dest_items[0]["url"])
         source_match = course_id_regex.match(source_item["url"])
 
@@ -1037,10 +1107,10 @@ def handle_items(dest_course_id, source_course_id, dest_items, source_items, han
 
         url = item["url"]
         source_url = source_item["url"]
-        response = requests.get(url, headers=headers)
+        response = get_api_link().request('GET', url)
         assert response.ok, json.dumps(response.json(), indent=2)
 
-        source_response = requests.get(source_url, headers=headers)
+        source_response = get_api_link().request('GET', source_url)
         assert source_response.ok, json.dumps(response.json(), indent=2)
 
         item = response.json()
@@ -1097,7 +1167,7 @@ def handle_discussion(item, source_item, course_id, source_course_id, put_url):
     replace_rubric_link(soup, item)
     update_links(soup, course_id, source_course_id)
 
-    requests.put(put_url, headers=headers, data={
+    get_api_link().request('PUT', put_url, data={
         "title": new_name,
         "message": postprocess_soup(soup)
     })
@@ -1154,7 +1224,7 @@ def handle_assignment(item, source_item, course_id, source_course_id, put_url):
     print('----------------------')
 
     print(source_assignment['submission_types'])
-    response = requests.put(put_url, headers=headers, data=payload)
+    response = get_api_link().request('PUT', put_url, data=payload)
     if not response.ok:
         print(response.json())
         print(json.dumps(payload, indent=2))
@@ -1162,9 +1232,9 @@ def handle_assignment(item, source_item, course_id, source_course_id, put_url):
 
 
 def remove_item_from_module(item, course_id):
-    url = f"{API_URL}/courses/{course_id}/modules/{item['module_id']}/items/{item['id']}"
+    url = f"courses/{course_id}/modules/{item['module_id']}/items/{item['id']}"
     print(url)
-    requests.delete(url, headers=headers)
+    get_api_link().request('DELETE', url)
     print("DELETING")
 
 
@@ -1188,8 +1258,8 @@ def add_to_payload_if_exists_in_source(key, wrapper, source, payload):
 
 
 def get_assignment(course_id, assignment_id):
-    url = f"{API_URL}/courses/{course_id}/assignments/{assignment_id}"
-    response = requests.get(url, headers=headers)
+    url = f"courses/{course_id}/assignments/{assignment_id}"
+    response = get_api_link().request('GET', url)
     if response.ok:
         return response.json()
     else:
@@ -1232,7 +1302,8 @@ def populate_lookup_table(lut, items, source_items):
 
 
 def remove_assignments_and_discussions_not_in_modules(course_id):
-    modules = get_modules(course_id)
+    structures = get_course_structures(course_id)
+    modules = structures[0].get_module_outline() if structures else get_modules(course_id)
     discussions_in_modules = []
     assignments_in_modules = []
 
@@ -1245,11 +1316,13 @@ def remove_assignments_and_discussions_not_in_modules(course_id):
                 print(item['content_id'])
                 assignments_in_modules.append(item['content_id'])
 
-    url = f"{API_URL}/courses/{course_id}/assignments"
-    assignments = get_paged_data(url)
-
+    url = f"courses/{course_id}/assignments"
     assignments_to_delete = []
     discussions_to_delete = []
+    if structures:
+        assignments = (assignment._canvas_data for assignment in structures[0].get_assignments())
+    else:
+        assignments = get_api_link().iter_paged(url)
     for assignment in assignments:
 
         # For now, we're not deleting quizzes
@@ -1269,7 +1342,7 @@ def remove_assignments_and_discussions_not_in_modules(course_id):
     if len(assignments_to_delete) > 0 and tk.messagebox.askyesno(
             message=f"Do you want to delete the following assignments?\n{assignments_string}"):
         for assignment in assignments_to_delete:
-            result = requests.delete(f"{API_URL}/courses/{course_id}/assignments/{assignment['id']}", headers=headers)
+            result = get_api_link().request('DELETE', f"courses/{course_id}/assignments/{assignment['id']}")
             print(result)
 
     discussions_string = '\n'.join(list(map(lambda a: a["title"], discussions_to_delete)))
@@ -1277,8 +1350,7 @@ def remove_assignments_and_discussions_not_in_modules(course_id):
     if len(discussions_to_delete) > 0 and tk.messagebox.askyesno(
             message=f"Do you want to delete the following discussions?\n{discussions_string}"):
         for discussion in discussions_to_delete:
-            result = requests.delete(f"{API_URL}/courses/{course_id}/discussion_topics/{discussion['id']}",
-                                     headers=headers)
+            result = get_api_link().request('DELETE', f"courses/{course_id}/discussion_topics/{discussion['id']}")
             print(result)
 
 
@@ -1310,14 +1382,14 @@ def duplicate_item(course_id, item, module=None):
     print(f"Duplicating assignment {item_id}")
 
     if type_ == "Assignment":
-        url = f"{API_URL}/courses/{course_id}/assignments/{item_id}/duplicate"
+        url = f"courses/{course_id}/assignments/{item_id}/duplicate"
     elif type_ == "Discussion":
-        url = f"{API_URL}/courses/{course_id}/discussion_topics/{item_id}/duplicate"
+        url = f"courses/{course_id}/discussion_topics/{item_id}/duplicate"
     else:
         return False
 
     print(url)
-    response = requests.post(url, headers=headers)
+    response = get_api_link().request('POST', url)
     if not response.ok:
         raise response.raise_for_status()
     item = response.json()
@@ -1328,7 +1400,7 @@ def duplicate_item(course_id, item, module=None):
     elif 'name' in item:
         item_name = item['name']
     print(f"Adding {type_} {item_name} to module {module['name']}")
-    url = f"{API_URL}/courses/{course_id}/modules/{module['id']}/items"
+    url = f"courses/{course_id}/modules/{module['id']}/items"
     print(url)
     payload = {
         "module_item[title]": item_name,
@@ -1345,7 +1417,7 @@ def duplicate_item(course_id, item, module=None):
         payload["module_item[completion_requirement][type]"] = "min_score"
         payload["module_item[completion_requirement][min_score]"] = "1"
 
-    response = requests.post(url, headers=headers, data=payload)
+    response = get_api_link().request('POST', url, data=payload)
     if not response.ok:
         raise response.raise_for_status()
 
@@ -1396,7 +1468,7 @@ def update_weekly_overviews(course_id, source_course_id):
 
             source_overview_page = get_page_by_url(source_overview_page_info["url"])
             source_lo_page = get_page_by_url(source_lo_page_info["url"])
-            overview_page = get_page_by_url(f"{API_URL}/courses/{course_id}/pages/week-{i}-overview")
+            overview_page = get_page_by_url(f"courses/{course_id}/pages/week-{i}-overview")
 
             source_overview_soup = BeautifulSoup(preprocess_html(source_overview_page["body"]), 'lxml')
             source_lo_soup = BeautifulSoup(preprocess_html(source_lo_page["body"]), 'lxml')
@@ -1422,16 +1494,16 @@ def update_weekly_overviews(course_id, source_course_id):
             new_page_body = new_overview_page_html(course_id, source_course_id, overview_page["body"], module_name,
                                                    description, learning_objectives)
 
-            requests.put(
-                f'{API_URL}/courses/{course_id}/pages/{overview_page["url"]}',
-                headers=headers,
+            get_api_link().request(
+                'PUT',
+                f'courses/{course_id}/pages/{overview_page["url"]}',
                 data={"wiki_page[body]": new_page_body})
 
 
 def set_module_title(course_id, module_id, title):
-    url = f"{API_URL}/courses/{course_id}/modules/{module_id}"
+    url = f"courses/{course_id}/modules/{module_id}"
     print(url)
-    requests.put(url, headers=headers, data={"module[name]": title})
+    get_api_link().request('PUT', url, data={"module[name]": title})
 
 
 def new_overview_page_html(course_id, source_course_id, overview_page_body, title, description, learning_objectives):
@@ -1451,14 +1523,14 @@ def new_overview_page_html(course_id, source_course_id, overview_page_body, titl
 
 
 def get_page_by_url(url):
-    response = requests.get(url, headers=headers)
+    response = get_api_link().request('GET', url)
     page = response.json()
     return page
 
 
 def get_file_url_by_name(course_id, file_search):
-    url = f"{API_URL}/courses/{course_id}/files"
-    response = requests.get(url, headers=headers, params={"search_term": file_search})
+    url = f"courses/{course_id}/files"
+    response = get_api_link().request('GET', url, params={"search_term": file_search})
     files = response.json()
     if len(files) > 0:
         return files[0]["url"]
@@ -1516,16 +1588,21 @@ def update_syllabus_and_overview(course_id, source_course_id):
 def set_course_grad(course_id):
     print("Setting grad course grading standards")
 
-    url = f"{API_URL}/accounts/{ACCOUNT_ID}"
-    account = requests.get(url, headers=headers).json()
+    api_link = get_api_link()
+    url = f"accounts/{api_link.account_id}"
+    account = ps.cached_metadata(
+        f"account {api_link.account_id}", lambda: api_link.request('GET', url).json(),
+        api_link.api_url, api_link.headers, keep=lambda result: 'root_account_id' in result)
 
-    url = f"{API_URL}/accounts/{account['root_account_id']}/grading_standards"
-    grading_standards = get_paged_data(url)
+    url = f"accounts/{account['root_account_id']}/grading_standards"
+    grading_standards = ps.cached_metadata(
+        f"grading_standards {account['root_account_id']}", lambda: api_link.get_paged_data(url),
+        api_link.api_url, api_link.headers)
     print(grading_standards)
     grad_standard = next(filter(lambda scheme: GRAD_SCHEME_NAME.lower() in scheme['title'].lower(), grading_standards),
                          None)
     assert grad_standard, f"Cannot find {GRAD_SCHEME_NAME}"
-    response = requests.put(f"{API_URL}/course/{course_id}", headers=headers, data={
+    response = get_api_link().request('PUT', f"course/{course_id}", data={
         "course[grading_standard_id]": grad_standard['id']
 
     })
@@ -1574,12 +1651,11 @@ def update_syllabus(course_id, syllabus_banner_url, term, dates, learning_object
         for el in list(submit_soup.find_all("div", class_="grad")):
             el.decompose()
 
-    response = requests.put(f'{API_URL}/courses/{course_id}',
-                            headers=headers,
-                            data={
-                                "course[syllabus_body]": str(submit_soup)
-                            }
-                            )
+    response = get_api_link().request('PUT', f'courses/{course_id}',
+                                      data={
+                                          "course[syllabus_body]": str(submit_soup)
+                                      }
+                                      )
     print(response.status_code)
 
 
@@ -1590,9 +1666,9 @@ def update_course_overview(course_id, source_course_id, learning_objectives_sect
 
     overview_module = next(filter(lambda module: module["position"] == 1, modules))
     page_id = overview_module['items'][0]['page_url']
-    url = f"{API_URL}/courses/{course_id}/pages/{page_id}"
+    url = f"courses/{course_id}/pages/{page_id}"
 
-    response = requests.get(url, headers=headers)
+    response = get_api_link().request('GET', url)
     print(response.status_code)
     overview_page = response.json()
 
@@ -1602,8 +1678,8 @@ def update_course_overview(course_id, source_course_id, learning_objectives_sect
     overview_banner_url = overview_banner_img["src"]
 
     # get assignment groups
-    url = f"{API_URL}/courses/{source_course_id}/assignment_groups"
-    response = requests.get(url, headers=headers)
+    url = f"courses/{source_course_id}/assignment_groups"
+    response = get_api_link().request('GET', url)
     groups = response.json()
     assignment_categories = groups
 
@@ -1648,9 +1724,9 @@ def update_course_overview(course_id, source_course_id, learning_objectives_sect
         exit()
 
     submit_soup = BeautifulSoup(text, "lxml")
-    requests.put(
-       f'{API_URL}/courses/{course_id}/pages/course-overview',
-       headers=headers,
+    get_api_link().request(
+       'PUT',
+       f'courses/{course_id}/pages/course-overview',
        data={"wiki_page[body]": str(submit_soup)})
 
 
@@ -1664,8 +1740,8 @@ def update_home_page(course_id, source_course_id, course_code, course_title):
 
     print(f'updating {course_code} : {course_title}')
 
-    source_url = f"{API_URL}/courses/{source_course_id}/pages/course-introduction"
-    response = requests.get(source_url, headers=headers)
+    source_url = f"courses/{source_course_id}/pages/course-introduction"
+    response = get_api_link().request('GET', source_url)
     if not response.ok:
         raise Exception("There was a problem getting course introduction from source course")
 
@@ -1681,8 +1757,8 @@ def update_home_page(course_id, source_course_id, course_code, course_title):
         if divs:
             description = '\n'.join(list(map(lambda x: str(x), divs)))
 
-    dest_url = f"{API_URL}/courses/{course_id}/pages/home"
-    response = requests.get(dest_url, headers=headers)
+    dest_url = f"courses/{course_id}/pages/home"
+    response = get_api_link().request('GET', dest_url)
     if not response.ok:
         raise Exception("There was a problem finding destination home page")
 
@@ -1695,7 +1771,7 @@ def update_home_page(course_id, source_course_id, course_code, course_title):
 
     print(dest_text)
 
-    response = requests.put(f"{API_URL}/courses/{course_id}/pages/{dest_page['page_id']}", headers=headers, data={
+    response = get_api_link().request('PUT', f"courses/{course_id}/pages/{dest_page['page_id']}", data={
         "wiki_page[body]": dest_text
     })
     print(response.json())
@@ -1710,8 +1786,8 @@ def stringify_section(section):
 
 
 def get_syllabus(course_id):
-    url = f"{API_URL}/courses/{course_id}?include[]=syllabus_body"
-    response = requests.get(url, headers=headers)
+    url = f"courses/{course_id}?include[]=syllabus_body"
+    response = get_api_link().request('GET', url)
     content = response.json()
     return BeautifulSoup(preprocess_html(content["syllabus_body"]), "lxml")
 
@@ -1836,8 +1912,8 @@ def convert_to_watch_url(embed_url: str) -> Literal[b""]:
 
 
 def get_week_1_preview(course_id, source_course_id):
-    source_lm_url = f"{API_URL}/courses/{source_course_id}/pages/week_1_learning_materials"
-    lm_response = requests.get(source_lm_url, headers=headers)
+    source_lm_url = f"courses/{source_course_id}/pages/week_1_learning_materials"
+    lm_response = get_api_link().request('GET', source_lm_url)
 
     print(lm_response)
 
@@ -1891,12 +1967,12 @@ def get_week_1_preview(course_id, source_course_id):
 
 
 def get_latest_lm_backup(course_id, week_num):
-    url = f"{API_URL}/courses/{course_id}/pages/"
+    url = f"courses/{course_id}/pages/"
     print(url)
-    response = requests.get(
+    response = get_api_link().request(
+        'GET',
         url,
-        headers=headers,
-        data={
+        params={
             "sort": "created_at",
             "search_term": f"Week {week_num} Learning Materials"
         })
@@ -1932,24 +2008,24 @@ def update_learning_materials(course_id: str, source_course_id: str, start_index
 
     print("Updating Learning Materials")
     for i in range(start_index, end_index + 1):
-        source_url = f"{API_URL}/courses/{source_course_id}/pages/week_{i}_learning_materials"
-        new_url = f"{API_URL}/courses/{course_id}/pages/week_{i}_learning_materials"
+        source_url = f"courses/{source_course_id}/pages/week_{i}_learning_materials"
+        new_url = f"courses/{course_id}/pages/week_{i}_learning_materials"
         # source_url = get_latest_lm_backup(course_id, i)
 
         print(f"copying from {source_url} to {new_url}")
 
         if reset_page:
             print("Resetting transcript page")
-            result = requests.post(f"{new_url}/revisions/1", headers=headers)
+            result = get_api_link().request('POST', f"{new_url}/revisions/1")
             print(result)
 
-        source_page_response = requests.get(source_url, headers=headers)
+        source_page_response = get_api_link().request('GET', source_url)
         if not source_page_response.ok:
             print(f"source page not found {i}")
             continue
         source_page = source_page_response.json()
 
-        new_page_response = requests.get(new_url, headers=headers)
+        new_page_response = get_api_link().request('GET', new_url)
         if not new_page_response.ok:
             print(f"new page not found {i}")
             continue
@@ -2025,12 +2101,11 @@ def update_learning_materials(course_id: str, source_course_id: str, start_index
         update_links(new_soup, course_id, source_course_id)
 
         # save changes
-        response = requests.put(f'{API_URL}/courses/{course_id}/pages/{new_page["page_id"]}',
-                                headers=headers,
-                                data={
-                                    "wiki_page[body]": postprocess_soup(new_soup)
-                                }
-                                )
+        response = get_api_link().request('PUT', f'courses/{course_id}/pages/{new_page["page_id"]}',
+                                          data={
+                                              "wiki_page[body]": postprocess_soup(new_soup)
+                                          }
+                                          )
         print(new_page["title"], response.status_code)
 
 
@@ -2192,4 +2267,8 @@ def postprocess_soup(soup, remove_styling_span=False):
 
 
 if __name__ == '__main__':
-    main()
+    load_constants()
+    try:
+        main()
+    finally:
+        ps.report_metrics(api_link=get_api_link())